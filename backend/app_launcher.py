@@ -12,6 +12,11 @@ import json
 from datetime import datetime
 from pathlib import Path
 
+from command_runner import run_command
+
+# Process listings can be long; keep them whole
+LISTING_MAX_BYTES = 8 * 1024 * 1024
+
 
 class AppLauncher:
     def __init__(self):
@@ -122,12 +127,8 @@ class AppLauncher:
         """Get list of currently running applications"""
         try:
             if self.platform == "windows":
-                result = subprocess.run(
-                    ["tasklist", "/fo", "csv"],
-                    capture_output=True,
-                    text=True
-                )
-                lines = result.stdout.strip().split('\n')[1:]  # Skip header
+                result = run_command(["tasklist", "/fo", "csv"], timeout=15, max_bytes=LISTING_MAX_BYTES)
+                lines = result['stdout'].strip().split('\n')[1:]  # Skip header
                 apps = []
                 for line in lines:
                     if line:
@@ -140,12 +141,8 @@ class AppLauncher:
                             })
                 return apps
             elif self.platform == "darwin":
-                result = subprocess.run(
-                    ["ps", "-eo", "pid,comm"],
-                    capture_output=True,
-                    text=True
-                )
-                lines = result.stdout.strip().split('\n')[1:]
+                result = run_command(["ps", "-eo", "pid,comm"], timeout=15, max_bytes=LISTING_MAX_BYTES)
+                lines = result['stdout'].strip().split('\n')[1:]
                 apps = []
                 for line in lines:
                     if line.strip():
@@ -157,12 +154,8 @@ class AppLauncher:
                             })
                 return apps
             else:  # Linux
-                result = subprocess.run(
-                    ["ps", "-eo", "pid,comm"],
-                    capture_output=True,
-                    text=True
-                )
-                lines = result.stdout.strip().split('\n')[1:]
+                result = run_command(["ps", "-eo", "pid,comm"], timeout=15, max_bytes=LISTING_MAX_BYTES)
+                lines = result['stdout'].strip().split('\n')[1:]
                 apps = []
                 for line in lines:
                     if line.strip():
@@ -182,38 +175,22 @@ class AppLauncher:
             if self.platform == "windows":
                 if app_name_or_pid.isdigit():
                     # It's a PID
-                    result = subprocess.run(
-                        ["taskkill", "/F", "/PID", app_name_or_pid],
-                        capture_output=True,
-                        text=True
-                    )
+                    result = run_command(["taskkill", "/F", "/PID", app_name_or_pid], timeout=15)
                 else:
                     # It's an app name
-                    result = subprocess.run(
-                        ["taskkill", "/F", "/IM", app_name_or_pid],
-                        capture_output=True,
-                        text=True
-                    )
+                    result = run_command(["taskkill", "/F", "/IM", app_name_or_pid], timeout=15)
             else:
                 if app_name_or_pid.isdigit():
                     # It's a PID
-                    result = subprocess.run(
-                        ["kill", "-9", app_name_or_pid],
-                        capture_output=True,
-                        text=True
-                    )
+                    result = run_command(["kill", "-9", app_name_or_pid], timeout=15)
                 else:
                     # It's an app name
-                    result = subprocess.run(
-                        ["pkill", "-f", app_name_or_pid],
-                        capture_output=True,
-                        text=True
-                    )
+                    result = run_command(["pkill", "-f", app_name_or_pid], timeout=15)
             
-            if result.returncode == 0:
+            if result['return_code'] == 0:
                 return {"success": True, "message": f"Application '{app_name_or_pid}' terminated"}
             else:
-                return {"success": False, "error": result.stderr}
+                return {"success": False, "error": result.get('error') or result['stderr']}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
@@ -224,12 +201,15 @@ class AppLauncher:
     def open_file(self, file_path):
         """Open a file with the default application"""
         try:
+            result = {}
             if self.platform == "windows":
                 os.startfile(file_path)
             elif self.platform == "darwin":
-                subprocess.run(["open", file_path])
+                result = run_command(["open", file_path], timeout=15, capture=False)
             else:  # Linux
-                subprocess.run(["xdg-open", file_path])
+                result = run_command(["xdg-open", file_path], timeout=15, capture=False)
+            if result.get('error'):
+                return {"success": False, "error": result['error']}
             
             return {"success": True, "message": f"File opened: {file_path}"}
         except Exception as e:
@@ -238,12 +218,15 @@ class AppLauncher:
     def open_url(self, url):
         """Open a URL in the default browser"""
         try:
+            result = {}
             if self.platform == "windows":
                 os.startfile(url)
             elif self.platform == "darwin":
-                subprocess.run(["open", url])
+                result = run_command(["open", url], timeout=15, capture=False)
             else:  # Linux
-                subprocess.run(["xdg-open", url])
+                result = run_command(["xdg-open", url], timeout=15, capture=False)
+            if result.get('error'):
+                return {"success": False, "error": result['error']}
             
             return {"success": True, "message": f"URL opened: {url}"}
         except Exception as e:
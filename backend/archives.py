@@ -0,0 +1,402 @@
+"""
+Archive Module
+Streaming create and extract for zip, tar, tar.gz and tar.zst archives
+Entries are copied in fixed-size chunks so memory stays flat for any file size;
+tar.gz output is cut into chunks that are gzipped in parallel as separate
+gzip members (readable by any gzip tool) and tar.zst uses zstd's own threads;
+extraction refuses entries that would land outside the destination
+"""
+
+import gzip
+import os
+import stat as stat_module
+import tarfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+from fileio import temp_path, replace_file
+
+try:
+    import zstandard
+    zstd_available = True
+except ImportError:
+    zstd_available = False
+
+ARCHIVE_FORMATS = ('zip', 'tar', 'tar.gz', 'tar.zst')
+COPY_CHUNK = 1024 * 1024
+# Uncompressed bytes per independently gzipped member
+GZIP_CHUNK = 1024 * 1024
+
+ArchiveProgress = Callable[[Dict[str, Any]], Any]
+
+
+class ArchiveCancelled(Exception):
+    """Raised inside a copy loop when the job was cancelled"""
+
+
+def archive_format(path: str) -> Optional[str]:
+    """Format implied by an archive file name, e.g. .tgz -> tar.gz"""
+    name = path.lower()
+    for suffixes, fmt in (((".tar.gz", ".tgz"), 'tar.gz'), ((".tar.zst", ".tzst"), 'tar.zst'),
+                          ((".tar",), 'tar'), ((".zip",), 'zip')):
+        if name.endswith(suffixes):
+            return fmt
+    return None
+
+
+def sniff_format(path: str) -> Optional[str]:
+    """Format of an existing archive from its magic bytes"""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic[:2] == b'PK':
+        return 'zip'
+    if magic[:2] == b'\x1f\x8b':
+        return 'tar.gz'
+    if magic == b'\x28\xb5\x2f\xfd':
+        return 'tar.zst'
+    return 'tar' if tarfile.is_tarfile(path) else None
+
+
+class ParallelGzipWriter:
+    """Write-only file object that gzips GZIP_CHUNK pieces on a thread pool, keeping output order"""
+
+    def __init__(self, fileobj, level: int = 6, workers: int = 4, chunk_size: int = GZIP_CHUNK):
+        self.fileobj = fileobj
+        self.level = level
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="jarvis-gzip")
+        self.buffer = bytearray()
+        self.pending = deque()
+
+    def _compress(self, data: bytes) -> bytes:
+        # zlib releases the GIL, so members compress in parallel
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def _submit(self, data: bytes):
+        self.pending.append(self.pool.submit(self._compress, data))
+        # At most two chunks per worker in flight bounds memory
+        while len(self.pending) > self.workers * 2:
+            self.fileobj.write(self.pending.popleft().result())
+
+    def write(self, data) -> int:
+        self.buffer += data
+        while len(self.buffer) >= self.chunk_size:
+            self._submit(bytes(self.buffer[:self.chunk_size]))
+            del self.buffer[:self.chunk_size]
+        return len(data)
+
+    def close(self):
+        try:
+            if self.buffer:
+                self._submit(bytes(self.buffer))
+                self.buffer = bytearray()
+            while self.pending:
+                self.fileobj.write(self.pending.popleft().result())
+        finally:
+            self.pool.shutdown(wait=True)
+
+
+class _Counter:
+    """Progress and cancellation shared by the copy loops"""
+
+    def __init__(self, progress: Optional[ArchiveProgress], cancel: Optional[threading.Event]):
+        self.progress = progress
+        self.cancel = cancel
+        self.files = 0
+        self.directories = 0
+        self.bytes = 0
+        self.skipped = 0
+        self.errors: List[Dict[str, str]] = []
+
+    def check(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise ArchiveCancelled()
+
+    def add_bytes(self, count: int):
+        self.bytes += count
+
+    def add_file(self, path: str):
+        self.files += 1
+        if self.progress and self.files % 100 == 0:
+            self.progress({"files": self.files, "bytes_done": self.bytes, "current": path})
+
+    def add_error(self, path: str, error):
+        self.errors.append({"path": path, "error": str(error)})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "files": self.files,
+            "directories": self.directories,
+            "bytes": self.bytes,
+            "skipped": self.skipped,
+            "error_count": len(self.errors),
+            "errors": self.errors[:100]
+        }
+
+
+class _CountingReader:
+    """File wrapper for tarfile.addfile that reports bytes and honours cancellation"""
+
+    def __init__(self, f, counter: _Counter):
+        self.f = f
+        self.counter = counter
+
+    def read(self, size: int = -1) -> bytes:
+        self.counter.check()
+        data = self.f.read(size)
+        self.counter.add_bytes(len(data))
+        return data
+
+
+def _copy(src, dst, counter: _Counter):
+    while True:
+        counter.check()
+        block = src.read(COPY_CHUNK)
+        if not block:
+            return
+        dst.write(block)
+        counter.add_bytes(len(block))
+
+
+def _entries(sources: List[str], skip: Tuple[str, ...]) -> Iterator[Tuple[str, str, bool]]:
+    """Yield (path, arcname, is_dir) top-down; each source is stored under its own name"""
+    for source in sources:
+        base = os.path.basename(os.path.normpath(source))
+        if not os.path.isdir(source) or os.path.islink(source):
+            yield source, base, False
+            continue
+        stack = [(source, base)]
+        while stack:
+            directory, arc_directory = stack.pop()
+            yield directory, arc_directory, True
+            try:
+                with os.scandir(directory) as it:
+                    children = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            subdirs = []
+            for entry in children:
+                if os.path.abspath(entry.path) in skip:
+                    continue
+                arcname = f"{arc_directory}/{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((entry.path, arcname))
+                else:
+                    yield entry.path, arcname, False
+            stack.extend(reversed(subdirs))
+
+
+def _write_tar(out, sources: List[str], skip: Tuple[str, ...], counter: _Counter):
+    with tarfile.open(fileobj=out, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+        for path, arcname, is_dir in _entries(sources, skip):
+            counter.check()
+            try:
+                info = tar.gettarinfo(path, arcname)
+                if info.isreg():
+                    with open(path, 'rb') as f:
+                        tar.addfile(info, _CountingReader(f, counter))
+                    counter.add_file(path)
+                elif info.isdir():
+                    tar.addfile(info)
+                    counter.directories += 1
+                elif info.issym():
+                    tar.addfile(info)
+                    counter.add_file(path)
+                else:
+                    counter.skipped += 1
+            except OSError as e:
+                counter.add_error(path, e)
+
+
+def _write_zip(out, sources: List[str], skip: Tuple[str, ...], level: int, counter: _Counter):
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=level) as zf:
+        for path, arcname, is_dir in _entries(sources, skip):
+            counter.check()
+            try:
+                if is_dir:
+                    zf.writestr(zipfile.ZipInfo.from_file(path, arcname), b'')
+                    counter.directories += 1
+                elif os.path.islink(path) or not os.path.isfile(path):
+                    # zip has no portable symlink or device entries
+                    counter.skipped += 1
+                else:
+                    info = zipfile.ZipInfo.from_file(path, arcname)
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    with open(path, 'rb') as src, zf.open(info, 'w') as dst:
+                        _copy(src, dst, counter)
+                    counter.add_file(path)
+            except OSError as e:
+                counter.add_error(path, e)
+
+
+def create_archive(sources: List[str], archive_path: str, fmt: Optional[str] = None, level: int = 6,
+                   workers: int = 4, progress: Optional[ArchiveProgress] = None,
+                   cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Pack files and directories into archive_path, written to a temp file and renamed into place"""
+    fmt = fmt or archive_format(archive_path)
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format: {fmt or archive_path}")
+    if fmt == 'tar.zst' and not zstd_available:
+        raise RuntimeError("tar.zst needs the zstandard package: pip install zstandard")
+    counter = _Counter(progress, cancel)
+    temp = temp_path(archive_path)
+    # Never pack the archive into itself
+    skip = (os.path.abspath(archive_path), os.path.abspath(temp))
+    try:
+        with open(temp, 'wb') as raw:
+            if fmt == 'zip':
+                _write_zip(raw, sources, skip, level, counter)
+            elif fmt == 'tar':
+                _write_tar(raw, sources, skip, counter)
+            elif fmt == 'tar.gz':
+                writer = ParallelGzipWriter(raw, level, workers)
+                try:
+                    _write_tar(writer, sources, skip, counter)
+                finally:
+                    writer.close()
+            else:
+                compressor = zstandard.ZstdCompressor(level=level, threads=max(1, workers))
+                with compressor.stream_writer(raw, closefd=False) as writer:
+                    _write_tar(writer, sources, skip, counter)
+        replace_file(temp, archive_path)
+    except ArchiveCancelled:
+        os.remove(temp)
+        return {**counter.to_dict(), "format": fmt, "cancelled": True}
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return {**counter.to_dict(), "format": fmt, "size": os.path.getsize(archive_path), "cancelled": False}
+
+
+def _safe_target(destination: str, name: str) -> Optional[str]:
+    """Where an entry would be written, or None if it would escape destination"""
+    name = name.replace('\\', '/')
+    if not name or name.startswith('/') or (len(name) > 1 and name[1] == ':'):
+        return None
+    if '..' in name.split('/'):
+        return None
+    target = os.path.realpath(os.path.join(destination, *[part for part in name.split('/') if part]))
+    if target != destination and not target.startswith(destination.rstrip(os.sep) + os.sep):
+        # An earlier symlink in the path points elsewhere
+        return None
+    return target
+
+
+def _extract_tar(tar: tarfile.TarFile, destination: str, overwrite: bool, counter: _Counter):
+    directories = []
+    for member in tar:
+        counter.check()
+        target = _safe_target(destination, member.name)
+        if target is None:
+            counter.add_error(member.name, "Entry would be written outside the destination")
+            continue
+        try:
+            if member.isdir():
+                os.makedirs(target, exist_ok=True)
+                directories.append((target, member))
+                counter.directories += 1
+                continue
+            if not (member.isreg() or member.issym() or member.islnk()):
+                counter.skipped += 1
+                continue
+            if os.path.lexists(target):
+                if not overwrite:
+                    counter.add_error(member.name, "File exists")
+                    continue
+                os.remove(target)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if member.issym():
+                link_target = os.path.join(os.path.dirname(target), member.linkname)
+                if os.path.isabs(member.linkname) or _safe_target(destination, os.path.relpath(link_target, destination)) is None:
+                    counter.add_error(member.name, "Symlink points outside the destination")
+                    continue
+                os.symlink(member.linkname, target)
+            elif member.islnk():
+                source = _safe_target(destination, member.linkname)
+                if source is None or not os.path.isfile(source):
+                    counter.add_error(member.name, "Hard link points outside the destination")
+                    continue
+                os.link(source, target)
+            else:
+                src = tar.extractfile(member)
+                with open(target, 'wb') as dst:
+                    _copy(src, dst, counter)
+                # Permission bits only; never setuid/setgid from an archive
+                os.chmod(target, member.mode & 0o777)
+                os.utime(target, (member.mtime, member.mtime))
+            counter.add_file(target)
+        except OSError as e:
+            counter.add_error(member.name, e)
+    # Directory times last, deepest first, once their contents are written
+    for target, member in reversed(directories):
+        try:
+            os.utime(target, (member.mtime, member.mtime))
+        except OSError:
+            pass
+
+
+def _extract_zip(zf: zipfile.ZipFile, destination: str, overwrite: bool, counter: _Counter):
+    for info in zf.infolist():
+        counter.check()
+        target = _safe_target(destination, info.filename)
+        if target is None:
+            counter.add_error(info.filename, "Entry would be written outside the destination")
+            continue
+        try:
+            if info.is_dir():
+                os.makedirs(target, exist_ok=True)
+                counter.directories += 1
+                continue
+            if os.path.lexists(target):
+                if not overwrite:
+                    counter.add_error(info.filename, "File exists")
+                    continue
+                os.remove(target)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with zf.open(info) as src, open(target, 'wb') as dst:
+                _copy(src, dst, counter)
+            mode = (info.external_attr >> 16) & 0o777
+            if mode and stat_module.S_ISREG(info.external_attr >> 16):
+                os.chmod(target, mode)
+            counter.add_file(target)
+        except (OSError, zipfile.BadZipFile) as e:
+            counter.add_error(info.filename, e)
+
+
+def extract_archive(archive_path: str, destination: str, overwrite: bool = False,
+                    progress: Optional[ArchiveProgress] = None,
+                    cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Unpack an archive into destination, streaming entries and skipping unsafe ones"""
+    fmt = sniff_format(archive_path)
+    if fmt is None:
+        raise ValueError(f"Not a zip or tar archive: {archive_path}")
+    if fmt == 'tar.zst' and not zstd_available:
+        raise RuntimeError("tar.zst needs the zstandard package: pip install zstandard")
+    os.makedirs(destination, exist_ok=True)
+    destination = os.path.realpath(destination)
+    counter = _Counter(progress, cancel)
+    try:
+        if fmt == 'zip':
+            with zipfile.ZipFile(archive_path) as zf:
+                _extract_zip(zf, destination, overwrite, counter)
+        elif fmt == 'tar.zst':
+            with open(archive_path, 'rb') as raw:
+                reader = zstandard.ZstdDecompressor().stream_reader(raw)
+                with tarfile.open(fileobj=reader, mode='r|') as tar:
+                    _extract_tar(tar, destination, overwrite, counter)
+        elif fmt == 'tar.gz':
+            # GzipFile reads every member; tarfile's own r|gz stops after the first
+            with gzip.open(archive_path, 'rb') as raw, tarfile.open(fileobj=raw, mode='r|') as tar:
+                _extract_tar(tar, destination, overwrite, counter)
+        else:
+            # Stream mode reads the archive front to back without seeking
+            with tarfile.open(archive_path, mode='r|') as tar:
+                _extract_tar(tar, destination, overwrite, counter)
+    except ArchiveCancelled:
+        return {**counter.to_dict(), "format": fmt, "cancelled": True}
+    return {**counter.to_dict(), "format": fmt, "cancelled": False}
@@ -0,0 +1,351 @@
+"""
+Benchmark Script
+Times SystemController hot paths on synthetic directory trees
+Builds many-small-files, few-huge-files and deep-nesting trees in a temp
+directory, runs each case a few times and writes the timings as JSON; pass
+an earlier result with --baseline to fail on regressions
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+from file_cache import FileCache
+from system_controller import SystemController
+
+# Tree sizes per scale: (small files, small file bytes, huge files, huge file MB, nesting depth)
+SCALES = {
+    'small': (1000, 1024, 1, 16, 20),
+    'medium': (5000, 2048, 2, 64, 40),
+    'large': (20000, 4096, 3, 256, 80),
+}
+SMALL_FILES_PER_DIR = 500
+# Share of the small files touched per iteration by the read/copy/move cases
+SAMPLE_FILES = 200
+# Allowed slowdown before a case counts as a regression, on top of --threshold for noisy I/O cases
+CASE_TOLERANCE = {
+    'copy_file_small': 0.15,
+    'copy_file_huge': 0.15,
+    'delete_directory': 0.15,
+}
+
+
+class Case:
+    """One benchmark: setup runs untimed before every iteration, run is timed, ops is work per run"""
+
+    def __init__(self, name: str, run: Callable[[], Any], ops: int, setup: Optional[Callable[[], Any]] = None,
+                 teardown: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.run = run
+        self.ops = ops
+        self.setup = setup
+        self.teardown = teardown
+
+
+def _write_file(path: str, size: int, text: bool = False):
+    with open(path, 'wb') as f:
+        if text:
+            line = b'benchmark line with some text in it 0123456789\n'
+            f.write(line * (size // len(line)))
+        else:
+            block = os.urandom(min(size, 1024 * 1024))
+            written = 0
+            while written < size:
+                f.write(block[:size - written])
+                written += len(block)
+
+
+def build_trees(root: str, scale: str) -> Dict[str, Any]:
+    """Create the synthetic trees under root and return the paths the cases use"""
+    small_count, small_bytes, huge_count, huge_mb, depth = SCALES[scale]
+
+    small_root = os.path.join(root, 'many_small')
+    small_files = []
+    for i in range(small_count):
+        directory = os.path.join(small_root, f'dir{i // SMALL_FILES_PER_DIR:03d}')
+        if i % SMALL_FILES_PER_DIR == 0:
+            os.makedirs(directory)
+        path = os.path.join(directory, f'file{i:06d}.txt')
+        _write_file(path, small_bytes, text=True)
+        small_files.append(path)
+
+    huge_root = os.path.join(root, 'few_huge')
+    os.makedirs(huge_root)
+    huge_files = []
+    for i in range(huge_count):
+        path = os.path.join(huge_root, f'huge{i}.bin')
+        _write_file(path, huge_mb * 1024 * 1024)
+        huge_files.append(path)
+    huge_text = os.path.join(huge_root, 'huge.log')
+    _write_file(huge_text, huge_mb * 1024 * 1024, text=True)
+
+    deep_root = os.path.join(root, 'deep')
+    current = deep_root
+    deep_paths = []
+    for level in range(depth):
+        current = os.path.join(current, f'level{level:03d}')
+        os.makedirs(current)
+        for i in range(3):
+            path = os.path.join(current, f'leaf{i}.txt')
+            _write_file(path, 256, text=True)
+            deep_paths.append(path)
+
+    return {
+        'small_root': small_root,
+        'small_dir': os.path.join(small_root, 'dir000'),
+        'small_files': small_files,
+        'huge_files': huge_files,
+        'huge_text': huge_text,
+        'deep_root': deep_root,
+        'deep_paths': deep_paths,
+        'scratch': os.path.join(root, 'scratch'),
+    }
+
+
+def make_cases(controller: SystemController, cached: SystemController, trees: Dict[str, Any]) -> List[Case]:
+    sample = trees['small_files'][::max(1, len(trees['small_files']) // SAMPLE_FILES)][:SAMPLE_FILES]
+    scratch = trees['scratch']
+    os.makedirs(scratch, exist_ok=True)
+
+    def check(result: Dict[str, Any]):
+        if not result.get('success'):
+            raise RuntimeError(result.get('error', 'benchmark operation failed'))
+        return result
+
+    def list_full():
+        check(controller.list_directory(trees['small_dir']))
+
+    def list_paged():
+        cursor = None
+        while True:
+            page = check(controller.list_directory(trees['small_dir'], page_size=100, cursor=cursor, sort_by='size'))
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+
+    def list_deep():
+        for directory, _, _ in os.walk(trees['deep_root']):
+            check(controller.list_directory(directory))
+
+    def read_small():
+        for path in sample:
+            check(controller.read_file(path))
+
+    def read_small_cached():
+        for path in sample:
+            check(cached.read_file(path))
+
+    def read_huge_range():
+        size = os.path.getsize(trees['huge_text'])
+        step = max(1, size // 16)
+        for offset in range(0, step * 16, step):
+            check(controller.read_file(trees['huge_text'], offset=offset, length=64 * 1024))
+
+    def read_tail():
+        check(controller.read_file(trees['huge_text'], tail=100))
+
+    def clear_scratch():
+        shutil.rmtree(scratch, ignore_errors=True)
+        os.makedirs(scratch)
+
+    def copy_small():
+        for i, path in enumerate(sample):
+            check(controller.copy_file(path, os.path.join(scratch, f'copy{i}.txt')))
+
+    def copy_huge():
+        for i, path in enumerate(trees['huge_files']):
+            check(controller.copy_file(path, os.path.join(scratch, f'huge{i}.bin'), resume=False))
+
+    moved = {'there': False}
+
+    def move_small():
+        # Alternates direction so every iteration does the same number of renames
+        for i, path in enumerate(sample):
+            target = os.path.join(scratch, f'moved{i}.txt')
+            if moved['there']:
+                check(controller.move_file(target, path))
+            else:
+                check(controller.move_file(path, target))
+        moved['there'] = not moved['there']
+
+    victim = os.path.join(trees['scratch'] + '_delete', 'tree')
+
+    def copy_victim():
+        shutil.rmtree(os.path.dirname(victim), ignore_errors=True)
+        shutil.copytree(trees['small_root'], victim)
+
+    def delete_tree():
+        check(controller.delete_directory(victim, permanent=True))
+
+    def path_checks_cold():
+        controller.paths.refresh()
+        for path in trees['deep_paths']:
+            controller.is_safe_path(controller._resolve_path(path))
+
+    def path_checks_warm():
+        for path in trees['deep_paths']:
+            controller.is_safe_path(controller._resolve_path(path))
+
+    def finish_moves():
+        if moved['there']:
+            move_small()
+
+    cases = [
+        Case('list_directory', list_full, 1),
+        Case('list_directory_paged', list_paged, 1),
+        Case('list_directory_deep', list_deep, len(trees['deep_paths']) // 3 + 1),
+        Case('read_file_small', read_small, len(sample)),
+        Case('read_file_small_cached', read_small_cached, len(sample)),
+        Case('read_file_range', read_huge_range, 16),
+        Case('read_file_tail', read_tail, 1),
+        Case('copy_file_small', copy_small, len(sample), setup=clear_scratch),
+        Case('copy_file_huge', copy_huge, len(trees['huge_files']), setup=clear_scratch),
+        # Puts the files back after an odd number of iterations so later cases see the full tree
+        Case('move_file', move_small, len(sample), teardown=finish_moves),
+        Case('delete_directory', delete_tree, 1, setup=copy_victim),
+        Case('path_checks_cold', path_checks_cold, len(trees['deep_paths'])),
+        Case('path_checks_warm', path_checks_warm, len(trees['deep_paths'])),
+    ]
+    return cases
+
+
+def run_case(case: Case, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    timings = []
+    for i in range(warmup + repeat):
+        if case.setup is not None:
+            case.setup()
+        started = time.perf_counter()
+        case.run()
+        elapsed = time.perf_counter() - started
+        if i >= warmup:
+            timings.append(elapsed)
+    median = statistics.median(timings)
+    return {
+        "name": case.name,
+        "repeat": repeat,
+        "ops": case.ops,
+        "min_s": round(min(timings), 6),
+        "median_s": round(median, 6),
+        "max_s": round(max(timings), 6),
+        "ops_per_s": round(case.ops / median, 1) if median > 0 else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(scale: str = 'small', repeat: int = 5, only: Optional[List[str]] = None,
+                   workdir: Optional[str] = None) -> Dict[str, Any]:
+    """Build the trees, run every case and return the results document"""
+    root = tempfile.mkdtemp(prefix='jarvis-bench-', dir=workdir)
+    try:
+        started = time.perf_counter()
+        trees = build_trees(root, scale)
+        build_seconds = time.perf_counter() - started
+        controller = SystemController()
+        # Keep a restricted root inside the tree so path checks walk the trie instead of returning early
+        controller.restricted_paths = controller.restricted_paths + [os.path.join(trees['deep_root'], 'restricted')]
+        cached = SystemController(cache=FileCache(max_bytes=64 * 1024 * 1024))
+        results = []
+        for case in make_cases(controller, cached, trees):
+            if only and case.name not in only:
+                continue
+            result = run_case(case, repeat)
+            if case.teardown is not None:
+                case.teardown()
+            print(f"{result['name']:<24} median {result['median_s'] * 1000:9.2f} ms   "
+                  f"{result['ops_per_s'] or 0:>12.1f} ops/s")
+            results.append(result)
+        return {
+            "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "scale": scale,
+            "tree_build_s": round(build_seconds, 3),
+            "results": results,
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(root + '_delete', ignore_errors=True)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Median time ratio per case against the baseline; regressed when slower by more than the threshold"""
+    previous = {result['name']: result for result in baseline.get('results', [])}
+    rows = []
+    for result in current['results']:
+        before = previous.get(result['name'])
+        if before is None or not before['median_s']:
+            continue
+        ratio = result['median_s'] / before['median_s']
+        allowed = threshold + CASE_TOLERANCE.get(result['name'], 0)
+        rows.append({
+            "name": result['name'],
+            "baseline_s": before['median_s'],
+            "current_s": result['median_s'],
+            "ratio": round(ratio, 3),
+            "regressed": ratio > 1 + allowed,
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark SystemController file operations")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--repeat', type=int, default=5, help="timed iterations per case")
+    parser.add_argument('--only', nargs='*', help="run only these cases")
+    parser.add_argument('--workdir', help="where to build the trees (defaults to the system temp dir)")
+    parser.add_argument('--output', help="write the JSON results here")
+    parser.add_argument('--baseline', help="earlier JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown, 0.2 = 20%% slower")
+    args = parser.parse_args(argv)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != args.scale:
+            print(f"Baseline was recorded at scale {baseline.get('scale')}, not {args.scale}")
+            return 2
+
+    current = run_benchmarks(args.scale, args.repeat, args.only, args.workdir)
+    rows = compare(current, baseline, args.threshold) if args.baseline else []
+    if args.baseline:
+        current['comparison'] = rows
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if not args.baseline:
+        return 0
+    print("\nAgainst baseline" + (f" {baseline['commit']}" if baseline.get('commit') else "") + ":")
+    for row in rows:
+        marker = "REGRESSED" if row['regressed'] else "ok"
+        print(f"{row['name']:<24} {row['ratio']:6.2f}x   {marker}")
+    regressed = [row['name'] for row in rows if row['regressed']]
+    if regressed:
+        print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
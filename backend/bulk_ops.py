@@ -0,0 +1,168 @@
+"""
+Bulk File Operations Module
+Move, copy, rename or delete every file matching a glob in one action
+Matches are expanded lazily with iglob and filtered on the fly, while the file
+operations themselves overlap on a bounded thread pool; a dry run returns the
+plan without touching anything
+"""
+
+import fnmatch
+import glob
+import os
+import shutil
+import stat as stat_module
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+
+import copy_engine
+from tree_ops import TreeStats, TreeProgress, BoundedPool
+
+BULK_OPERATIONS = ('move', 'copy', 'rename', 'delete')
+# Planned (source, target) pairs echoed back in the result
+MAX_REPORTED_PLAN = 200
+
+
+def _matches_filters(name: str, st: os.stat_result, filters: Dict[str, Any], now: float) -> bool:
+    extensions = filters.get('extensions')
+    if extensions and os.path.splitext(name)[1].lower() not in extensions:
+        return False
+    exclude = filters.get('exclude')
+    if exclude and fnmatch.fnmatch(name.lower(), exclude.lower()):
+        return False
+    if filters.get('min_size') is not None and st.st_size < filters['min_size']:
+        return False
+    if filters.get('max_size') is not None and st.st_size > filters['max_size']:
+        return False
+    if filters.get('older_than_days') is not None and now - st.st_mtime < filters['older_than_days'] * 86400:
+        return False
+    if filters.get('newer_than_days') is not None and now - st.st_mtime > filters['newer_than_days'] * 86400:
+        return False
+    return True
+
+
+def expand(pattern: str, filters: Optional[Dict[str, Any]] = None,
+           cancel: Optional[threading.Event] = None) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (path, stat) of regular files matching a glob (** recurses) and the filters"""
+    filters = filters or {}
+    now = time.time()
+    for path in glob.iglob(pattern, recursive=True):
+        if cancel is not None and cancel.is_set():
+            return
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            continue
+        if not stat_module.S_ISREG(st.st_mode):
+            continue
+        if _matches_filters(os.path.basename(path), st, filters, now):
+            yield path, st
+
+
+def render_name(template: str, path: str, st: os.stat_result, index: int) -> str:
+    """Fill a rename template such as "{date}_{stem}{ext}" or "photo_{n:03}{ext}" for one file"""
+    name = os.path.basename(path)
+    stem, ext = os.path.splitext(name)
+    new_name = template.format(
+        name=name,
+        stem=stem,
+        ext=ext,
+        n=index,
+        parent=os.path.basename(os.path.dirname(path)),
+        date=datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d')
+    )
+    if not new_name or os.sep in new_name or (os.altsep and os.altsep in new_name) or new_name in ('.', '..'):
+        raise ValueError(f"Template gives an invalid file name: {new_name!r}")
+    return new_name
+
+
+def bulk_apply(operation: str, pattern: str, destination: Optional[str] = None, template: Optional[str] = None,
+               filters: Optional[Dict[str, Any]] = None, workers: int = 8, dry_run: bool = False,
+               overwrite: bool = False, allowed: Optional[Callable[[str], bool]] = None,
+               remove: Optional[Callable[[str], Any]] = None, progress: Optional[TreeProgress] = None,
+               cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Apply one operation to every matching file and summarise the outcome; delete uses remove (os.remove)"""
+    if operation not in BULK_OPERATIONS:
+        raise ValueError(f"Unknown bulk operation: {operation}")
+    if operation in ('move', 'copy') and not destination:
+        raise ValueError(f"A destination directory is required to {operation} files")
+    if operation == 'rename' and not template:
+        raise ValueError("A rename template is required, e.g. \"{date}_{name}\"")
+    stats = TreeStats(progress)
+    plan = []
+    matched = skipped = planned = 0
+    # Targets already claimed in this batch: two sources may not land on one name, and
+    # files this batch created are not picked up again by the still-running glob
+    claimed = set()
+    directories = set()
+
+    def apply(source: str, target: Optional[str], size: int):
+        try:
+            if operation == 'delete':
+                (remove or os.remove)(source)
+            elif operation == 'copy':
+                if size >= copy_engine.CHUNK_SIZE:
+                    copy_engine.copy_file(source, target, cancel=cancel, resume=False)
+                else:
+                    shutil.copy2(source, target)
+            elif operation == 'move':
+                copy_engine.move_file(source, target, cancel=cancel)
+            else:
+                os.rename(source, target)
+            stats.add_file(size)
+        except copy_engine.CopyCancelled:
+            pass
+        except OSError as e:
+            stats.add_error(source, e)
+
+    with BoundedPool(workers) as pool:
+        for source, st in expand(pattern, filters, cancel):
+            if os.path.abspath(source) in claimed:
+                continue
+            matched += 1
+            target = None
+            try:
+                if operation == 'rename':
+                    target_dir = destination or os.path.dirname(source)
+                    target = os.path.join(target_dir, render_name(template, source, st, matched))
+                elif operation in ('move', 'copy'):
+                    target = os.path.join(destination, os.path.basename(source))
+                if allowed is not None and not all(allowed(p) for p in (source, target) if p):
+                    raise PermissionError("Access to this path is restricted")
+                if target is not None:
+                    target = os.path.abspath(target)
+                    if target == os.path.abspath(source):
+                        skipped += 1
+                        continue
+                    if target in claimed:
+                        raise FileExistsError(f"Another file in this batch already targets {target}")
+                    if not overwrite and os.path.lexists(target):
+                        raise FileExistsError(f"Target exists: {target}")
+                    claimed.add(target)
+            except (OSError, ValueError, KeyError, IndexError) as e:
+                stats.add_error(source, e)
+                continue
+            planned += 1
+            if len(plan) < MAX_REPORTED_PLAN:
+                plan.append({"source": source, "target": target} if target else {"source": source})
+            directories.add(os.path.dirname(os.path.abspath(source)))
+            if target:
+                directories.add(os.path.dirname(target))
+            if dry_run:
+                continue
+            pool.submit(apply, source, target, st.st_size)
+
+    summary = stats.to_dict()
+    return {
+        **summary,
+        "operation": operation,
+        "matched": matched,
+        "skipped": skipped,
+        "planned": planned,
+        "plan": plan,
+        "plan_truncated": planned > len(plan),
+        "dry_run": dry_run,
+        "directories": sorted(directories),
+        "cancelled": bool(cancel is not None and cancel.is_set())
+    }
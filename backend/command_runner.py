@@ -0,0 +1,392 @@
+"""
+Command Runner Module
+Runs every short-lived child process of the backend (execute_command, process
+listing, kill, open) on one asyncio event loop instead of a blocked thread each
+A global cap bounds concurrent children, each call has a deadline that covers
+queueing and running, output streams back line by line up to a byte cap and
+the whole process group is killed on timeout, cancellation or when the
+consumer goes away; spawn latency and queue time are kept as metrics
+"""
+
+import asyncio
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence, Union
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_MAX_CONCURRENT = 16
+# Longest single line kept; longer lines are split
+MAX_LINE_BYTES = 64 * 1024
+READ_BLOCK = 64 * 1024
+# Seconds between SIGTERM and SIGKILL for the process group
+KILL_GRACE = 2.0
+
+OutputCallback = Callable[[Dict[str, Any]], Any]
+Command = Union[str, Sequence[str]]
+
+
+def _group_kwargs() -> Dict[str, Any]:
+    if os.name == 'nt':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    # Own session, so a shell and everything it starts can be killed together
+    return {'start_new_session': True}
+
+
+def kill_process_tree(proc: subprocess.Popen, grace: float = KILL_GRACE):
+    """Terminate proc and its children, escalating to a hard kill after grace seconds"""
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(proc.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(proc.pid, signal.SIGTERM)
+            try:
+                proc.wait(grace)
+                return
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+    except (OSError, ProcessLookupError):
+        proc.kill()
+    try:
+        proc.wait(grace)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ProcessExecutor:
+    """Shared asyncio loop that spawns, streams and reaps child processes"""
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT, history: int = 500):
+        self._max_concurrent = max_concurrent
+        self._history = history
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            # The loop thread does not survive fork; each worker process starts its own
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._slots: Optional[asyncio.Condition] = None
+        self._active = 0
+        self._waiting = 0
+        self._counters = {"started": 0, "completed": 0, "failed": 0, "timed_out": 0, "cancelled": 0}
+        self._queue_times: deque = deque(maxlen=self._history)
+        self._spawn_times: deque = deque(maxlen=self._history)
+
+    @property
+    def max_concurrent(self) -> int:
+        return self._max_concurrent
+
+    @max_concurrent.setter
+    def max_concurrent(self, value: int):
+        self._max_concurrent = max(1, int(value))
+        if self._loop is not None:
+            # Wake queued calls in case the limit was raised
+            asyncio.run_coroutine_threadsafe(self._notify_all(), self._loop)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._start_lock:
+            if self._loop is None:
+                ready = threading.Event()
+
+                def serve():
+                    # On Windows the default (proactor) loop supports subprocesses
+                    loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(loop)
+                    self._slots = asyncio.Condition()
+                    self._loop = loop
+                    ready.set()
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=serve, name="jarvis-process-loop")
+                self._thread.daemon = True
+                self._thread.start()
+                ready.wait()
+        return self._loop
+
+    async def _notify_all(self):
+        async with self._slots:
+            self._slots.notify_all()
+
+    async def _acquire(self):
+        async with self._slots:
+            self._waiting += 1
+            try:
+                await self._slots.wait_for(lambda: self._active < self._max_concurrent)
+            finally:
+                self._waiting -= 1
+            self._active += 1
+
+    async def _release(self):
+        async with self._slots:
+            self._active -= 1
+            self._slots.notify()
+
+    async def _acquire_until(self, deadline: Optional[float], stop: Callable[[], bool]) -> str:
+        while True:
+            wait = 0.1 if deadline is None else min(0.1, max(0.0, deadline - time.monotonic()))
+            try:
+                await asyncio.wait_for(self._acquire(), wait)
+                return 'acquired'
+            except asyncio.TimeoutError:
+                if stop():
+                    return 'cancelled'
+                if deadline is not None and time.monotonic() >= deadline:
+                    return 'timed_out'
+
+    def acquire(self, timeout: Optional[float] = None, cancel: Optional[threading.Event] = None) -> str:
+        """Take a slot of the cap for a child the loop does not run, e.g. a shell session command
+
+        Returns 'acquired', 'timed_out' or 'cancelled'; an acquired slot must be given back with release().
+        """
+        submitted = time.monotonic()
+        deadline = submitted + timeout if timeout else None
+        stop = lambda: cancel is not None and cancel.is_set()
+        state = asyncio.run_coroutine_threadsafe(self._acquire_until(deadline, stop), self._ensure_loop()).result()
+        if state == 'acquired':
+            self._queue_times.append(time.monotonic() - submitted)
+        else:
+            self._counters[state] += 1
+        return state
+
+    def release(self):
+        asyncio.run_coroutine_threadsafe(self._release(), self._ensure_loop()).result()
+
+    async def _spawn(self, command: Command, cwd: Optional[str], env: Optional[Dict[str, str]], capture: bool):
+        output = subprocess.PIPE if capture else subprocess.DEVNULL
+        kwargs = dict(stdin=subprocess.DEVNULL, stdout=output, stderr=output,
+                      cwd=cwd, env=env, **_group_kwargs())
+        if isinstance(command, str):
+            return await asyncio.create_subprocess_shell(command, **kwargs)
+        return await asyncio.create_subprocess_exec(*command, **kwargs)
+
+    async def _kill_group(self, proc):
+        if proc.returncode is not None:
+            return
+        try:
+            if os.name == 'nt':
+                await asyncio.get_running_loop().run_in_executor(None, lambda: subprocess.run(
+                    ['taskkill', '/T', '/F', '/PID', str(proc.pid)],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+            else:
+                os.killpg(proc.pid, signal.SIGTERM)
+                try:
+                    await asyncio.wait_for(proc.wait(), KILL_GRACE)
+                    return
+                except asyncio.TimeoutError:
+                    os.killpg(proc.pid, signal.SIGKILL)
+        except (OSError, ProcessLookupError):
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+        try:
+            await asyncio.wait_for(proc.wait(), KILL_GRACE)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _execute(self, command: Command, timeout: Optional[float], max_bytes: int,
+                       stop: Callable[[], bool], emit: Callable[[Dict[str, Any]], None],
+                       cwd: Optional[str], env: Optional[Dict[str, str]], capture: bool, submitted: float):
+        deadline = submitted + timeout if timeout else None
+        final = {"done": True, "return_code": None, "timed_out": False, "cancelled": False,
+                 "truncated": False, "output_bytes": 0}
+        try:
+            await asyncio.wait_for(self._acquire(), None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            # The deadline passed while queued behind the concurrency cap
+            self._counters['timed_out'] += 1
+            emit({**final, "timed_out": True, "queue_time": time.monotonic() - submitted})
+            return
+        queue_time = time.monotonic() - submitted
+        self._queue_times.append(queue_time)
+        try:
+            started = time.monotonic()
+            try:
+                proc = await self._spawn(command, cwd, env, capture)
+            except OSError as e:
+                self._counters['failed'] += 1
+                emit({**final, "error": str(e), "queue_time": queue_time})
+                return
+            spawn_time = time.monotonic() - started
+            self._spawn_times.append(spawn_time)
+            self._counters['started'] += 1
+            counts = {"emitted": 0, "dropped": 0}
+
+            def emit_line(name: str, raw: bytes):
+                for start in range(0, max(len(raw), 1), MAX_LINE_BYTES):
+                    piece = raw[start:start + MAX_LINE_BYTES]
+                    if counts['dropped'] or counts['emitted'] + len(piece) + 1 > max_bytes:
+                        counts['dropped'] += len(piece) + 1
+                        continue
+                    counts['emitted'] += len(piece) + 1
+                    emit({"stream": name, "line": piece.decode('utf-8', errors='replace').rstrip('\r')})
+
+            async def pump(stream, name: str):
+                pending = b''
+                while True:
+                    block = await stream.read(READ_BLOCK)
+                    if not block:
+                        break
+                    if counts['dropped']:
+                        # Past the cap: keep draining so the child never blocks on a full pipe
+                        counts['dropped'] += len(block)
+                        continue
+                    lines = (pending + block).split(b'\n')
+                    pending = lines.pop()
+                    for raw in lines:
+                        emit_line(name, raw)
+                if pending:
+                    emit_line(name, pending)
+
+            pumps = [pump(proc.stdout, 'stdout'), pump(proc.stderr, 'stderr')] if capture else []
+            work = asyncio.ensure_future(asyncio.gather(*pumps, proc.wait()))
+            while not work.done():
+                wait = 0.1 if deadline is None else min(0.1, max(0.0, deadline - time.monotonic()))
+                await asyncio.wait({work}, timeout=wait)
+                if work.done():
+                    break
+                if stop():
+                    final['cancelled'] = True
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    final['timed_out'] = True
+                    break
+            if not work.done():
+                await self._kill_group(proc)
+                try:
+                    await asyncio.wait_for(asyncio.shield(work), KILL_GRACE)
+                except (asyncio.TimeoutError, Exception):
+                    work.cancel()
+            elif work.exception() is not None:
+                raise work.exception()
+
+            if final['timed_out']:
+                self._counters['timed_out'] += 1
+            elif final['cancelled']:
+                self._counters['cancelled'] += 1
+            else:
+                self._counters['completed'] += 1
+            if counts['dropped']:
+                emit({"stream": "stderr", "line": f"[output truncated: {counts['dropped']} more bytes not shown]"})
+            emit({
+                **final,
+                "return_code": proc.returncode,
+                "truncated": bool(counts['dropped']),
+                "output_bytes": counts['emitted'] + counts['dropped'],
+                "queue_time": queue_time,
+                "spawn_time": spawn_time
+            })
+        finally:
+            await self._release()
+
+    def stream(self, command: Command, timeout: Optional[float] = DEFAULT_TIMEOUT,
+               max_bytes: int = DEFAULT_MAX_BYTES, cancel: Optional[threading.Event] = None,
+               cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+               capture: bool = True) -> Iterator[Dict[str, Any]]:
+        """Yield {"stream", "line"} items as the command prints, then one final {"done": True, ...}
+
+        A str runs through the shell, a sequence is executed directly.
+        With capture=False output is discarded and only the exit is awaited, for
+        launchers like xdg-open whose children may keep inherited pipes open.
+        Closing the generator early kills the process group.
+        """
+        items: 'queue.Queue' = queue.Queue()
+        closed = threading.Event()
+        stop = lambda: closed.is_set() or (cancel is not None and cancel.is_set())
+        future = asyncio.run_coroutine_threadsafe(
+            self._execute(command, timeout, max_bytes, stop, items.put, cwd, env, capture, time.monotonic()),
+            self._ensure_loop()
+        )
+        future.add_done_callback(lambda f: f.exception() and items.put({
+            "done": True, "return_code": None, "timed_out": False, "cancelled": False,
+            "truncated": False, "output_bytes": 0, "error": str(f.exception())
+        }))
+        try:
+            while True:
+                item = items.get()
+                yield item
+                if item.get('done'):
+                    return
+        finally:
+            closed.set()
+
+    def run(self, command: Command, timeout: Optional[float] = DEFAULT_TIMEOUT,
+            max_bytes: int = DEFAULT_MAX_BYTES, cancel: Optional[threading.Event] = None,
+            on_output: Optional[OutputCallback] = None, cwd: Optional[str] = None,
+            env: Optional[Dict[str, str]] = None, capture: bool = True) -> Dict[str, Any]:
+        """Run a command to completion with capped output; on_output sees each line as it arrives"""
+        output = {"stdout": [], "stderr": []}
+        final: Dict[str, Any] = {}
+        for item in self.stream(command, timeout, max_bytes, cancel, cwd, env, capture):
+            if item.get('done'):
+                final = item
+                break
+            output[item['stream']].append(item['line'])
+            if on_output:
+                on_output(item)
+        return {
+            "stdout": ''.join(line + '\n' for line in output['stdout']),
+            "stderr": ''.join(line + '\n' for line in output['stderr']),
+            **final
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Concurrency, outcome counters and queue/spawn latency in milliseconds"""
+        queue_times, spawn_times = list(self._queue_times), list(self._spawn_times)
+
+        def summary(values: List[float]) -> Dict[str, Optional[float]]:
+            as_ms = lambda v: None if v is None else round(v * 1000, 2)
+            return {
+                "avg_ms": as_ms(sum(values) / len(values) if values else None),
+                "p50_ms": as_ms(_percentile(values, 0.5)),
+                "p95_ms": as_ms(_percentile(values, 0.95)),
+                "max_ms": as_ms(max(values) if values else None)
+            }
+
+        return {
+            "max_concurrent": self._max_concurrent,
+            "running": self._active,
+            "queued": self._waiting,
+            **self._counters,
+            "queue_time": summary(queue_times),
+            "spawn_latency": summary(spawn_times)
+        }
+
+
+# Shared by every controller so the concurrency cap is global to the process
+executor = ProcessExecutor()
+
+
+def stream_command(command: Command, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                   max_bytes: int = DEFAULT_MAX_BYTES, cancel: Optional[threading.Event] = None,
+                   cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+    """Stream a command on the shared executor"""
+    return executor.stream(command, timeout, max_bytes, cancel, cwd, env)
+
+
+def run_command(command: Command, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                max_bytes: int = DEFAULT_MAX_BYTES, cancel: Optional[threading.Event] = None,
+                on_output: Optional[OutputCallback] = None, cwd: Optional[str] = None,
+                env: Optional[Dict[str, str]] = None, capture: bool = True) -> Dict[str, Any]:
+    """Run a command to completion on the shared executor"""
+    return executor.run(command, timeout, max_bytes, cancel, on_output, cwd, env, capture)
@@ -4,13 +4,23 @@ Contains API keys and model configuration
 """
 
 import os
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Callable, List, Mapping, Optional, Set
+
+# Variables set by the real environment win over .env, at startup and on reload
+_PROCESS_ENVIRON = dict(os.environ)
+
 try:
-    from dotenv import load_dotenv
-    load_dotenv()  # Load environment variables from .env file
+    from dotenv import load_dotenv, find_dotenv, dotenv_values
+    ENV_FILE = find_dotenv() or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    load_dotenv(ENV_FILE)  # Load environment variables from .env file
 except ImportError:
     # If python-dotenv is not installed, continue without loading .env file
-    pass
+    ENV_FILE = None
+    dotenv_values = None
+
+# Keys os.environ currently holds only because .env set them; a reload removes the ones the file dropped
+_FILE_KEYS = set(os.environ) - set(_PROCESS_ENVIRON)
 
 class BrainConfig:
     """
@@ -18,15 +28,20 @@ class BrainConfig:
     Stores API keys, model settings, and training parameters
     """
     
-    def __init__(self):
+    def __init__(self, environ: Optional[Mapping[str, str]] = None):
+        env = os.environ if environ is None else environ
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[Set[str], 'BrainConfig'], Any]] = []
+        
         # OpenRouter API Configuration
-        self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
+        self.OPENROUTER_API_KEY = env.get('OPENROUTER_API_KEY', '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')
         
         # Model Configuration
-        self.MODEL_NAME = os.getenv('MODEL_NAME', 'openrouter/auto')  # Auto-select best model, change if you want a specific one
-        self.MODEL_TEMPERATURE = float(os.getenv('MODEL_TEMPERATURE', '0.7'))
-        self.MODEL_MAX_TOKENS = int(os.getenv('MODEL_MAX_TOKENS', '2048'))
-        self.MODEL_TOP_P = float(os.getenv('MODEL_TOP_P', '0.9'))
+        self.MODEL_NAME = env.get('MODEL_NAME', 'openrouter/auto')  # Auto-select best model, change if you want a specific one
+        self.MODEL_TEMPERATURE = float(env.get('MODEL_TEMPERATURE', '0.7'))
+        self.MODEL_MAX_TOKENS = int(env.get('MODEL_MAX_TOKENS', '2048'))
+        self.MODEL_TOP_P = float(env.get('MODEL_TOP_P', '0.9'))
+        self.MODEL_TIMEOUT = float(env.get('MODEL_TIMEOUT', '30'))  # Seconds to wait for a completion
         
         # System Prompt Configuration
         self.SYSTEM_PROMPT = """You are Emenas, an advanced AI assistant with a professional yet approachable tone. 
@@ -34,30 +49,226 @@ class BrainConfig:
         Maintain consistency with the established personality and communication style."""
         
         # Training Configuration
-        self.TRAINING_DATA_PATH = os.getenv('TRAINING_DATA_PATH', './training_data')
-        self.MODEL_SAVE_PATH = os.getenv('MODEL_SAVE_PATH', './trained_models')
-        self.TRAINING_EPOCHS = int(os.getenv('TRAINING_EPOCHS', '10'))
-        self.TRAINING_BATCH_SIZE = int(os.getenv('TRAINING_BATCH_SIZE', '8'))
-        self.TRAINING_LEARNING_RATE = float(os.getenv('TRAINING_LEARNING_RATE', '0.001'))
+        self.TRAINING_DATA_PATH = env.get('TRAINING_DATA_PATH', './training_data')
+        self.MODEL_SAVE_PATH = env.get('MODEL_SAVE_PATH', './trained_models')
+        self.TRAINING_EPOCHS = int(env.get('TRAINING_EPOCHS', '10'))
+        self.TRAINING_BATCH_SIZE = int(env.get('TRAINING_BATCH_SIZE', '8'))
+        self.TRAINING_LEARNING_RATE = float(env.get('TRAINING_LEARNING_RATE', '0.001'))
         
         # Conversation Memory Settings
-        self.CONTEXT_WINDOW_SIZE = int(os.getenv('CONTEXT_WINDOW_SIZE', '2048'))
-        self.MAX_HISTORY_LENGTH = int(os.getenv('MAX_HISTORY_LENGTH', '50'))
+        self.CONTEXT_WINDOW_SIZE = int(env.get('CONTEXT_WINDOW_SIZE', '2048'))
+        self.MAX_HISTORY_LENGTH = int(env.get('MAX_HISTORY_LENGTH', '50'))
         
         # Voice and Speech Settings
-        self.VOICE_RATE = int(os.getenv('VOICE_RATE', '180'))  # Words per minute
-        self.VOICE_VOLUME = float(os.getenv('VOICE_VOLUME', '0.9'))  # 0.0 to 1.0
-        self.VOICE_TYPE = os.getenv('VOICE_TYPE', 'default')  # 'male', 'female', 'default'
+        self.VOICE_RATE = int(env.get('VOICE_RATE', '180'))  # Words per minute
+        self.VOICE_VOLUME = float(env.get('VOICE_VOLUME', '0.9'))  # 0.0 to 1.0
+        self.VOICE_TYPE = env.get('VOICE_TYPE', 'default')  # 'male', 'female', 'default'
+        
+        # Media Control Settings
+        self.MEDIA_COMMAND_COOLDOWN = float(env.get('MEDIA_COMMAND_COOLDOWN', '0.5'))  # Seconds between media key presses
+        
+        # Screen Monitor History Settings (rotated JSONL segments plus a time index)
+        self.MONITOR_RETENTION_DAYS = float(env.get('MONITOR_RETENTION_DAYS', '30'))
+        self.MONITOR_MAX_MB = int(env.get('MONITOR_MAX_MB', '512'))  # Oldest segments are removed beyond this
+        
+        # File Action Cache Settings
+        self.FILE_CACHE_ENABLED = env.get('FILE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.FILE_CACHE_MAX_MB = int(env.get('FILE_CACHE_MAX_MB', '64'))  # Memory budget for cached results
+        self.FILE_CACHE_SHARED_MAX_KB = int(env.get('FILE_CACHE_SHARED_MAX_KB', '256'))  # Larger results are not shared
+        
+        # File Name Index Settings (FILE_INDEX_ROOTS is os.pathsep separated; empty means Desktop, Documents and Downloads)
+        self.FILE_INDEX_ENABLED = env.get('FILE_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.FILE_INDEX_ROOTS = env.get('FILE_INDEX_ROOTS', '')
+        self.FILE_INDEX_PATH = env.get('FILE_INDEX_PATH', './data/file_index.sqlite3')
+        self.FILE_INDEX_INTERVAL = float(env.get('FILE_INDEX_INTERVAL', '300'))  # Seconds between incremental refreshes
+        
+        # File Read Settings
+        self.FILE_READ_MAX_MB = int(env.get('FILE_READ_MAX_MB', '4'))  # Largest span read_file returns at once
+        
+        # File Write Settings (WRITE_FSYNC: 'none', 'file' or 'full' to also sync the directory)
+        self.WRITE_FSYNC = env.get('WRITE_FSYNC', 'file')
+        self.UPLOAD_ENABLED = env.get('UPLOAD_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.UPLOAD_DIR = env.get('UPLOAD_DIR', './data/uploads')
+        self.UPLOAD_TTL = float(env.get('UPLOAD_TTL', '3600'))  # Idle seconds before a session is discarded
+        
+        # Command Execution Settings
+        self.COMMAND_TIMEOUT = float(env.get('COMMAND_TIMEOUT', '30'))  # Seconds before the process group is killed
+        self.COMMAND_MAX_OUTPUT_KB = int(env.get('COMMAND_MAX_OUTPUT_KB', '1024'))  # Output beyond this is dropped
+        self.SUBPROCESS_MAX_CONCURRENT = int(env.get('SUBPROCESS_MAX_CONCURRENT', '16'))  # Child processes at once, per worker
+        
+        # Shell Session Settings (one persistent shell per conversation)
+        self.SHELL_SESSIONS_ENABLED = env.get('SHELL_SESSIONS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.SHELL_SESSION_MAX = int(env.get('SHELL_SESSION_MAX', '8'))
+        self.SHELL_SESSION_IDLE_TIMEOUT = float(env.get('SHELL_SESSION_IDLE_TIMEOUT', '600'))  # Seconds
+        
+        # Content Search Settings
+        self.SEARCH_WORKERS = int(env.get('SEARCH_WORKERS', '8'))  # Threads opening and reading files for search_content
+        self.SEARCH_MAX_FILE_MB = int(env.get('SEARCH_MAX_FILE_MB', '50'))  # Larger files are skipped
+        
+        # Duplicate Finder Settings
+        self.DUPLICATE_WORKERS = int(env.get('DUPLICATE_WORKERS', '8'))  # Threads hashing files in parallel
+        self.HASH_CACHE_ENABLED = env.get('HASH_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.HASH_CACHE_PATH = env.get('HASH_CACHE_PATH', './data/hash_cache.sqlite3')
+        
+        # Archive Settings
+        self.ARCHIVE_WORKERS = int(env.get('ARCHIVE_WORKERS', '4'))  # Parallel gzip/zstd compression threads
+        self.ARCHIVE_COMPRESSION_LEVEL = int(env.get('ARCHIVE_COMPRESSION_LEVEL', '6'))  # 1 (fast) to 9 (small)
+        
+        # File Watch Settings
+        self.WATCH_ENABLED = env.get('WATCH_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.WATCH_BACKEND = env.get('WATCH_BACKEND', 'auto')  # 'auto', 'inotify' or 'poll'
+        self.WATCH_DEBOUNCE_MS = int(env.get('WATCH_DEBOUNCE_MS', '200'))  # Quiet time before a batch is sent
+        self.WATCH_POLL_INTERVAL = float(env.get('WATCH_POLL_INTERVAL', '2'))  # Seconds, polling fallback only
+        self.WATCH_MAX_DIRECTORIES = int(env.get('WATCH_MAX_DIRECTORIES', '8192'))  # Per recursive watch
+        
+        # Disk Usage Settings
+        self.DISK_USAGE_WORKERS = int(env.get('DISK_USAGE_WORKERS', '8'))  # Threads listing directories in parallel
+        self.DISK_USAGE_CACHE_ENABLED = env.get('DISK_USAGE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.DISK_USAGE_CACHE_PATH = env.get('DISK_USAGE_CACHE_PATH', './data/disk_usage.sqlite3')
+        
+        # Trash Settings (deletes become a restorable rename; a throttled purger reclaims the space)
+        self.TRASH_ENABLED = env.get('TRASH_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.TRASH_INDEX_PATH = env.get('TRASH_INDEX_PATH', './data/trash.sqlite3')
+        self.TRASH_RETENTION_DAYS = float(env.get('TRASH_RETENTION_DAYS', '30'))
+        self.TRASH_MAX_GB = float(env.get('TRASH_MAX_GB', '10'))  # Oldest items are purged beyond this
+        self.TRASH_PURGE_RATE = int(env.get('TRASH_PURGE_RATE', '500'))  # Files unlinked per second
+        self.TRASH_PURGE_INTERVAL = float(env.get('TRASH_PURGE_INTERVAL', '300'))  # Seconds between purger passes
+        
+        # Directory Tree Operation Settings (parallel I/O threads per storage type)
+        self.TREE_STORAGE_TYPE = env.get('TREE_STORAGE_TYPE', 'ssd')  # 'ssd', 'hdd' or 'network'
+        self.TREE_WORKERS_SSD = int(env.get('TREE_WORKERS_SSD', '16'))
+        self.TREE_WORKERS_HDD = int(env.get('TREE_WORKERS_HDD', '2'))
+        self.TREE_WORKERS_NETWORK = int(env.get('TREE_WORKERS_NETWORK', '8'))
+        
+        # Action Scheduler Settings (workers per priority class and queue limits)
+        self.SCHEDULER_INTERACTIVE_WORKERS = int(env.get('SCHEDULER_INTERACTIVE_WORKERS', '2'))
+        self.SCHEDULER_NORMAL_WORKERS = int(env.get('SCHEDULER_NORMAL_WORKERS', '4'))
+        self.SCHEDULER_BULK_WORKERS = int(env.get('SCHEDULER_BULK_WORKERS', '2'))
+        self.SCHEDULER_QUEUE_LIMIT = int(env.get('SCHEDULER_QUEUE_LIMIT', '64'))
+        self.ACTION_TIMEOUT = float(env.get('ACTION_TIMEOUT', '120'))  # Seconds a request waits for its action
+        
+        # Shared State Settings (required when running several worker processes)
+        self.SHARED_STORE_ENABLED = env.get('SHARED_STORE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+        self.SHARED_STORE_PATH = env.get('SHARED_STORE_PATH', './data/shared_state.sqlite3')
+        
+        # Shutdown Settings
+        self.SHUTDOWN_DRAIN_TIMEOUT = float(env.get('SHUTDOWN_DRAIN_TIMEOUT', '30'))  # Seconds to finish in-flight work
+        self.SHUTDOWN_READINESS_DELAY = float(env.get('SHUTDOWN_READINESS_DELAY', '2'))  # Seconds /ready fails before work is refused
+        
+        # Config Reload Settings
+        self.CONFIG_WATCH_ENABLED = env.get('CONFIG_WATCH_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.CONFIG_WATCH_INTERVAL = float(env.get('CONFIG_WATCH_INTERVAL', '2'))  # Seconds between .env checks
+    
+    def settings(self) -> Dict[str, Any]:
+        """Return a consistent snapshot of every setting"""
+        with self._lock:
+            return {k: v for k, v in vars(self).items() if k.isupper()}
+    
+    def validate(self):
+        """Raise ValueError if any setting is out of range"""
+        checks = [
+            (0.0 <= self.MODEL_TEMPERATURE <= 2.0, 'MODEL_TEMPERATURE must be between 0 and 2'),
+            (0.0 < self.MODEL_TOP_P <= 1.0, 'MODEL_TOP_P must be between 0 and 1'),
+            (self.MODEL_MAX_TOKENS > 0, 'MODEL_MAX_TOKENS must be positive'),
+            (self.MODEL_TIMEOUT > 0, 'MODEL_TIMEOUT must be positive'),
+            (bool(self.MODEL_NAME), 'MODEL_NAME must not be empty'),
+            (self.VOICE_RATE > 0, 'VOICE_RATE must be positive'),
+            (0.0 <= self.VOICE_VOLUME <= 1.0, 'VOICE_VOLUME must be between 0 and 1'),
+            (self.MEDIA_COMMAND_COOLDOWN >= 0, 'MEDIA_COMMAND_COOLDOWN must not be negative'),
+            (self.MONITOR_RETENTION_DAYS > 0, 'MONITOR_RETENTION_DAYS must be positive'),
+            (self.MONITOR_MAX_MB > 0, 'MONITOR_MAX_MB must be positive'),
+            (self.FILE_CACHE_MAX_MB >= 0, 'FILE_CACHE_MAX_MB must not be negative'),
+            (self.FILE_CACHE_SHARED_MAX_KB >= 0, 'FILE_CACHE_SHARED_MAX_KB must not be negative'),
+            (self.FILE_INDEX_INTERVAL > 0, 'FILE_INDEX_INTERVAL must be positive'),
+            (self.FILE_READ_MAX_MB > 0, 'FILE_READ_MAX_MB must be positive'),
+            (self.WRITE_FSYNC in ('none', 'file', 'full'), 'WRITE_FSYNC must be none, file or full'),
+            (self.UPLOAD_TTL > 0, 'UPLOAD_TTL must be positive'),
+            (self.COMMAND_TIMEOUT > 0, 'COMMAND_TIMEOUT must be positive'),
+            (self.COMMAND_MAX_OUTPUT_KB > 0, 'COMMAND_MAX_OUTPUT_KB must be positive'),
+            (self.SUBPROCESS_MAX_CONCURRENT > 0, 'SUBPROCESS_MAX_CONCURRENT must be positive'),
+            (self.SHELL_SESSION_MAX > 0, 'SHELL_SESSION_MAX must be positive'),
+            (self.SHELL_SESSION_IDLE_TIMEOUT > 0, 'SHELL_SESSION_IDLE_TIMEOUT must be positive'),
+            (self.SEARCH_WORKERS > 0, 'SEARCH_WORKERS must be positive'),
+            (self.SEARCH_MAX_FILE_MB > 0, 'SEARCH_MAX_FILE_MB must be positive'),
+            (self.DUPLICATE_WORKERS > 0, 'DUPLICATE_WORKERS must be positive'),
+            (self.ARCHIVE_WORKERS > 0, 'ARCHIVE_WORKERS must be positive'),
+            (1 <= self.ARCHIVE_COMPRESSION_LEVEL <= 9, 'ARCHIVE_COMPRESSION_LEVEL must be between 1 and 9'),
+            (self.WATCH_BACKEND in ('auto', 'inotify', 'poll'), 'WATCH_BACKEND must be auto, inotify or poll'),
+            (self.WATCH_DEBOUNCE_MS >= 0, 'WATCH_DEBOUNCE_MS cannot be negative'),
+            (self.WATCH_POLL_INTERVAL > 0, 'WATCH_POLL_INTERVAL must be positive'),
+            (self.WATCH_MAX_DIRECTORIES > 0, 'WATCH_MAX_DIRECTORIES must be positive'),
+            (self.DISK_USAGE_WORKERS > 0, 'DISK_USAGE_WORKERS must be positive'),
+            (self.TRASH_RETENTION_DAYS >= 0, 'TRASH_RETENTION_DAYS cannot be negative'),
+            (self.TRASH_MAX_GB >= 0, 'TRASH_MAX_GB cannot be negative'),
+            (self.TRASH_PURGE_RATE > 0, 'TRASH_PURGE_RATE must be positive'),
+            (self.TRASH_PURGE_INTERVAL > 0, 'TRASH_PURGE_INTERVAL must be positive'),
+            (self.TREE_STORAGE_TYPE in ('ssd', 'hdd', 'network'), 'TREE_STORAGE_TYPE must be ssd, hdd or network'),
+            (min(self.TREE_WORKERS_SSD, self.TREE_WORKERS_HDD, self.TREE_WORKERS_NETWORK) > 0,
+             'Tree operation workers must be positive'),
+            (min(self.SCHEDULER_INTERACTIVE_WORKERS, self.SCHEDULER_NORMAL_WORKERS,
+                 self.SCHEDULER_BULK_WORKERS, self.SCHEDULER_QUEUE_LIMIT) > 0,
+             'Scheduler workers and queue limit must be positive'),
+            (self.ACTION_TIMEOUT > 0, 'ACTION_TIMEOUT must be positive'),
+            (self.CONFIG_WATCH_INTERVAL > 0, 'CONFIG_WATCH_INTERVAL must be positive'),
+        ]
+        for ok, message in checks:
+            if not ok:
+                raise ValueError(message)
+    
+    def subscribe(self, callback: Callable[[Set[str], 'BrainConfig'], Any]):
+        """Call callback(changed_keys, config) after every reload that changes something"""
+        self._subscribers.append(callback)
+    
+    def reload(self, env_file: Optional[str] = None) -> Dict[str, Any]:
+        """Re-read .env, validate it and apply the changes atomically"""
+        env_file = env_file or ENV_FILE
+        file_values = {}
+        if env_file and dotenv_values is not None and os.path.exists(env_file):
+            file_values = {k: v for k, v in dotenv_values(env_file).items() if v is not None}
+        # os.environ still holds values of keys the file no longer has, so it is not a source here
+        environ = {**file_values, **_PROCESS_ENVIRON}
+        
+        try:
+            candidate = BrainConfig(environ=environ)
+            candidate.validate()
+        except ValueError as e:
+            # Keep the running config when the new one is invalid
+            return {"success": False, "error": f"Invalid configuration: {e}"}
+        
+        new_settings = candidate.settings()
+        with self._lock:
+            changed = {k for k, v in new_settings.items() if getattr(self, k, None) != v}
+            for key in changed:
+                setattr(self, key, new_settings[key])
+        
+        # Keep os.getenv readers in sync with the file, including keys removed from it
+        global _FILE_KEYS
+        for key in _FILE_KEYS - set(file_values):
+            os.environ.pop(key, None)
+        for key, value in file_values.items():
+            if key not in _PROCESS_ENVIRON:
+                os.environ[key] = value
+        _FILE_KEYS = {key for key in file_values if key not in _PROCESS_ENVIRON}
+        
+        if changed:
+            for callback in list(self._subscribers):
+                try:
+                    callback(changed, self)
+                except Exception as e:
+                    print(f"Config subscriber failed: {e}")
+        return {"success": True, "changed": sorted(changed)}
     
     def get_api_config(self) -> Dict[str, Any]:
         """Return API-specific configuration"""
-        return {
-            'api_key': self.OPENROUTER_API_KEY,
-            'model': self.MODEL_NAME,
-            'temperature': self.MODEL_TEMPERATURE,
-            'max_tokens': self.MODEL_MAX_TOKENS,
-            'top_p': self.MODEL_TOP_P
-        }
+        with self._lock:
+            return {
+                'api_key': self.OPENROUTER_API_KEY,
+                'model': self.MODEL_NAME,
+                'temperature': self.MODEL_TEMPERATURE,
+                'max_tokens': self.MODEL_MAX_TOKENS,
+                'top_p': self.MODEL_TOP_P,
+                'timeout': self.MODEL_TIMEOUT
+            }
     
     def get_training_config(self) -> Dict[str, Any]:
         """Return training-specific configuration"""
@@ -68,6 +279,92 @@ class BrainConfig:
             'batch_size': self.TRAINING_BATCH_SIZE,
             'learning_rate': self.TRAINING_LEARNING_RATE
         }
+    
+    def get_file_index_roots(self) -> List[str]:
+        """Return the directories the file name index should cover"""
+        if self.FILE_INDEX_ROOTS.strip():
+            return [r.strip() for r in self.FILE_INDEX_ROOTS.split(os.pathsep) if r.strip()]
+        user_profile = os.environ.get('USERPROFILE', os.path.expanduser('~'))
+        return [os.path.join(user_profile, name) for name in ('Desktop', 'Documents', 'Downloads')]
+    
+    def get_tree_workers(self) -> Dict[str, int]:
+        """Return parallel I/O threads per storage type for tree operations"""
+        return {
+            'ssd': self.TREE_WORKERS_SSD,
+            'hdd': self.TREE_WORKERS_HDD,
+            'network': self.TREE_WORKERS_NETWORK
+        }
+    
+    def get_scheduler_config(self) -> Dict[str, Any]:
+        """Return (workers, queue limit) per action priority class"""
+        return {
+            'interactive': (self.SCHEDULER_INTERACTIVE_WORKERS, self.SCHEDULER_QUEUE_LIMIT),
+            'normal': (self.SCHEDULER_NORMAL_WORKERS, self.SCHEDULER_QUEUE_LIMIT),
+            'bulk': (self.SCHEDULER_BULK_WORKERS, max(1, self.SCHEDULER_QUEUE_LIMIT // 4))
+        }
+
+class ConfigWatcher:
+    """Polls the .env file and reloads BrainConfig when it changes"""
+    
+    def __init__(self, config: BrainConfig, env_file: Optional[str] = None, interval: Optional[float] = None):
+        self.config = config
+        self.env_file = env_file or ENV_FILE
+        self.interval = interval or config.CONFIG_WATCH_INTERVAL
+        self.stop_event = threading.Event()
+        self.thread = None
+        self._last_stamp = self._stamp()
+        if hasattr(os, 'register_at_fork'):
+            # Watcher threads do not survive fork; restart one in each worker
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+    
+    def _stamp(self):
+        try:
+            st = os.stat(self.env_file)
+            return (st.st_mtime_ns, st.st_size)
+        except (OSError, TypeError):
+            return None
+    
+    def start(self):
+        """Start watching in a daemon thread"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._watch_loop, name="jarvis-config-watcher")
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def stop(self):
+        """Stop watching"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+    
+    def check(self) -> Optional[Dict[str, Any]]:
+        """Reload once if the file changed since the last check"""
+        stamp = self._stamp()
+        if stamp == self._last_stamp:
+            return None
+        self._last_stamp = stamp
+        result = self.config.reload(self.env_file)
+        if result['success']:
+            if result['changed']:
+                print(f"Config reloaded: {', '.join(result['changed'])}")
+        else:
+            print(f"Config reload rejected: {result['error']}")
+        return result
+    
+    def _watch_loop(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Config watch error: {e}")
+    
+    def _restart_after_fork(self):
+        was_running = self.thread is not None and not self.stop_event.is_set()
+        self.thread = None
+        if was_running:
+            self.start()
 
 # Create a global instance of the config
 brain_config = BrainConfig()
@@ -77,16 +374,18 @@ def get_openrouter_api_key():
     return brain_config.OPENROUTER_API_KEY
 
 def get_model_config():
+    config = brain_config.settings()
     return {
-        'model': brain_config.MODEL_NAME,
-        'temperature': brain_config.MODEL_TEMPERATURE,
-        'max_tokens': brain_config.MODEL_MAX_TOKENS,
-        'top_p': brain_config.MODEL_TOP_P
+        'model': config['MODEL_NAME'],
+        'temperature': config['MODEL_TEMPERATURE'],
+        'max_tokens': config['MODEL_MAX_TOKENS'],
+        'top_p': config['MODEL_TOP_P']
     }
 
 def get_voice_settings():
+    config = brain_config.settings()
     return {
-        'rate': brain_config.VOICE_RATE,
-        'volume': brain_config.VOICE_VOLUME,
-        'type': brain_config.VOICE_TYPE
+        'rate': config['VOICE_RATE'],
+        'volume': config['VOICE_VOLUME'],
+        'type': config['VOICE_TYPE']
     }
\ No newline at end of file
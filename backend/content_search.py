@@ -0,0 +1,139 @@
+"""
+Content Search Module
+Grep over a directory tree for the search_content action
+A walker thread feeds files to a thread pool, large files are scanned through
+mmap, binaries are skipped after a quick sniff and matches stream back as
+soon as they are found. The threads overlap file opens and reads, which helps
+on cold caches and slow disks; the regex scan holds the GIL, so a search of
+files already in the page cache runs at about one core's speed
+"""
+
+import fnmatch
+import mmap
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
+
+from fileio import SNIFF_BYTES, looks_binary, mapped
+
+# Directories that are never worth grepping
+SKIP_DIRS = {'.git', 'node_modules', '__pycache__', '.venv', 'venv', '.mypy_cache', '.pytest_cache'}
+MAX_LINE_CHARS = 300
+
+
+def compile_pattern(pattern: str, regex: bool = False, case_sensitive: bool = False) -> 're.Pattern[bytes]':
+    """Compile a text or regex pattern for matching raw file bytes"""
+    source = pattern.encode('utf-8')
+    if not regex:
+        source = re.escape(source)
+    return re.compile(source, 0 if case_sensitive else re.IGNORECASE)
+
+
+def _walk_files(root: str, file_pattern: Optional[str], max_file_size: int,
+                stop: threading.Event) -> Iterator[str]:
+    stack = [root]
+    while stack and not stop.is_set():
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            if file_pattern and not fnmatch.fnmatch(entry.name.lower(), file_pattern.lower()):
+                                continue
+                            if entry.stat().st_size <= max_file_size:
+                                yield entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def search_file(path: str, compiled, max_matches: int, stop: threading.Event) -> List[Dict[str, Any]]:
+    """Return up to max_matches matching lines of one file"""
+    matches = []
+    try:
+        with open(path, 'rb') as f:
+            if looks_binary(f.read(SNIFF_BYTES)):
+                return matches
+        with mapped(path) as data:
+            line_no = 1
+            counted_to = 0
+            last_line_start = -1
+            for match in compiled.finditer(data):
+                if stop.is_set() or len(matches) >= max_matches:
+                    break
+                start = match.start()
+                # mmap has no count(); slicing copies only the span since the last match
+                line_no += bytes(data[counted_to:start]).count(b'\n') if isinstance(data, mmap.mmap) \
+                    else data.count(b'\n', counted_to, start)
+                counted_to = start
+                line_start = data.rfind(b'\n', 0, start) + 1
+                if line_start == last_line_start:
+                    continue  # One result per line
+                last_line_start = line_start
+                line_end = data.find(b'\n', start)
+                if line_end == -1:
+                    line_end = len(data)
+                text = bytes(data[line_start:min(line_end, line_start + MAX_LINE_CHARS * 4)])
+                matches.append({
+                    "path": path,
+                    "line": line_no,
+                    "column": start - line_start + 1,
+                    "text": text.decode('utf-8', errors='replace').rstrip('\r')[:MAX_LINE_CHARS]
+                })
+    except (OSError, ValueError):
+        pass
+    return matches
+
+
+def search_tree(root: str, compiled, max_results: int = 100, file_pattern: Optional[str] = None,
+                max_file_size: int = 50 * 1024 * 1024, workers: int = 8,
+                stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """Yield matches from files under root as they are found, stopping after max_results"""
+    stop = stop or threading.Event()
+    results = queue.Queue(maxsize=workers * 4)
+    done = object()
+    yielded = 0
+
+    def produce():
+        # Bound the number of queued files so huge trees do not pile up futures
+        slots = threading.Semaphore(workers * 4)
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jarvis-search") as pool:
+                for path in _walk_files(root, file_pattern, max_file_size, stop):
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    future = pool.submit(search_file, path, compiled, max_results, stop)
+                    future.add_done_callback(lambda f: (slots.release(), results.put(f.result())))
+        finally:
+            results.put(done)
+
+    producer = threading.Thread(target=produce, name="jarvis-search-walk")
+    producer.daemon = True
+    producer.start()
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            for match in item:
+                yield match
+                yielded += 1
+                if yielded >= max_results:
+                    return
+    finally:
+        stop.set()
+        # Let the producer finish so its worker threads exit
+        while producer.is_alive():
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
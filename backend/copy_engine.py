@@ -0,0 +1,130 @@
+"""
+Copy Engine Module
+Large-file copy for SystemController: kernel-side copy_file_range/sendfile
+where available, large aligned buffers otherwise, progress callbacks,
+cancellation and checksum-verified resume of partial copies
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import threading
+from typing import Dict, Any, Callable, Optional
+
+CHUNK_SIZE = 8 * 1024 * 1024
+PARTIAL_SUFFIX = '.partial'
+
+ProgressCallback = Callable[[int, int], Any]
+
+# errno values meaning "this fast path is not supported here, use the next one"
+_UNSUPPORTED = {errno.EINVAL, errno.ENOSYS, errno.EXDEV, errno.EBADF, errno.ENOTSUP,
+                getattr(errno, 'EOPNOTSUPP', errno.ENOTSUP)}
+
+
+class CopyCancelled(Exception):
+    """Raised when a copy is cancelled; the partial file is kept for resuming"""
+
+
+def _prefix_digest(path: str, length: int) -> bytes:
+    digest = hashlib.blake2b()
+    remaining = length
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.digest()
+
+
+def _resume_offset(source: str, partial: str, total: int) -> int:
+    """Length of a partial copy that matches the source, or 0"""
+    try:
+        size = os.path.getsize(partial)
+    except OSError:
+        return 0
+    if size == 0 or size > total:
+        return 0
+    # Only trust the partial file if its bytes are identical to the source prefix
+    if _prefix_digest(source, size) != _prefix_digest(partial, size):
+        return 0
+    return size
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    """Copy up to count bytes at offset with the fastest call available; 0 means fall back"""
+    if hasattr(os, 'copy_file_range'):
+        try:
+            return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+    if hasattr(os, 'sendfile') and os.name != 'nt':
+        try:
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            return os.sendfile(dst_fd, src_fd, offset, count)
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+    return 0
+
+
+def copy_file(source: str, destination: str, progress: Optional[ProgressCallback] = None,
+              cancel: Optional[threading.Event] = None, resume: bool = True,
+              chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Copy one file into destination via a .partial file, preserving metadata"""
+    total = os.path.getsize(source)
+    partial = destination + PARTIAL_SUFFIX
+    offset = _resume_offset(source, partial, total) if resume else 0
+    resumed_from = offset
+    use_kernel_copy = True
+    buffer = None
+
+    # Unbuffered so the fallback's reads and writes land exactly at the seeked offsets
+    with open(source, 'rb', buffering=0) as src, open(partial, 'r+b' if offset else 'wb', buffering=0) as dst:
+        dst.truncate(offset)
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        if progress:
+            progress(offset, total)
+        while offset < total:
+            if cancel is not None and cancel.is_set():
+                raise CopyCancelled(partial)
+            count = min(chunk_size, total - offset)
+            copied = _copy_range(src_fd, dst_fd, offset, count) if use_kernel_copy else 0
+            if copied <= 0:
+                use_kernel_copy = False
+                if buffer is None:
+                    buffer = memoryview(bytearray(chunk_size))
+                src.seek(offset)
+                dst.seek(offset)
+                copied = src.readinto(buffer[:count])
+                if not copied:
+                    break
+                written = 0
+                while written < copied:
+                    written += dst.write(buffer[written:copied])
+            offset += copied
+            if progress:
+                progress(offset, total)
+
+    if offset != total:
+        raise IOError(f"Source changed during copy ({offset} of {total} bytes copied)")
+    os.replace(partial, destination)
+    shutil.copystat(source, destination)
+    return {"bytes": total, "resumed_from": resumed_from}
+
+
+def move_file(source: str, destination: str, progress: Optional[ProgressCallback] = None,
+              cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Rename when possible, otherwise copy with progress and remove the source"""
+    try:
+        os.rename(source, destination)
+        return {"bytes": os.path.getsize(destination), "renamed": True}
+    except OSError as e:
+        if e.errno != errno.EXDEV and not (os.name == 'nt' and os.path.exists(source)):
+            raise
+    result = copy_file(source, destination, progress, cancel)
+    os.remove(source)
+    return {**result, "renamed": False}
@@ -0,0 +1,199 @@
+"""
+Disk Usage Module
+Per-directory sizes for the disk_usage action
+Directories are listed level by level on a thread pool; the sizes of each
+directory's own files are stored in SQLite with the directory mtime, so a
+later run only re-lists directories whose entries changed and rebuilds the
+subtree totals from the stored values
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+UsageProgress = Callable[[Dict[str, Any]], Any]
+# Largest files remembered per directory for the largest_files summary
+TOP_FILES_PER_DIR = 10
+
+
+class UsageCache:
+    """Persistent own-file totals and subdirectory lists per directory, keyed by path and mtime"""
+
+    def __init__(self, db_path: str):
+        self.db_path = os.path.abspath(db_path)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS dirs ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " own_bytes INTEGER NOT NULL,"
+            " own_files INTEGER NOT NULL,"
+            " subdirs TEXT NOT NULL,"
+            " top_files TEXT NOT NULL,"
+            " total_bytes INTEGER,"
+            " total_files INTEGER)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def load(self, root: str) -> Dict[str, tuple]:
+        """(mtime_ns, own_bytes, own_files, subdirs, top_files) for root and every directory below it"""
+        prefix = root.rstrip(os.sep) + os.sep
+        rows = self._connect().execute(
+            "SELECT path, mtime_ns, own_bytes, own_files, subdirs, top_files FROM dirs"
+            " WHERE path = ? OR (path >= ? AND path < ?)",
+            (root, prefix, prefix + '\uffff')
+        )
+        return {path: (mtime_ns, own_bytes, own_files, json.loads(subdirs), [tuple(f) for f in json.loads(top_files)])
+                for path, mtime_ns, own_bytes, own_files, subdirs, top_files in rows}
+
+    def save(self, rows: List[tuple]):
+        """Store (path, mtime_ns, own_bytes, own_files, subdirs, top_files, total_bytes, total_files)"""
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO dirs"
+                " (path, mtime_ns, own_bytes, own_files, subdirs, top_files, total_bytes, total_files)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(path, mtime_ns, own_bytes, own_files, json.dumps(subdirs), json.dumps(top_files), total_bytes, total_files)
+                 for path, mtime_ns, own_bytes, own_files, subdirs, top_files, total_bytes, total_files in rows]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def forget(self, paths: List[str]):
+        """Drop directories that no longer exist"""
+        conn = self._connect()
+        conn.executemany("DELETE FROM dirs WHERE path = ?", [(path,) for path in paths])
+
+
+def _list_dir(path: str, device: Optional[int]) -> Optional[Tuple[int, int, List[str], List[Tuple[str, int]]]]:
+    """(own_bytes, own_files, subdirs, largest files) of one directory, or None if it cannot be read"""
+    own_bytes = own_files = 0
+    subdirs, files = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        # Stay on the starting volume, like du -x
+                        if device is None or entry.stat(follow_symlinks=False).st_dev == device:
+                            subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        size = entry.stat(follow_symlinks=False).st_size
+                        own_bytes += size
+                        own_files += 1
+                        files.append((entry.path, size))
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return own_bytes, own_files, subdirs, heapq.nlargest(TOP_FILES_PER_DIR, files, key=lambda item: item[1])
+
+
+def analyze(root: str, top: int = 20, workers: int = 8, cache: Optional[UsageCache] = None,
+            refresh: bool = False, one_filesystem: bool = True, progress: Optional[UsageProgress] = None,
+            cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Total size of root plus its largest subdirectories, reusing cached directory listings"""
+    started = time.time()
+    root = os.path.abspath(root)
+    device = os.stat(root).st_dev if one_filesystem else None
+    cached = cache.load(root) if cache is not None and not refresh else {}
+    info: Dict[str, tuple] = {}
+    depth: Dict[str, int] = {root: 0}
+    changed = []
+    rescanned = reused = errors = 0
+
+    def visit(path: str):
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return path, None, None
+        hit = cached.get(path)
+        # A directory's mtime changes when entries are added, removed or renamed
+        if hit is not None and hit[0] == mtime_ns:
+            return path, hit, False
+        listing = _list_dir(path, device)
+        if listing is None:
+            return path, None, None
+        return path, (mtime_ns, *listing), True
+
+    frontier = [root]
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="jarvis-du") as pool:
+        while frontier and not (cancel is not None and cancel.is_set()):
+            next_frontier = []
+            for path, entry, listed in pool.map(visit, frontier):
+                if entry is None:
+                    errors += 1
+                    continue
+                info[path] = entry
+                if listed:
+                    rescanned += 1
+                    changed.append(path)
+                else:
+                    reused += 1
+                for subdir in entry[3]:
+                    depth[subdir] = depth[path] + 1
+                    next_frontier.append(subdir)
+            frontier = next_frontier
+            if progress:
+                progress({"directories": len(info), "rescanned": rescanned, "reused": reused})
+
+    # Subtree totals bottom-up, deepest directories first
+    totals: Dict[str, Tuple[int, int]] = {}
+    for path in sorted(info, key=lambda p: depth[p], reverse=True):
+        _, own_bytes, own_files, subdirs, _ = info[path]
+        total_bytes, total_files = own_bytes, own_files
+        for subdir in subdirs:
+            sub_bytes, sub_files = totals.get(subdir, (0, 0))
+            total_bytes += sub_bytes
+            total_files += sub_files
+        totals[path] = (total_bytes, total_files)
+
+    cancelled = cancel is not None and cancel.is_set()
+    if cache is not None and not cancelled:
+        cache.save([(path, *info[path], *totals[path]) for path in changed])
+        gone = [path for path in cached if path not in info]
+        if gone:
+            cache.forget(gone)
+
+    def describe(path: str) -> Dict[str, Any]:
+        total_bytes, total_files = totals[path]
+        return {"path": path, "bytes": total_bytes, "files": total_files}
+
+    children = sorted((describe(p) for p in info[root][3] if p in totals),
+                      key=lambda item: item['bytes'], reverse=True) if root in info else []
+    largest = heapq.nlargest(top, (describe(p) for p in totals if p != root), key=lambda item: item['bytes'])
+    largest_files = heapq.nlargest(top, (f for entry in info.values() for f in entry[4]), key=lambda item: item[1])
+    return {
+        "path": root,
+        "bytes": totals.get(root, (0, 0))[0],
+        "files": totals.get(root, (0, 0))[1],
+        "directories": len(info),
+        "children": children[:top],
+        "largest_directories": largest,
+        "largest_files": [{"path": path, "bytes": size} for path, size in largest_files],
+        "rescanned": rescanned,
+        "reused": reused,
+        "errors": errors,
+        "elapsed": round(time.time() - started, 3),
+        "cancelled": cancelled
+    }
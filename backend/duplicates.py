@@ -0,0 +1,244 @@
+"""
+Duplicate Finder Module
+Finds files with identical content for the find_duplicates action in stages:
+group by size, then by a hash of the first and last block, and only then hash
+whole files on a thread pool through mmap; hashes are cached in SQLite per
+(path, size, mtime) so re-running over the same tree only reads what changed
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+from content_search import SKIP_DIRS
+from fileio import mapped
+
+# Bytes hashed from each end of a file for the partial hash
+EDGE_BYTES = 64 * 1024
+HASH_BLOCK = 8 * 1024 * 1024
+
+DuplicateProgress = Callable[[Dict[str, Any]], Any]
+
+
+class HashCache:
+    """Persistent partial/full content hashes keyed by path and validated by size and mtime"""
+
+    def __init__(self, db_path: str):
+        self.db_path = os.path.abspath(db_path)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " partial TEXT,"
+            " full TEXT)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def lookup(self, files: Iterable[Tuple[str, int, int]]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """Cached (partial, full) hashes for (path, size, mtime_ns) entries that are still current"""
+        conn = self._connect()
+        found = {}
+        for path, size, mtime_ns in files:
+            row = conn.execute(
+                "SELECT partial, full FROM hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, size, mtime_ns)
+            ).fetchone()
+            if row is not None:
+                found[path] = (row[0], row[1])
+        return found
+
+    def store(self, rows: Iterable[Tuple[str, int, int, Optional[str], Optional[str]]]):
+        """Save (path, size, mtime_ns, partial, full), keeping a known full hash when only partial is given"""
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO hashes (path, size, mtime_ns, partial, full) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(path) DO UPDATE SET"
+                "  full = CASE WHEN excluded.size = size AND excluded.mtime_ns = mtime_ns"
+                "              THEN COALESCE(excluded.full, full) ELSE excluded.full END,"
+                "  size = excluded.size, mtime_ns = excluded.mtime_ns,"
+                "  partial = COALESCE(excluded.partial, partial)",
+                list(rows)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        self._connect().execute("DELETE FROM hashes")
+
+
+def _scan(root: str, min_size: int, extensions: Optional[tuple], stop: threading.Event):
+    """Yield (path, size, mtime_ns) of regular files, each inode only once"""
+    seen_inodes = set()
+    stack = [root]
+    while stack and not stop.is_set():
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                stack.append(entry.path)
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        if extensions and not entry.name.lower().endswith(extensions):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if st.st_size < min_size:
+                        continue
+                    # Hard links are the same file, not duplicates of each other
+                    inode = (st.st_dev, st.st_ino)
+                    if st.st_ino and inode in seen_inodes:
+                        continue
+                    seen_inodes.add(inode)
+                    yield entry.path, st.st_size, st.st_mtime_ns
+        except OSError:
+            continue
+
+
+def partial_hash(path: str, size: int) -> str:
+    """Hash of the first and last EDGE_BYTES; covers the whole file when it is small"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(EDGE_BYTES))
+        if size > 2 * EDGE_BYTES:
+            f.seek(-EDGE_BYTES, os.SEEK_END)
+            digest.update(f.read(EDGE_BYTES))
+        elif size > EDGE_BYTES:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    """Hash of the whole file; hashlib releases the GIL so pool threads hash in parallel"""
+    digest = hashlib.blake2b()
+    with mapped(path) as data:
+        view = memoryview(data)
+        try:
+            for offset in range(0, len(data), HASH_BLOCK):
+                digest.update(view[offset:offset + HASH_BLOCK])
+        finally:
+            view.release()
+    return digest.hexdigest()
+
+
+def _hash_all(pool: ThreadPoolExecutor, fn, files: List[Tuple[str, int, int]],
+              stop: threading.Event) -> Dict[str, Optional[str]]:
+    def safe(path: str, size: int) -> Optional[str]:
+        if stop.is_set():
+            return None
+        try:
+            return fn(path, size)
+        except (OSError, ValueError):
+            return None
+    futures = {path: pool.submit(safe, path, size) for path, size, _ in files}
+    return {path: future.result() for path, future in futures.items()}
+
+
+def find_duplicates(root: str, min_size: int = 1, extensions: Optional[tuple] = None, workers: int = 8,
+                    cache: Optional[HashCache] = None, progress: Optional[DuplicateProgress] = None,
+                    cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Group files under root by identical content, largest waste first"""
+    stop = cancel or threading.Event()
+    started = time.time()
+    report = progress or (lambda info: None)
+
+    by_size: Dict[int, List[Tuple[str, int, int]]] = defaultdict(list)
+    scanned = 0
+    for item in _scan(root, max(1, min_size), extensions, stop):
+        by_size[item[1]].append(item)
+        scanned += 1
+        if scanned % 5000 == 0:
+            report({"stage": "scan", "files": scanned})
+    candidates = [item for group in by_size.values() if len(group) > 1 for item in group]
+    report({"stage": "partial", "files": scanned, "candidates": len(candidates)})
+
+    cached = cache.lookup(candidates) if cache is not None else {}
+    cache_hits = 0
+    updates: Dict[str, list] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="jarvis-dupes") as pool:
+        # Stage 2: partial hashes split each size group further
+        need_partial = [item for item in candidates if not (cached.get(item[0]) or (None,))[0]]
+        cache_hits += len(candidates) - len(need_partial)
+        partials = {path: hashes[0] for path, hashes in cached.items()}
+        for path, digest in _hash_all(pool, partial_hash, need_partial, stop).items():
+            partials[path] = digest
+        for path, size, mtime_ns in need_partial:
+            if partials.get(path):
+                updates[path] = [path, size, mtime_ns, partials[path], None]
+
+        by_partial: Dict[Tuple[int, str], List[Tuple[str, int, int]]] = defaultdict(list)
+        for item in candidates:
+            if partials.get(item[0]):
+                by_partial[(item[1], partials[item[0]])].append(item)
+        finalists = [item for group in by_partial.values() if len(group) > 1 for item in group]
+        report({"stage": "full", "files": scanned, "candidates": len(candidates), "finalists": len(finalists)})
+
+        # Stage 3: full hashes, except where the partial hash already covered the whole file
+        fulls: Dict[str, Optional[str]] = {}
+        need_full = []
+        for item in finalists:
+            path, size, _ = item
+            known = cached.get(path, (None, None))[1]
+            if size <= 2 * EDGE_BYTES:
+                fulls[path] = partials[path]
+            elif known:
+                fulls[path] = known
+                cache_hits += 1
+            else:
+                need_full.append(item)
+        for path, digest in _hash_all(pool, lambda p, s: full_hash(p), need_full, stop).items():
+            fulls[path] = digest
+        for path, size, mtime_ns in need_full:
+            if fulls.get(path):
+                row = updates.setdefault(path, [path, size, mtime_ns, partials[path], None])
+                row[4] = fulls[path]
+
+    if cache is not None and updates and not stop.is_set():
+        cache.store(tuple(row) for row in updates.values())
+
+    groups: Dict[Tuple[int, str], List[str]] = defaultdict(list)
+    for path, size, _ in finalists:
+        if fulls.get(path):
+            groups[(size, fulls[path])].append(path)
+    duplicates = [
+        {"size": size, "hash": digest, "count": len(paths), "wasted": size * (len(paths) - 1), "paths": sorted(paths)}
+        for (size, digest), paths in groups.items() if len(paths) > 1
+    ]
+    duplicates.sort(key=lambda group: group['wasted'], reverse=True)
+    return {
+        "groups": duplicates,
+        "files_scanned": scanned,
+        "candidates": len(candidates),
+        "hashed_full": len(need_full),
+        "cache_hits": cache_hits,
+        "wasted_bytes": sum(group['wasted'] for group in duplicates),
+        "elapsed": round(time.time() - started, 3),
+        "cancelled": stop.is_set()
+    }
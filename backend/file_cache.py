@@ -0,0 +1,200 @@
+"""
+File Result Cache Module
+Read-through cache for the read-only SystemController actions
+Entries are keyed on the canonical path and validated against mtime/size on every hit
+An optional SharedStore acts as a second tier shared by all worker processes
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from shared_store import SharedStore
+
+
+def _estimate_size(value: Any) -> int:
+    """Rough memory footprint of a cached result in bytes"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _estimate_size(k) + _estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class FileCache:
+    """LRU cache of file action results bounded by a memory budget"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entry_bytes: Optional[int] = None,
+                 shared: Optional[SharedStore] = None, shared_ttl: float = 3600,
+                 shared_max_entry_bytes: int = 256 * 1024, shared_purge_every: int = 256):
+        self.max_bytes = max_bytes
+        # A single huge file should never flush the whole cache
+        self.max_entry_bytes = max_entry_bytes or max(max_bytes // 8, 1)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Second tier shared across worker processes; entries are validated the same way
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        # Large results such as whole read_file payloads stay process-local
+        self.shared_max_entry_bytes = shared_max_entry_bytes
+        # Expired shared rows are deleted every this many shared writes
+        self.shared_purge_every = shared_purge_every
+        self._shared_writes = 0
+        self._entries = OrderedDict()  # key -> (canonical_path, stamp, value, size)
+        self._keys_by_path = {}  # canonical_path -> set of keys
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def canonical(path: str) -> str:
+        """Canonical form of a path used as the cache key"""
+        return os.path.normcase(os.path.realpath(os.path.expanduser(path)))
+
+    @staticmethod
+    def stamp(path: str) -> Optional[Tuple[int, int, int]]:
+        """Validation stamp (mtime, size, inode) of a path, or None if it cannot be stat'ed"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def get_or_load(self, op: str, path: str, loader: Callable[[], Dict[str, Any]], *key_args) -> Dict[str, Any]:
+        """Return a cached result for (op, path, *key_args) or call loader and cache its result"""
+        canonical = self.canonical(path)
+        key = (op, canonical) + tuple(key_args)
+        before = self.stamp(canonical)
+        if before is None:
+            return loader()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] == before:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[2])
+                self._remove(key)
+
+        shared_entry = self._shared_get(key)
+        if shared_entry is not None and tuple(shared_entry[0]) == before:
+            self._store(key, canonical, before, shared_entry[1], share=False)
+            with self._lock:
+                self.hits += 1
+            return dict(shared_entry[1])
+
+        with self._lock:
+            self.misses += 1
+        result = loader()
+        # Only cache successful results whose source did not change while loading
+        if result.get('success') and self.stamp(canonical) == before:
+            self._store(key, canonical, before, result)
+        return result
+
+    def invalidate(self, path: str, recursive: bool = False):
+        """Drop cached results for a path, its parent listing and optionally everything below it"""
+        canonical = self.canonical(path)
+        parent = os.path.dirname(canonical)
+        prefix = canonical.rstrip(os.sep) + os.sep
+        with self._lock:
+            for cached_path in list(self._keys_by_path):
+                if (cached_path == canonical or cached_path == parent
+                        or (recursive and cached_path.startswith(prefix))):
+                    for key in list(self._keys_by_path.get(cached_path, ())):
+                        self._remove(key)
+        if self.shared is not None:
+            try:
+                self.shared.delete_prefix(self._shared_prefix(canonical))
+                self.shared.delete_prefix(self._shared_prefix(parent))
+                if recursive:
+                    self.shared.delete_prefix(f"file:{prefix}")
+            except Exception as e:
+                print(f"Shared cache invalidation failed: {e}")
+
+    def resize(self, max_bytes: int):
+        """Change the memory budget, evicting least recently used entries if needed"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.max_entry_bytes = max(max_bytes // 8, 1)
+            while self.current_bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+    @staticmethod
+    def _shared_prefix(canonical: str) -> str:
+        return f"file:{canonical}\0"
+
+    def _shared_key(self, key) -> str:
+        op, canonical = key[0], key[1]
+        return f"{self._shared_prefix(canonical)}{op}\0{json.dumps(key[2:])}"
+
+    def _shared_get(self, key):
+        if self.shared is None:
+            return None
+        try:
+            return self.shared.get(self._shared_key(key))
+        except Exception as e:
+            print(f"Shared cache read failed: {e}")
+            return None
+
+    def _store(self, key, canonical: str, stamp, value: Dict[str, Any], share: bool = True):
+        size = _estimate_size(value)
+        if size > self.max_entry_bytes:
+            return
+        if share and self.shared is not None and size <= self.shared_max_entry_bytes:
+            try:
+                self.shared.set(self._shared_key(key), [list(stamp), value], ttl=self.shared_ttl)
+                with self._lock:
+                    self._shared_writes += 1
+                    purge = self._shared_writes % self.shared_purge_every == 0
+                if purge:
+                    self.shared.purge_expired()
+            except Exception as e:
+                print(f"Shared cache write failed: {e}")
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (canonical, stamp, dict(value), size)
+            self._keys_by_path.setdefault(canonical, set()).add(key)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        canonical, _, _, size = entry
+        self.current_bytes -= size
+        keys = self._keys_by_path.get(canonical)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_path[canonical]
@@ -0,0 +1,290 @@
+"""
+File Name Index Module
+Background indexer that keeps paths, sizes and mtimes of configured roots in
+SQLite with an FTS5 trigram index, so "find my file" queries take milliseconds
+Refreshes are incremental: only directories whose mtime changed are re-listed
+"""
+
+import difflib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+
+from shared_store import SharedStore
+
+DEFAULT_EXCLUDES = ('.git', 'node_modules', '__pycache__', '.venv', 'venv', 'AppData', '$RECYCLE.BIN')
+
+
+class FileIndex:
+    """Persistent, incrementally refreshed index of file names under a set of roots"""
+
+    def __init__(self, db_path: str, roots: Iterable[str], excludes: Iterable[str] = DEFAULT_EXCLUDES,
+                 interval: float = 300, store: Optional[SharedStore] = None):
+        self.db_path = os.path.abspath(db_path)
+        self.roots = [os.path.abspath(os.path.expanduser(r)) for r in roots if r]
+        self.excludes = set(excludes)
+        self.interval = interval
+        # With several worker processes only the lease holder refreshes the index
+        self.store = store
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_refresh = None
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.trigram = self._create_schema()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_schema(self) -> bool:
+        """Create tables; returns False when SQLite lacks the FTS5 trigram tokenizer"""
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                dir TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER,
+                mtime REAL
+            );
+            CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                parent TEXT,
+                mtime_ns INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+        """)
+        try:
+            conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+                    name, content='files', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+                    INSERT INTO files_fts(rowid, name) VALUES (new.id, new.name);
+                END;
+                CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+                    INSERT INTO files_fts(files_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                END;
+                CREATE TRIGGER IF NOT EXISTS files_au AFTER UPDATE OF name ON files BEGIN
+                    INSERT INTO files_fts(files_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                    INSERT INTO files_fts(rowid, name) VALUES (new.id, new.name);
+                END;
+            """)
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"File index: FTS5 trigram search unavailable ({e}), using LIKE queries")
+            return False
+
+    def start(self):
+        """Refresh in a background thread every interval seconds"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._refresh_loop, name="jarvis-file-index")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def _refresh_loop(self):
+        while not self.stop_event.is_set():
+            if self.store is None or self.store.try_acquire('file_index:lease', self.interval * 0.9):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"File index refresh error: {e}")
+            self.stop_event.wait(self.interval)
+
+    def _restart_after_fork(self):
+        was_running = self.thread is not None and not self.stop_event.is_set()
+        self.thread = None
+        self._refresh_lock = threading.Lock()
+        if was_running:
+            self.start()
+
+    def refresh(self) -> Dict[str, Any]:
+        """Bring the index up to date, re-listing only directories whose mtime changed"""
+        with self._refresh_lock:
+            started = time.monotonic()
+            stats = {"dirs_checked": 0, "dirs_rescanned": 0, "files_updated": 0}
+            conn = self._connect()
+            for root in self.roots:
+                if os.path.isdir(root):
+                    self._refresh_tree(conn, root, stats)
+                else:
+                    self._forget_tree(conn, root)
+            self.last_refresh = time.time()
+            stats["seconds"] = round(time.monotonic() - started, 3)
+            return stats
+
+    def update_path(self, path: str):
+        """Re-index the directory containing path, e.g. after a filesystem event"""
+        path = os.path.abspath(path)
+        directory = path if os.path.isdir(path) else os.path.dirname(path)
+        if not any(directory == r or directory.startswith(r.rstrip(os.sep) + os.sep) for r in self.roots):
+            return
+        with self._refresh_lock:
+            conn = self._connect()
+            if os.path.isdir(directory):
+                self._rescan_dir(conn, directory, {"files_updated": 0})
+            else:
+                self._forget_tree(conn, directory)
+
+    def _refresh_tree(self, conn: sqlite3.Connection, root: str, stats: Dict[str, int]):
+        stack = [root]
+        while stack:
+            if self.stop_event.is_set():
+                return
+            directory = stack.pop()
+            stats["dirs_checked"] += 1
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                self._forget_tree(conn, directory)
+                continue
+            row = conn.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (directory,)).fetchone()
+            if row is not None and row[0] == mtime_ns:
+                # Unchanged listing: descend into the subdirectories we already know
+                stack.extend(r[0] for r in conn.execute("SELECT path FROM dirs WHERE parent = ?", (directory,)))
+                continue
+            stats["dirs_rescanned"] += 1
+            stack.extend(self._rescan_dir(conn, directory, stats, mtime_ns))
+
+    def _rescan_dir(self, conn: sqlite3.Connection, directory: str, stats: Dict[str, int],
+                    mtime_ns: Optional[int] = None) -> List[str]:
+        """Re-list one directory, update its rows and return its subdirectories"""
+        files = {}
+        subdirs = []
+        try:
+            if mtime_ns is None:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name in self.excludes:
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            files[entry.path] = (entry.name, st.st_size, st.st_mtime)
+                    except OSError:
+                        continue
+        except OSError:
+            self._forget_tree(conn, directory)
+            return []
+
+        conn.execute("BEGIN")
+        try:
+            known = {r[0]: (r[1], r[2]) for r in conn.execute(
+                "SELECT path, size, mtime FROM files WHERE dir = ?", (directory,))}
+            for path in known.keys() - files.keys():
+                conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            for path, (name, size, mtime) in files.items():
+                if known.get(path) != (size, mtime):
+                    conn.execute(
+                        "INSERT INTO files (path, dir, name, size, mtime) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime",
+                        (path, directory, name, size, mtime)
+                    )
+                    stats["files_updated"] += 1
+            known_dirs = {r[0] for r in conn.execute("SELECT path FROM dirs WHERE parent = ?", (directory,))}
+            for gone in known_dirs - set(subdirs):
+                self._forget_tree(conn, gone, in_transaction=True)
+            parent = os.path.dirname(directory) if directory not in self.roots else None
+            conn.execute(
+                "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                (directory, parent, mtime_ns)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return subdirs
+
+    def _forget_tree(self, conn: sqlite3.Connection, directory: str, in_transaction: bool = False):
+        """Drop a directory and everything below it from the index"""
+        prefix = directory.rstrip(os.sep) + os.sep
+        upper = prefix + '\uffff'
+        if not in_transaction:
+            conn.execute("BEGIN")
+        conn.execute("DELETE FROM files WHERE dir = ? OR (dir >= ? AND dir < ?)", (directory, prefix, upper))
+        conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (directory, prefix, upper))
+        if not in_transaction:
+            conn.execute("COMMIT")
+
+    def find(self, query: str, limit: int = 20, extensions: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Fuzzy file-name lookup ranked by similarity to the query"""
+        query = query.strip()
+        if not query:
+            return []
+        conn = self._connect()
+        candidate_limit = max(limit * 10, 200)
+        words = [w for w in query.split() if w]
+
+        if self.trigram and all(len(w) >= 3 for w in words):
+            # Every word must appear as a substring; fall back to any shared trigram for typos
+            phrase = ' AND '.join('"' + w.replace('"', '""') + '"' for w in words)
+            rows = self._fts_query(conn, phrase, candidate_limit)
+            if not rows:
+                grams = {query[i:i + 3] for i in range(len(query) - 2) if ' ' not in query[i:i + 3]}
+                if grams:
+                    loose = ' OR '.join('"' + g.replace('"', '""') + '"' for g in grams)
+                    rows = self._fts_query(conn, loose, candidate_limit)
+        else:
+            clauses = ' AND '.join("name LIKE ? ESCAPE '\\'" for _ in words)
+            params = ['%' + w.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%' for w in words]
+            rows = conn.execute(
+                f"SELECT path, name, size, mtime FROM files WHERE {clauses} LIMIT ?",
+                params + [candidate_limit]
+            ).fetchall()
+
+        if extensions:
+            wanted = {'.' + e.lower().lstrip('.') for e in extensions}
+            rows = [r for r in rows if os.path.splitext(r[1])[1].lower() in wanted]
+
+        needle = query.lower()
+        scored = sorted(
+            rows,
+            key=lambda r: (-difflib.SequenceMatcher(None, needle, r[1].lower()).ratio(), len(r[1]))
+        )
+        return [
+            {"path": path, "name": name, "size": size, "modified": mtime}
+            for path, name, size, mtime in scored[:limit]
+        ]
+
+    @staticmethod
+    def _fts_query(conn: sqlite3.Connection, match: str, limit: int):
+        return conn.execute(
+            "SELECT f.path, f.name, f.size, f.mtime FROM files_fts "
+            "JOIN files f ON f.id = files_fts.rowid "
+            "WHERE files_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit)
+        ).fetchall()
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        return {
+            "roots": self.roots,
+            "files": conn.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+            "directories": conn.execute("SELECT COUNT(*) FROM dirs").fetchone()[0],
+            "last_refresh": self.last_refresh,
+            "trigram_search": self.trigram
+        }
@@ -0,0 +1,440 @@
+"""
+File Watch Module
+Directory change subscriptions for the watch_path action
+Changes come from inotify (through ctypes) on Linux, with a scandir polling
+fallback where inotify is unavailable; bursts are coalesced per path into
+debounced batches, which are queued for each subscriber and handed to listeners
+such as the file cache and index
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import queue
+import select
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Iterator, List, Optional, Set, Tuple
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Paths kept per pending batch; beyond this the batch only reports an overflow
+MAX_PENDING_PATHS = 10000
+
+# (directory, name, kind, is_dir); kind is created, modified, deleted or overflow
+RawEvent = Tuple[str, str, str, bool]
+WatchListener = Callable[[Dict[str, Any]], Any]
+
+
+class InotifyBackend:
+    """Kernel change notifications, one watch per directory"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self.directories: Dict[int, str] = {}
+        self.watches: Dict[str, int] = {}
+
+    def add(self, directory: str):
+        if directory in self.watches:
+            return
+        wd = self._add(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), directory)
+        self.directories[wd] = directory
+        self.watches[directory] = wd
+
+    def remove(self, directory: str):
+        wd = self.watches.pop(directory, None)
+        if wd is not None:
+            self.directories.pop(wd, None)
+            self._rm(self.fd, wd)
+
+    def read(self, timeout: float) -> List[RawEvent]:
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append(('', '', 'overflow', False))
+                continue
+            directory = self.directories.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                # The kernel dropped the watch because the directory is gone
+                self.directories.pop(wd, None)
+                self.watches.pop(directory, None)
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                events.append((os.path.dirname(directory), os.path.basename(directory), 'deleted', True))
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                events.append((directory, name, 'created', bool(mask & IN_ISDIR)))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append((directory, name, 'deleted', bool(mask & IN_ISDIR)))
+            elif name:
+                events.append((directory, name, 'modified', bool(mask & IN_ISDIR)))
+        return events
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class PollingBackend:
+    """Periodic scandir snapshots compared entry by entry"""
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self.snapshots: Dict[str, Dict[str, Tuple[bool, int, int]]] = {}
+        self._next_poll = time.monotonic() + interval
+
+    @staticmethod
+    def _snapshot(directory: str) -> Dict[str, Tuple[bool, int, int]]:
+        entries = {}
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    entries[entry.name] = (entry.is_dir(follow_symlinks=False), st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue
+        return entries
+
+    def add(self, directory: str):
+        if directory not in self.snapshots:
+            self.snapshots[directory] = self._snapshot(directory)
+
+    def remove(self, directory: str):
+        self.snapshots.pop(directory, None)
+
+    def read(self, timeout: float) -> List[RawEvent]:
+        wait = self._next_poll - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, max(0.0, timeout)))
+            if time.monotonic() < self._next_poll:
+                return []
+        self._next_poll = time.monotonic() + self.interval
+        events = []
+        for directory, before in list(self.snapshots.items()):
+            try:
+                after = self._snapshot(directory)
+            except OSError:
+                self.snapshots.pop(directory, None)
+                events.append((os.path.dirname(directory), os.path.basename(directory), 'deleted', True))
+                continue
+            for name, state in after.items():
+                old = before.get(name)
+                if old is None:
+                    events.append((directory, name, 'created', state[0]))
+                elif old != state and not state[0]:
+                    events.append((directory, name, 'modified', False))
+            for name, state in before.items():
+                if name not in after:
+                    events.append((directory, name, 'deleted', state[0]))
+            if directory in self.snapshots:
+                self.snapshots[directory] = after
+        return events
+
+    def close(self):
+        self.snapshots.clear()
+
+
+def _coalesce(previous: Optional[str], kind: str) -> Optional[str]:
+    """Combine two events on one path; None means the changes cancel out"""
+    if previous == 'created':
+        return None if kind == 'deleted' else 'created'
+    if previous == 'deleted' and kind == 'created':
+        return 'modified'
+    return kind
+
+
+class Subscription:
+    """One client's watch on a directory; batches wait in a queue until read"""
+
+    def __init__(self, root: str, recursive: bool, debounce: float, max_delay: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.root = root
+        self.recursive = recursive
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.directories: Set[str] = set()
+        self.incomplete = False
+        self.batches: 'queue.Queue' = queue.Queue()
+        self.closed = threading.Event()
+        self._pending: 'OrderedDict[str, str]' = OrderedDict()
+        self._overflow = False
+        self._first = self._last = 0.0
+
+    def covers(self, directory: str) -> bool:
+        if directory == self.root:
+            return True
+        return self.recursive and directory.startswith(self.root.rstrip(os.sep) + os.sep)
+
+    def add(self, path: str, kind: str, now: float):
+        if not self._pending and not self._overflow:
+            self._first = now
+        self._last = now
+        if kind == 'overflow' or len(self._pending) >= MAX_PENDING_PATHS:
+            self._overflow = True
+            self._pending.clear()
+            return
+        if self._overflow:
+            return
+        merged = _coalesce(self._pending.pop(path, None), kind)
+        if merged is not None:
+            self._pending[path] = merged
+
+    def due(self, now: float) -> Optional[float]:
+        """Seconds until the pending batch should go out, None when nothing is pending"""
+        if not self._pending and not self._overflow:
+            return None
+        return max(0.0, min(self._last + self.debounce, self._first + self.max_delay) - now)
+
+    def take(self) -> Dict[str, Any]:
+        batch = {
+            "type": "changes",
+            "watch": self.id,
+            "path": self.root,
+            "events": [{"path": path, "type": kind} for path, kind in self._pending.items()],
+            "overflow": self._overflow,
+            "timestamp": time.time()
+        }
+        self._pending = OrderedDict()
+        self._overflow = False
+        return batch
+
+
+class WatchManager:
+    """Shares one backend and one thread between all subscriptions of this process"""
+
+    def __init__(self, backend: str = 'auto', debounce: float = 0.2, poll_interval: float = 2.0,
+                 max_directories: int = 8192):
+        self.backend_name = backend
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.max_directories = max_directories
+        self.listeners: List[WatchListener] = []
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            # The backend thread and inotify descriptor belong to the process that made them
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self.subscriptions: Dict[str, Subscription] = {}
+        self._refcounts: Dict[str, int] = {}
+        self._backend = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _make_backend(self):
+        if self.backend_name in ('auto', 'inotify') and hasattr(select, 'select') and os.name == 'posix':
+            try:
+                return InotifyBackend()
+            except (OSError, AttributeError) as e:
+                if self.backend_name == 'inotify':
+                    raise
+                print(f"inotify unavailable, polling for file changes: {e}")
+        return PollingBackend(self.poll_interval)
+
+    def add_listener(self, listener: WatchListener):
+        """Call listener(batch) for every batch of every subscription"""
+        self.listeners.append(listener)
+
+    def _watch_directory(self, subscription: Subscription, directory: str):
+        if directory in subscription.directories:
+            return
+        if len(subscription.directories) >= self.max_directories:
+            subscription.incomplete = True
+            return
+        try:
+            self._backend.add(directory)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                # Out of inotify watches (fs.inotify.max_user_watches)
+                subscription.incomplete = True
+            return
+        subscription.directories.add(directory)
+        self._refcounts[directory] = self._refcounts.get(directory, 0) + 1
+
+    def _watch_tree(self, subscription: Subscription, top: str):
+        stack = [top]
+        while stack and not subscription.incomplete:
+            directory = stack.pop()
+            self._watch_directory(subscription, directory)
+            if not subscription.recursive:
+                return
+            try:
+                with os.scandir(directory) as entries:
+                    stack.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def _release(self, subscription: Subscription, directories):
+        for directory in directories:
+            subscription.directories.discard(directory)
+            count = self._refcounts.get(directory, 0) - 1
+            if count <= 0:
+                self._refcounts.pop(directory, None)
+                self._backend.remove(directory)
+            else:
+                self._refcounts[directory] = count
+
+    def subscribe(self, path: str, recursive: bool = True, debounce: Optional[float] = None) -> Subscription:
+        """Start watching path; read batches from subscription.batches until unsubscribe"""
+        root = os.path.abspath(path)
+        if not os.path.isdir(root):
+            raise NotADirectoryError(f"Not a directory: {root}")
+        debounce = self.debounce if debounce is None else max(0.0, debounce)
+        subscription = Subscription(root, recursive, debounce, max(1.0, debounce * 10))
+        with self._lock:
+            if self._backend is None:
+                self._backend = self._make_backend()
+            self._watch_tree(subscription, root)
+            self.subscriptions[subscription.id] = subscription
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="jarvis-file-watch", daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if self.subscriptions.pop(subscription.id, None) is None:
+                return
+            self._release(subscription, list(subscription.directories))
+            subscription.closed.set()
+
+    def close_all(self):
+        """End every subscription, waking readers blocked on an empty queue"""
+        with self._lock:
+            subscriptions = list(self.subscriptions.values())
+        for subscription in subscriptions:
+            self.unsubscribe(subscription)
+            subscription.batches.put({"type": "closed", "watch": subscription.id})
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self.subscriptions:
+                    # Idle: give the descriptor back; the next subscribe starts over
+                    self._backend.close()
+                    self._backend = None
+                    self._thread = None
+                    return
+                backend = self._backend
+                waits = [d for d in (s.due(time.monotonic()) for s in self.subscriptions.values()) if d is not None]
+            timeout = min(waits) if waits else 1.0
+            events = backend.read(min(timeout, 1.0))
+            ready = []
+            with self._lock:
+                if self._backend is not backend:
+                    continue
+                now = time.monotonic()
+                for directory, name, kind, is_dir in events:
+                    self._route(directory, name, kind, is_dir, now)
+                for subscription in self.subscriptions.values():
+                    if subscription.due(now) == 0.0:
+                        ready.append((subscription, subscription.take()))
+            for subscription, batch in ready:
+                # Listeners first, so a client that re-reads on a batch sees fresh cache entries
+                for listener in self.listeners:
+                    try:
+                        listener(batch)
+                    except Exception as e:
+                        print(f"File watch listener failed: {e}")
+                subscription.batches.put(batch)
+
+    def _route(self, directory: str, name: str, kind: str, is_dir: bool, now: float):
+        if kind == 'overflow':
+            for subscription in self.subscriptions.values():
+                subscription.add(subscription.root, 'overflow', now)
+            return
+        path = os.path.join(directory, name)
+        for subscription in self.subscriptions.values():
+            if not subscription.covers(directory) and path != subscription.root:
+                continue
+            if is_dir and subscription.recursive:
+                if kind == 'created':
+                    self._watch_tree(subscription, path)
+                elif kind == 'deleted':
+                    prefix = path + os.sep
+                    self._release(subscription, [d for d in subscription.directories
+                                                 if d == path or d.startswith(prefix)])
+            subscription.add(path, kind, now)
+
+    def iter_batches(self, path: str, recursive: bool = True, debounce: Optional[float] = None,
+                     heartbeat: float = 15.0) -> Iterator[Dict[str, Any]]:
+        """Yield change batches for path until the consumer closes the generator"""
+        subscription = self.subscribe(path, recursive, debounce)
+        try:
+            yield {
+                "type": "watching",
+                "watch": subscription.id,
+                "path": subscription.root,
+                "recursive": recursive,
+                "directories": len(subscription.directories),
+                "incomplete": subscription.incomplete,
+                "backend": type(self._backend).__name__ if self._backend is not None else None
+            }
+            while not subscription.closed.is_set():
+                try:
+                    yield subscription.batches.get(timeout=heartbeat)
+                except queue.Empty:
+                    # Lets a server notice a client that went away
+                    yield {"type": "heartbeat", "watch": subscription.id, "timestamp": time.time()}
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": type(self._backend).__name__ if self._backend is not None else None,
+                "subscriptions": [
+                    {"watch": s.id, "path": s.root, "recursive": s.recursive,
+                     "directories": len(s.directories), "incomplete": s.incomplete}
+                    for s in self.subscriptions.values()
+                ],
+                "watched_directories": len(self._refcounts)
+            }
@@ -0,0 +1,226 @@
+"""
+File I/O Helpers
+Shared low-level helpers for the SystemController file actions:
+binary sniffing, encoding detection, memory-mapped access to large files,
+byte/line range lookups that never read more than they return and
+crash-safe atomic replacement of files
+"""
+
+import codecs
+import mmap
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+# How much of a file is inspected to decide whether it is binary
+SNIFF_BYTES = 8192
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1024 * 1024
+
+# When writes are flushed to disk: 'none' leaves it to the OS, 'file' syncs
+# the file data, 'full' also syncs the directory so the rename itself survives
+FSYNC_POLICIES = ('none', 'file', 'full')
+
+# Block size for streamed reads
+READ_CHUNK = 64 * 1024
+
+# Byte order marks, longest first so UTF-32 is not mistaken for UTF-16
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Bytes that commonly appear in text files
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+
+def looks_binary(chunk: bytes) -> bool:
+    """Guess whether a leading chunk of a file is binary data"""
+    if not chunk:
+        return False
+    if b'\x00' in chunk:
+        # UTF-16 text has NULs but starts with a BOM
+        return not chunk.startswith((b'\xff\xfe', b'\xfe\xff'))
+    control = chunk.translate(None, _TEXT_BYTES)
+    return len(control) / len(chunk) > 0.3
+
+
+def is_binary_file(path: str) -> bool:
+    """Sniff the first few KB of a file"""
+    with open(path, 'rb') as f:
+        return looks_binary(f.read(SNIFF_BYTES))
+
+
+@contextmanager
+def mapped(path: str, threshold: int = MMAP_THRESHOLD) -> Iterator[Union[bytes, mmap.mmap]]:
+    """Yield the file content as an mmap for large files or bytes for small ones"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < threshold or size == 0:
+            yield f.read()
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def detect_encoding(chunk: bytes) -> str:
+    """Guess the encoding of a leading chunk: BOM first, then UTF-8, else Latin-1"""
+    for bom, name in _BOMS:
+        if chunk.startswith(bom):
+            return name
+    try:
+        # Incremental so a multi-byte character cut off at the chunk end is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(chunk, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def is_line_addressable(encoding: str) -> bool:
+    """Whether b'\\n' marks line ends, which holds for ASCII-compatible encodings"""
+    return not encoding.startswith(('utf-16', 'utf-32'))
+
+
+def _skip_lines(data, lines: int, pos: int = 0) -> int:
+    """Offset just past the first `lines` newlines at or after pos"""
+    for _ in range(lines):
+        newline = data.find(b'\n', pos)
+        if newline == -1:
+            return len(data)
+        pos = newline + 1
+    return pos
+
+
+def _tail_start(data, lines: int) -> int:
+    """Offset of the start of the last `lines` lines, scanning backwards from the end"""
+    end = len(data)
+    # A trailing newline terminates the last line rather than starting a new one
+    pos = end - 1 if end and data[end - 1:end] == b'\n' else end
+    for _ in range(lines):
+        newline = data.rfind(b'\n', 0, pos)
+        if newline == -1:
+            return 0
+        pos = newline
+    return pos + 1
+
+
+def locate_range(data, offset: Optional[int] = None, length: Optional[int] = None,
+                 head: Optional[int] = None, tail: Optional[int] = None,
+                 start_line: Optional[int] = None, end_line: Optional[int] = None) -> Tuple[int, int]:
+    """Resolve one range selector to (start, end) byte offsets in data (bytes or mmap)
+
+    Lines are 1-based and end_line is inclusive; only the bytes up to the
+    requested lines are scanned, so tail on a huge mmap touches just its end.
+    """
+    size = len(data)
+    if tail is not None:
+        return _tail_start(data, max(0, int(tail))), size
+    if head is not None:
+        return 0, _skip_lines(data, max(0, int(head)))
+    if start_line is not None or end_line is not None:
+        start = _skip_lines(data, max(1, int(start_line or 1)) - 1)
+        if end_line is None:
+            return start, size
+        return start, max(start, _skip_lines(data, int(end_line) - max(1, int(start_line or 1)) + 1, start))
+    start = min(size, max(0, int(offset or 0)))
+    end = size if length is None else min(size, start + max(0, int(length)))
+    return start, end
+
+
+def iter_text(path: str, start: int, end: int, encoding: str,
+              chunk_size: int = READ_CHUNK) -> Iterator[Tuple[int, str]]:
+    """Yield (offset, text) blocks of path[start:end] decoded incrementally
+
+    Characters split across block boundaries are carried over by the decoder;
+    a range starting inside a character yields a replacement character.
+    """
+    if encoding == 'utf-8-sig' and start > 0:
+        encoding = 'utf-8'
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        while offset < end:
+            block = f.read(min(chunk_size, end - offset))
+            if not block:
+                break
+            text = decoder.decode(block)
+            if text:
+                yield offset, text
+            offset += len(block)
+        rest = decoder.decode(b'', final=True)
+        if rest:
+            yield offset, rest
+
+
+def temp_path(path: str) -> str:
+    """A unique hidden sibling of path, on the same volume so os.replace is atomic"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.{uuid.uuid4().hex[:12]}.tmp")
+
+
+def fsync_directory(directory: str):
+    """Persist a rename or create in directory (not possible on Windows)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace_file(temp: str, path: str, fsync: str = 'file'):
+    """Atomically move a fully written temp file over path, keeping path's permissions"""
+    if fsync != 'none':
+        with open(temp, 'rb+') as f:
+            os.fsync(f.fileno())
+    try:
+        shutil.copymode(path, temp)
+    except FileNotFoundError:
+        pass
+    os.replace(temp, path)
+    if fsync == 'full':
+        fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def atomic_write(path: str, data: Union[bytes, Iterable[bytes]], fsync: str = 'file') -> int:
+    """Write data (bytes or an iterable of chunks) to path so readers see the old or new file, never a mix"""
+    temp = temp_path(path)
+    written = 0
+    # os.open with 0o666 honours the umask like a plain open() would
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in ([data] if isinstance(data, (bytes, bytearray, memoryview)) else data):
+                f.write(chunk)
+                written += len(chunk)
+        replace_file(temp, path, fsync)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+def append_file(path: str, data: Union[bytes, Iterable[bytes]], fsync: str = 'file') -> int:
+    """Append in place; a crash can only lose the tail being appended, never existing content"""
+    written = 0
+    with open(path, 'ab') as f:
+        for chunk in ([data] if isinstance(data, (bytes, bytearray, memoryview)) else data):
+            f.write(chunk)
+            written += len(chunk)
+        if fsync != 'none':
+            f.flush()
+            os.fsync(f.fileno())
+    return written
@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for running the JARVIS backend on several cores
+Usage: gunicorn -c gunicorn.conf.py "server:create_app()"
+"""
+
+import multiprocessing
+import os
+
+# Workers must share caches, tokens, rate limits and job state
+os.environ.setdefault('SHARED_STORE_ENABLED', 'true')
+
+bind = os.getenv('JARVIS_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '4'))
+
+# Import server.py (controllers, Spotify auth) once in the parent before forking
+preload_app = True
+
+timeout = int(float(os.getenv('ACTION_TIMEOUT', '120'))) + 30
+graceful_timeout = int(float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', '30')))
+
+
+def worker_exit(server, worker):
+    """Drain scheduled actions and flush caches when a worker stops"""
+    from server import lifecycle
+    lifecycle.shutdown()
@@ -0,0 +1,223 @@
+"""
+Background Jobs Module
+Long-running actions (large copies, tree operations, archives) run as jobs on
+the ActionScheduler and report progress that clients can poll or cancel
+With a SharedStore, job state and cancel requests go through the store so
+any worker process can report on or cancel a job another worker is running
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional
+
+from scheduler import ActionScheduler, SchedulerFullError, PRIORITY_BULK
+from shared_store import SharedStore
+
+FINISHED = ('completed', 'failed', 'cancelled')
+JOB_PREFIX = 'job:'
+CANCEL_PREFIX = 'jobcancel:'
+
+
+class Job:
+    """State of one background action"""
+
+    def __init__(self, action: str, params: Optional[Dict[str, Any]] = None,
+                 publish: Optional[Callable[['Job'], None]] = None, publish_interval: float = 0.5):
+        self.id = uuid.uuid4().hex[:12]
+        self.action = action
+        self.params = params or {}
+        self.status = 'queued'
+        self.progress: Dict[str, Any] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self.created = time.time()
+        self.updated = self.created
+        self.cancel_event = threading.Event()
+        # Copies progress to the shared store, at most once per publish_interval
+        self._publish = publish
+        self.publish_interval = publish_interval
+        self._published = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def report(self, **progress):
+        """Merge progress fields, e.g. report(bytes_done=..., bytes_total=...)"""
+        self.progress.update(progress)
+        done, total = self.progress.get('bytes_done'), self.progress.get('bytes_total')
+        if done is not None and total:
+            self.progress['percent'] = round(100.0 * done / total, 1)
+        self.updated = time.time()
+        if self.updated - self._published >= self.publish_interval:
+            self.publish()
+
+    def publish(self):
+        if self._publish is not None:
+            self._published = time.time()
+            self._publish(self)
+
+    def report_bytes(self, done: int, total: int):
+        """Progress callback signature used by the copy engine"""
+        self.report(bytes_done=done, bytes_total=total)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "action": self.action,
+            "params": self.params,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "created": self.created,
+            "updated": self.updated
+        }
+
+
+class JobManager:
+    """Submits jobs to the scheduler and keeps recent ones for polling"""
+
+    def __init__(self, scheduler: ActionScheduler, max_finished: int = 200, store: Optional[SharedStore] = None,
+                 ttl: float = 86400, cancel_poll: float = 0.5):
+        self.scheduler = scheduler
+        self.max_finished = max_finished
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Shared job records expire ttl seconds after their last update
+        self.store = store
+        self.ttl = ttl
+        self.cancel_poll = cancel_poll
+        self._poller = None
+        self._poller_pid = None
+
+    def submit(self, action: str, fn: Callable[[Job], Dict[str, Any]], params: Optional[Dict[str, Any]] = None,
+               priority: str = PRIORITY_BULK) -> Dict[str, Any]:
+        """Start fn(job) in the background and return the job description"""
+        job = Job(action, params, publish=self._publish if self.store is not None else None)
+        with self._lock:
+            self._jobs[job.id] = job
+        job.publish()
+        try:
+            self.scheduler.submit(priority, self._run, job, fn)
+        except SchedulerFullError as e:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            self._forget(job.id)
+            return {"success": False, "error": str(e), "retry": True}
+        with self._lock:
+            self._prune()
+        self._ensure_poller()
+        return {"success": True, "message": f"Started {action} in the background", **job.to_dict()}
+
+    def _run(self, job: Job, fn: Callable[[Job], Dict[str, Any]]) -> Dict[str, Any]:
+        if job.cancelled:
+            job.status = 'cancelled'
+            job.publish()
+            return {"success": False, "error": "Job cancelled"}
+        job.status = 'running'
+        job.updated = time.time()
+        job.publish()
+        try:
+            result = fn(job)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        job.result = result
+        if job.cancelled:
+            job.status = 'cancelled'
+        else:
+            job.status = 'completed' if result.get('success') else 'failed'
+        job.updated = time.time()
+        job.publish()
+        if job.cancelled and self.store is not None:
+            try:
+                self.store.delete(CANCEL_PREFIX + job.id)
+            except Exception as e:
+                print(f"Job state cleanup failed: {e}")
+        return result
+
+    def _publish(self, job: Job):
+        try:
+            self.store.set(JOB_PREFIX + job.id, job.to_dict(), ttl=self.ttl)
+        except Exception as e:
+            print(f"Job state publish failed: {e}")
+
+    def _forget(self, job_id: str):
+        if self.store is not None:
+            try:
+                self.store.delete(JOB_PREFIX + job_id)
+                self.store.delete(CANCEL_PREFIX + job_id)
+            except Exception as e:
+                print(f"Job state cleanup failed: {e}")
+
+    def _ensure_poller(self):
+        """Watch the store for cancel requests sent to other workers while this one has active jobs"""
+        if self.store is None:
+            return
+        with self._lock:
+            if self._poller is not None and self._poller.is_alive() and self._poller_pid == os.getpid():
+                return
+            self._poller_pid = os.getpid()
+            self._poller = threading.Thread(target=self._poll_cancels, name="jarvis-job-cancels")
+            self._poller.daemon = True
+            self._poller.start()
+
+    def _poll_cancels(self):
+        while True:
+            time.sleep(self.cancel_poll)
+            with self._lock:
+                active = [job for job in self._jobs.values() if job.status not in FINISHED]
+                if not active:
+                    self._poller = None
+                    return
+            try:
+                requested = self.store.items(CANCEL_PREFIX)
+            except Exception as e:
+                print(f"Job cancel poll failed: {e}")
+                continue
+            for job in active:
+                if CANCEL_PREFIX + job.id in requested:
+                    job.cancel_event.set()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Description of a job run by this or, through the store, any other worker"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.store is not None:
+            return self.store.get(JOB_PREFIX + job_id)
+        return None
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Ask a job to stop at its next checkpoint"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        description = job.to_dict() if job is not None else self.get(job_id)
+        if description is None:
+            return {"success": False, "error": "Job not found"}
+        if description['status'] in FINISHED:
+            return {"success": False, "error": f"Job already {description['status']}"}
+        if job is not None:
+            job.cancel_event.set()
+        else:
+            # The owning worker picks this up on its next cancel poll
+            self.store.set(CANCEL_PREFIX + job_id, True, ttl=self.ttl)
+        return {"success": True, "message": "Cancellation requested", "job_id": job_id}
+
+    def list(self) -> list:
+        with self._lock:
+            jobs = {job.id: job.to_dict() for job in self._jobs.values()}
+        if self.store is not None:
+            try:
+                for description in self.store.items(JOB_PREFIX).values():
+                    jobs.setdefault(description['job_id'], description)
+            except Exception as e:
+                print(f"Job list read failed: {e}")
+        return sorted(jobs.values(), key=lambda description: description['created'], reverse=True)
+
+    def _prune(self):
+        finished = [j.id for j in self._jobs.values() if j.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
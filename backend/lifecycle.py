@@ -0,0 +1,163 @@
+"""
+Server Lifecycle Module
+Graceful shutdown for the JARVIS backend: readiness flips first, new work is
+refused, open event streams are told to close, in-flight requests and
+scheduled actions drain within a deadline, and registered caches/ledgers are
+flushed before the process exits
+"""
+
+import signal
+import threading
+import time
+from typing import Dict, Any, Callable, List, Tuple
+
+
+class ShutdownCoordinator:
+    """Tracks in-flight requests and drains them on shutdown"""
+
+    def __init__(self, drain_timeout: float = 30.0, readiness_delay: float = 2.0, stream_grace: float = 5.0):
+        self.drain_timeout = drain_timeout
+        # Time between failing readiness and refusing work, so routers notice first
+        self.readiness_delay = readiness_delay
+        # How long signalled streams get to wind down after ordinary requests drained
+        self.stream_grace = stream_grace
+        self.ready = True
+        self.draining = False
+        # Set when the drain starts; long-lived streams check it between events
+        self.closing = threading.Event()
+        self._in_flight = 0
+        # Open event streams are counted apart so they cannot hold up the drain
+        self._streams = 0
+        self._idle = threading.Condition()
+        self._closers: List[Tuple[str, Callable[[], Any]]] = []
+        self._drainers: List[Tuple[str, Callable[[float], Any]]] = []
+        self._flushers: List[Tuple[str, Callable[[], Any]]] = []
+        self._shutdown_started = threading.Event()
+        self.finished = threading.Event()
+
+    def request_started(self) -> bool:
+        """Count a new request; returns False once draining has begun"""
+        with self._idle:
+            if self.draining:
+                return False
+            self._in_flight += 1
+            return True
+
+    def request_finished(self):
+        """Mark a counted request as done"""
+        with self._idle:
+            self._in_flight -= 1
+            if self._in_flight <= 0:
+                self._idle.notify_all()
+
+    def stream_started(self) -> bool:
+        """Count a new event stream; returns False once draining has begun"""
+        with self._idle:
+            if self.draining:
+                return False
+            self._streams += 1
+            return True
+
+    def stream_finished(self):
+        with self._idle:
+            self._streams -= 1
+            if self._streams <= 0:
+                self._idle.notify_all()
+
+    def in_flight(self) -> int:
+        with self._idle:
+            return self._in_flight
+
+    def open_streams(self) -> int:
+        with self._idle:
+            return self._streams
+
+    def register_close(self, name: str, close: Callable[[], Any]):
+        """Register a source of long-lived streams (e.g. watch subscriptions) to end when the drain starts"""
+        self._closers.append((name, close))
+
+    def register_drain(self, name: str, drain: Callable[[float], Any]):
+        """Register a component that finishes pending work given a timeout in seconds"""
+        self._drainers.append((name, drain))
+
+    def register_flush(self, name: str, flush: Callable[[], Any]):
+        """Register a cache or ledger to flush after draining"""
+        self._flushers.append((name, flush))
+
+    def shutdown(self) -> Dict[str, Any]:
+        """Run the full shutdown sequence once and report what happened"""
+        if self._shutdown_started.is_set():
+            self.finished.wait()
+            return {"success": True, "message": "Shutdown already completed"}
+        self._shutdown_started.set()
+
+        deadline = time.monotonic() + self.drain_timeout
+        report = {"drained": {}, "flushed": {}}
+
+        print("Shutdown: readiness off")
+        self.ready = False
+        time.sleep(min(self.readiness_delay, max(0.0, deadline - time.monotonic())))
+
+        with self._idle:
+            self.draining = True
+        self.closing.set()
+        for name, close in self._closers:
+            try:
+                close()
+            except Exception as e:
+                print(f"Shutdown: closing {name} streams failed: {e}")
+
+        with self._idle:
+            while self._in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._idle.wait(remaining)
+            report["requests_abandoned"] = self._in_flight
+            stream_deadline = min(deadline, time.monotonic() + self.stream_grace)
+            while self._streams > 0:
+                remaining = stream_deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._idle.wait(remaining)
+            report["streams_abandoned"] = self._streams
+        print(f"Shutdown: requests drained ({report['requests_abandoned']} abandoned, "
+              f"{report['streams_abandoned']} streams still open)")
+
+        for name, drain in self._drainers:
+            remaining = max(0.0, deadline - time.monotonic())
+            try:
+                report["drained"][name] = drain(remaining)
+            except Exception as e:
+                report["drained"][name] = f"error: {e}"
+
+        for name, flush in self._flushers:
+            try:
+                flush()
+                report["flushed"][name] = True
+            except Exception as e:
+                print(f"Shutdown: flushing {name} failed: {e}")
+                report["flushed"][name] = False
+
+        self.finished.set()
+        print("Shutdown: complete")
+        return {"success": True, **report}
+
+    def install_signal_handlers(self, on_complete: Callable[[], Any]):
+        """Start the shutdown sequence in the background on SIGTERM/SIGINT"""
+        def handle(signum, frame):
+            if self._shutdown_started.is_set():
+                # A second signal skips the drain
+                raise KeyboardInterrupt
+            print(f"Received signal {signum}, draining...")
+            thread = threading.Thread(target=self._shutdown_then, args=(on_complete,), name="jarvis-shutdown")
+            thread.daemon = True
+            thread.start()
+
+        for name in ('SIGTERM', 'SIGINT', 'SIGBREAK'):
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), handle)
+
+    def _shutdown_then(self, on_complete: Callable[[], Any]):
+        self.shutdown()
+        on_complete()
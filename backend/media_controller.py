@@ -1,16 +1,22 @@
 import keyboard
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from shared_store import SharedStore
 
 class MediaController:
     """Controls media playback using Windows media keys"""
     
-    def __init__(self):
+    def __init__(self, store: Optional[SharedStore] = None):
         self.last_command_time = 0
         self.command_cooldown = 0.5  # Prevent rapid repeated commands
+        # When workers share a store the cooldown is enforced across all of them
+        self.store = store
     
     def _can_execute(self) -> bool:
         """Check if enough time has passed since last command"""
+        if self.store is not None:
+            return self.store.try_acquire('media:cooldown', self.command_cooldown)
         current_time = time.time()
         if current_time - self.last_command_time < self.command_cooldown:
             return False
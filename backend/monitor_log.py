@@ -0,0 +1,532 @@
+"""
+Monitor Log Module
+Append-only storage for ScreenMonitor records
+Records are queued and written as JSON lines by a background thread in
+batches; the active segment is rotated by size or age, rotated segments are
+gzip-compressed, and old segments are removed by age and total size.
+Recent records stay in an in-memory ring buffer, and a SQLite index of
+timestamp, window and app per record answers time-range queries without
+reading the segments
+"""
+
+import gzip
+import json
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional
+
+SEGMENT_PREFIX = 'monitoring-'
+ACTIVE_SUFFIX = '.jsonl'
+COMPRESSED_SUFFIX = '.jsonl.gz'
+INDEX_NAME = 'index.sqlite3'
+
+
+def _segment_key(path: str) -> str:
+    """Segment name without its suffix, so it stays the same after compression"""
+    name = os.path.basename(path)
+    for suffix in (COMPRESSED_SUFFIX, ACTIVE_SUFFIX):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def record_time(record: Dict[str, Any]) -> Optional[float]:
+    """Epoch seconds of a record's timestamp (ISO string or number)"""
+    value = record.get('timestamp')
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def window_app(window: Optional[Dict[str, Any]]) -> str:
+    """Application name of a window: the part after the last ' - ' of its title, else its class"""
+    if not window:
+        return 'Unknown'
+    title = (window.get('title') or '').strip()
+    if ' - ' in title:
+        return title.rsplit(' - ', 1)[1].strip() or title
+    return window.get('class') or title or 'Unknown'
+
+
+class MonitorLog:
+    """JSONL segments with a buffered writer, rotation, compression, retention and a time index"""
+
+    def __init__(self, directory: str, max_segment_bytes: int = 8 * 1024 * 1024,
+                 max_segment_age: float = 3600, retention_days: float = 30,
+                 max_total_bytes: int = 512 * 1024 * 1024, compress: bool = True,
+                 flush_interval: float = 1.0, buffer_size: int = 10000, recent_size: int = 720):
+        self.directory = os.path.abspath(directory)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.retention_days = retention_days
+        self.max_total_bytes = max_total_bytes
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self._queue: 'queue.Queue[Optional[Dict[str, Any]]]' = queue.Queue(maxsize=buffer_size)
+        # Newest records in memory so latest() never touches disk
+        self._recent: 'deque[Dict[str, Any]]' = deque(maxlen=recent_size)
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._local = threading.local()
+        self._thread = None
+        self._pid = None
+        self._file = None
+        self._active_path = None
+        self._active_opened = 0.0
+        self._active_lines = 0
+        self._flushed = threading.Condition()
+        self._pending = 0
+        self.dropped = 0
+        self.written = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_path = os.path.join(self.directory, INDEX_NAME)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " name TEXT PRIMARY KEY,"
+            " offset INTEGER NOT NULL DEFAULT 0,"
+            " lines INTEGER NOT NULL DEFAULT 0,"
+            " complete INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " segment TEXT NOT NULL,"
+            " line INTEGER NOT NULL,"
+            " ts REAL NOT NULL,"
+            " title TEXT,"
+            " window_class TEXT,"
+            " app TEXT,"
+            " cpu_percent REAL,"
+            " memory_percent REAL,"
+            " PRIMARY KEY (segment, line))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots (ts)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _segments(self) -> List[str]:
+        """Segment paths oldest first; names carry the creation time so they sort chronologically"""
+        names = [name for name in os.listdir(self.directory)
+                 if name.startswith(SEGMENT_PREFIX) and name.endswith((ACTIVE_SUFFIX, COMPRESSED_SUFFIX))]
+        return [os.path.join(self.directory, name) for name in sorted(names)]
+
+    def _ensure_writer(self):
+        # Threads do not survive fork, so a child starts its own writer
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._file = None
+            self._thread = threading.Thread(target=self._write_loop, name="jarvis-monitor-log")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        """Queue one record; returns False and counts it as dropped when the buffer is full"""
+        self._ensure_writer()
+        self._recent.append(record)
+        with self._flushed:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._flushed:
+                self._pending -= 1
+                self.dropped += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until every queued record is on disk and indexed"""
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self):
+        """Flush, stop the writer and close the active segment"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _open_segment(self):
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        self._active_path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{stamp}{ACTIVE_SUFFIX}")
+        self._file = open(self._active_path, 'ab')
+        self._active_opened = time.time()
+        self._active_lines = 0
+        self._connect().execute("INSERT OR IGNORE INTO segments (name) VALUES (?)",
+                                (_segment_key(self._active_path),))
+
+    def _write_loop(self):
+        # Segments a previous run left uncompressed or unindexed are finished first
+        self._finish_segments()
+        try:
+            self.sync_index()
+        except Exception as e:
+            print(f"Monitor index error: {e}")
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < 1000:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [record for record in batch if record is not None]
+            try:
+                if batch:
+                    self._write_batch(batch)
+                if self._file is not None and self._should_rotate():
+                    self._rotate()
+            except Exception as e:
+                print(f"Monitor log error: {e}")
+            finally:
+                if batch:
+                    with self._flushed:
+                        self._pending -= len(batch)
+                        self._flushed.notify_all()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        if self._file is None:
+            self._open_segment()
+        lines = b''.join(json.dumps(record, default=str, separators=(',', ':')).encode('utf-8') + b'\n'
+                         for record in batch)
+        # One write and flush per batch; a crash can only cut off the last line, which readers skip
+        self._file.write(lines)
+        self._file.flush()
+        first_line = self._active_lines
+        self._active_lines += len(batch)
+        self.written += len(batch)
+        with self._index_lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            self._index_records(conn, _segment_key(self._active_path), enumerate(batch, first_line))
+            conn.execute("UPDATE segments SET offset = ?, lines = ? WHERE name = ?",
+                         (self._file.tell(), self._active_lines, _segment_key(self._active_path)))
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _index_records(conn: sqlite3.Connection, segment: str, numbered):
+        rows = []
+        for line, record in numbered:
+            ts = record_time(record)
+            if ts is None:
+                continue
+            window = record.get('active_window') or {}
+            system = record.get('system_info') or {}
+            rows.append((segment, line, ts, window.get('title'), window.get('class'), window_app(window),
+                         system.get('cpu_percent'), system.get('memory_percent')))
+        conn.executemany("INSERT OR IGNORE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _should_rotate(self) -> bool:
+        return (self._file.tell() >= self.max_segment_bytes or
+                time.time() - self._active_opened >= self.max_segment_age)
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        self._connect().execute("UPDATE segments SET complete = 1 WHERE name = ?",
+                                (_segment_key(self._active_path),))
+        self._finish_segments()
+
+    def _finish_segments(self):
+        """Compress closed segments, then apply the retention policy"""
+        segments = self._segments()
+        if self.compress:
+            for path in segments:
+                if path.endswith(ACTIVE_SUFFIX) and path != self._active_path_if_open():
+                    self._compress(path)
+            segments = self._segments()
+        cutoff = time.time() - self.retention_days * 86400
+        sizes = []
+        for path in segments:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            sizes.append((path, st.st_size, st.st_mtime))
+        total = sum(size for _, size, _ in sizes)
+        for path, size, modified in sizes:
+            if path == self._active_path_if_open():
+                continue
+            if modified < cutoff or total > self.max_total_bytes:
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    continue
+                self._forget_segment(_segment_key(path))
+
+    def _forget_segment(self, segment: str):
+        with self._index_lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM snapshots WHERE segment = ?", (segment,))
+            conn.execute("DELETE FROM segments WHERE name = ?", (segment,))
+            conn.execute("COMMIT")
+
+    def _active_path_if_open(self) -> Optional[str]:
+        return self._active_path if self._file is not None else None
+
+    def _compress(self, path: str):
+        target = path[:-len(ACTIVE_SUFFIX)] + COMPRESSED_SUFFIX
+        temp = target + '.tmp'
+        with open(path, 'rb') as source, gzip.open(temp, 'wb') as compressed:
+            shutil.copyfileobj(source, compressed, 1024 * 1024)
+        modified = os.stat(path).st_mtime
+        os.replace(temp, target)
+        # Keep the segment's last write time so age-based retention still works after compression
+        os.utime(target, (modified, modified))
+        os.remove(path)
+
+    def import_json(self, path: str) -> int:
+        """Move records from a legacy monitoring_data.json array into a segment, then remove it"""
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        stamp = datetime.fromtimestamp(os.stat(path).st_mtime).strftime('%Y%m%d-%H%M%S-%f')
+        segment = os.path.join(self.directory, f"{SEGMENT_PREFIX}{stamp}{ACTIVE_SUFFIX}")
+        with open(segment, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, default=str, separators=(',', ':')) + '\n')
+        os.remove(path)
+        return len(records)
+
+    def sync_index(self):
+        """Index segment lines the index has not seen, e.g. imported or written by another process"""
+        with self._index_lock:
+            conn = self._connect()
+            on_disk = {_segment_key(path): path for path in self._segments()}
+            known = {name: (offset, lines, complete) for name, offset, lines, complete in
+                     conn.execute("SELECT name, offset, lines, complete FROM segments")}
+            active = _segment_key(self._active_path) if self._active_path_if_open() else None
+            newest = max(on_disk) if on_disk else None
+            for name in set(known) - set(on_disk):
+                conn.execute("DELETE FROM snapshots WHERE segment = ?", (name,))
+                conn.execute("DELETE FROM segments WHERE name = ?", (name,))
+            for name, path in sorted(on_disk.items()):
+                offset, lines, complete = known.get(name, (0, 0, 0))
+                if complete or name == active:
+                    continue
+                conn.execute("BEGIN")
+                conn.execute("INSERT OR IGNORE INTO segments (name) VALUES (?)", (name,))
+                if path.endswith(COMPRESSED_SUFFIX):
+                    # Line numbers restart at 0; rows already indexed keep their keys
+                    self._index_records(conn, name, self._numbered_lines(path))
+                    conn.execute("UPDATE segments SET complete = 1 WHERE name = ?", (name,))
+                else:
+                    offset, lines = self._index_plain(conn, name, path, offset, lines)
+                    conn.execute("UPDATE segments SET offset = ?, lines = ?, complete = ? WHERE name = ?",
+                                 (offset, lines, int(name != newest), name))
+                conn.execute("COMMIT")
+
+    def _index_plain(self, conn: sqlite3.Connection, name: str, path: str, offset: int, lines: int) -> tuple:
+        """Index the complete lines after offset in an uncompressed segment"""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return offset, lines
+        # A trailing partial line is left for the next sync
+        complete_data = data[:data.rfind(b'\n') + 1]
+        raw_lines = complete_data.split(b'\n')[:-1] if complete_data else []
+        self._index_records(conn, name, self._decode_lines(raw_lines, lines))
+        return offset + len(complete_data), lines + len(raw_lines)
+
+    @staticmethod
+    def _decode_lines(raw_lines, first_line: int):
+        for line, raw in enumerate(raw_lines, first_line):
+            try:
+                yield line, json.loads(raw)
+            except ValueError:
+                continue
+
+    def _numbered_lines(self, path: str):
+        try:
+            with gzip.open(path, 'rb') as f:
+                yield from self._decode_lines(f, 0)
+        except (OSError, EOFError):
+            return
+
+    @staticmethod
+    def _read_segment(path: str) -> Iterator[Dict[str, Any]]:
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # A line cut off by a crash
+                        continue
+        except (OSError, EOFError):
+            return
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Every stored record, oldest first"""
+        for path in self._segments():
+            yield from self._read_segment(path)
+
+    def recent(self, count: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest records from the ring buffer, oldest first"""
+        records = list(self._recent)
+        return records[-count:] if count else records
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Newest record, from the ring buffer or else the end of the newest segment"""
+        if self._recent:
+            return self._recent[-1]
+        for path in reversed(self._segments()):
+            if path.endswith(COMPRESSED_SUFFIX):
+                record = None
+                for record in self._read_segment(path):
+                    pass
+                if record is not None:
+                    return record
+                continue
+            record = self._last_line(path)
+            if record is not None:
+                return record
+        return None
+
+    @staticmethod
+    def _last_line(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'rb') as f:
+                end = f.seek(0, os.SEEK_END)
+                block = 64 * 1024
+                data = b''
+                position = end
+                while position > 0:
+                    position = max(0, position - block)
+                    f.seek(position)
+                    data = f.read(end - position)
+                    lines = data.splitlines()
+                    # Only trust lines that start after a newline we have seen, or at the file start
+                    candidates = lines if position == 0 else lines[1:]
+                    for line in reversed(candidates):
+                        try:
+                            return json.loads(line)
+                        except ValueError:
+                            continue
+        except OSError:
+            pass
+        return None
+
+    def _where(self, start: Optional[float], end: Optional[float], title: Optional[str],
+               window_class: Optional[str], app: Optional[str]) -> tuple:
+        clauses, args = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            args.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            args.append(end)
+        if title:
+            clauses.append("title LIKE ?")
+            args.append(f"%{title}%")
+        if window_class:
+            clauses.append("window_class LIKE ?")
+            args.append(f"%{window_class}%")
+        if app:
+            clauses.append("app LIKE ?")
+            args.append(f"%{app}%")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, title: Optional[str] = None,
+              window_class: Optional[str] = None, app: Optional[str] = None,
+              limit: int = 1000) -> List[Dict[str, Any]]:
+        """Indexed snapshots in [start, end), oldest first; title, class and app match substrings"""
+        self.sync_index()
+        where, args = self._where(start, end, title, window_class, app)
+        rows = self._connect().execute(
+            "SELECT ts, title, window_class, app, cpu_percent, memory_percent FROM snapshots"
+            f"{where} ORDER BY ts LIMIT ?", args + [limit]
+        )
+        return [{
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            "title": title_,
+            "class": window_class_,
+            "app": app_,
+            "cpu_percent": cpu,
+            "memory_percent": memory
+        } for ts, title_, window_class_, app_, cpu, memory in rows]
+
+    def time_per_app(self, start: Optional[float] = None, end: Optional[float] = None,
+                     title: Optional[str] = None, window_class: Optional[str] = None,
+                     max_gap: float = 60) -> List[Dict[str, Any]]:
+        """Seconds spent per app in [start, end); each snapshot counts until the next one, at most max_gap"""
+        self.sync_index()
+        where, args = self._where(start, end, title, window_class, None)
+        totals: Dict[str, Dict[str, Any]] = {}
+        previous = None
+        # Gaps are measured between all snapshots, so filtered-out windows still end the previous span
+        span_where, span_args = self._where(start, end, None, None, None)
+        matching = {row[0] for row in self._connect().execute(f"SELECT rowid FROM snapshots{where}", args)} \
+            if (title or window_class) else None
+        for rowid, ts, app, title_ in self._connect().execute(
+                f"SELECT rowid, ts, app, title FROM snapshots{span_where} ORDER BY ts", span_args):
+            if previous is not None:
+                self._add_span(totals, previous, min(ts - previous[0], max_gap))
+            previous = (ts, app, title_) if matching is None or rowid in matching else None
+        if previous is not None:
+            limit = (end if end is not None else time.time()) - previous[0]
+            self._add_span(totals, previous, max(0.0, min(limit, max_gap)))
+        grand_total = sum(entry['seconds'] for entry in totals.values()) or 1.0
+        result = sorted(totals.values(), key=lambda entry: entry['seconds'], reverse=True)
+        for entry in result:
+            entry['seconds'] = round(entry['seconds'], 1)
+            entry['share'] = round(entry['seconds'] / grand_total, 3)
+            entry['top_titles'] = [title_ for title_, _ in
+                                   sorted(entry.pop('titles').items(), key=lambda item: item[1], reverse=True)[:5]]
+        return result
+
+    @staticmethod
+    def _add_span(totals: Dict[str, Dict[str, Any]], snapshot: tuple, seconds: float):
+        _, app, title = snapshot
+        entry = totals.setdefault(app, {"app": app, "seconds": 0.0, "snapshots": 0, "titles": {}})
+        entry['seconds'] += seconds
+        entry['snapshots'] += 1
+        if title:
+            entry['titles'][title] = entry['titles'].get(title, 0) + seconds
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self._segments()
+        return {
+            "directory": self.directory,
+            "segments": len(segments),
+            "bytes": sum(os.path.getsize(path) for path in segments if os.path.exists(path)),
+            "queued": self._queue.qsize(),
+            "recent": len(self._recent),
+            "written": self.written,
+            "dropped": self.dropped
+        }
@@ -0,0 +1,215 @@
+"""
+Path Resolver Module
+One place that turns user paths into absolute paths and checks them against
+restricted roots; known folders (Desktop, Documents, Downloads...) are looked
+up once from XDG user-dirs or the Windows shell folders, resolved paths are
+kept in an LRU cache, and restricted roots live in a trie of path components
+so a check costs one walk down the path; restricted checks always use a
+fresh realpath so a swapped-in symlink is never missed
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+# Known folder -> XDG user-dirs key
+KNOWN_FOLDERS = {
+    'desktop': 'XDG_DESKTOP_DIR',
+    'documents': 'XDG_DOCUMENTS_DIR',
+    'downloads': 'XDG_DOWNLOAD_DIR',
+    'music': 'XDG_MUSIC_DIR',
+    'pictures': 'XDG_PICTURES_DIR',
+    'videos': 'XDG_VIDEOS_DIR',
+}
+# Known folder -> value name under HKCU\...\Explorer\User Shell Folders
+_WINDOWS_SHELL_FOLDERS = {
+    'desktop': 'Desktop',
+    'documents': 'Personal',
+    'downloads': '{374DE290-123F-4565-9164-39C4925E467B}',
+    'music': 'My Music',
+    'pictures': 'My Pictures',
+    'videos': 'My Video',
+}
+_USER_DIRS_LINE = re.compile(r'^\s*(XDG_[A-Z]+_DIR)\s*=\s*"(.*)"\s*$')
+# Either slash separates a known folder from the rest, as users type both
+_SEPARATORS = re.compile(r'[\\/]')
+
+
+def home_directory() -> str:
+    return os.environ.get('USERPROFILE') or os.path.expanduser('~')
+
+
+def _xdg_user_dirs(home: str) -> Dict[str, str]:
+    """XDG_*_DIR values from the environment and ~/.config/user-dirs.dirs"""
+    config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.join(home, '.config')
+    found = {}
+    try:
+        with open(os.path.join(config_home, 'user-dirs.dirs'), encoding='utf-8') as f:
+            for line in f:
+                match = _USER_DIRS_LINE.match(line)
+                if match:
+                    found[match.group(1)] = match.group(2).replace('$HOME', home)
+    except OSError:
+        pass
+    for key in KNOWN_FOLDERS.values():
+        if os.environ.get(key):
+            found[key] = os.environ[key]
+    return found
+
+
+def _windows_shell_folders() -> Dict[str, str]:
+    """Known folder locations from the registry, which follow OneDrive redirection"""
+    try:
+        import winreg
+    except ImportError:
+        return {}
+    found = {}
+    try:
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER,
+                            r"Software\Microsoft\Windows\CurrentVersion\Explorer\User Shell Folders") as key:
+            for folder, value_name in _WINDOWS_SHELL_FOLDERS.items():
+                try:
+                    value, _ = winreg.QueryValueEx(key, value_name)
+                    found[folder] = os.path.expandvars(value)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return found
+
+
+def discover_known_folders() -> Dict[str, str]:
+    """Lower-case known folder name -> absolute path"""
+    home = home_directory()
+    folders = {name: os.path.join(home, name.capitalize()) for name in KNOWN_FOLDERS}
+    if os.name == 'nt':
+        folders.update(_windows_shell_folders())
+    else:
+        xdg = _xdg_user_dirs(home)
+        for name, key in KNOWN_FOLDERS.items():
+            if xdg.get(key):
+                folders[name] = xdg[key]
+    return {name: os.path.abspath(path) for name, path in folders.items()}
+
+
+class _LRU:
+    """Small thread-safe LRU of path strings"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PathResolver:
+    """Expands and checks paths for SystemController"""
+
+    def __init__(self, restricted: Iterable[str] = (), cache_size: int = 4096):
+        self._known_folders: Optional[Dict[str, str]] = None
+        self._resolved = _LRU(cache_size)
+        self._trie: Dict[str, dict] = {}
+        self._restricted: List[str] = []
+        self.set_restricted(restricted)
+
+    @property
+    def restricted(self) -> List[str]:
+        return list(self._restricted)
+
+    @staticmethod
+    def _components(path: str) -> List[str]:
+        return [part for part in os.path.normcase(path).split(os.sep) if part]
+
+    def set_restricted(self, roots: Iterable[str]):
+        """Replace the restricted roots; everything below a root is restricted"""
+        trie: Dict[str, dict] = {}
+        roots = list(roots)
+        for root in roots:
+            node = trie
+            for part in self._components(os.path.abspath(os.path.expanduser(root))):
+                node = node.setdefault(part, {})
+            # An empty key marks the end of a root
+            node[''] = {}
+        self._trie = trie
+        self._restricted = roots
+
+    def known_folders(self) -> Dict[str, str]:
+        if self._known_folders is None:
+            self._known_folders = discover_known_folders()
+        return self._known_folders
+
+    def refresh(self):
+        """Forget known folders and cached paths, e.g. after the user moved a folder"""
+        self._known_folders = None
+        self._resolved.clear()
+
+    def resolve(self, path: str) -> str:
+        """Absolute path with ~ and a leading known folder name (Desktop/notes.txt) expanded"""
+        cached = self._resolved.get(path)
+        if cached is not None:
+            return cached
+        expanded = os.path.expanduser(path)
+        head, rest = (_SEPARATORS.split(expanded, 1) + [''])[:2]
+        folder = self.known_folders().get(head.lower()) if head and not os.path.isabs(expanded) else None
+        if folder is not None:
+            expanded = os.path.join(folder, rest) if rest else folder
+        resolved = os.path.abspath(expanded)
+        # Other relative paths depend on the cwd at call time, so only cwd-independent ones are cached
+        if folder is not None or os.path.isabs(expanded):
+            self._resolved.put(path, resolved)
+        return resolved
+
+    def _under_restricted(self, path: str) -> bool:
+        node = self._trie
+        if '' in node:
+            return True
+        for part in self._components(path):
+            node = node.get(part)
+            if node is None:
+                return False
+            if '' in node:
+                return True
+        return False
+
+    def is_restricted(self, path: str) -> bool:
+        """True if the path, or where its symlinks lead, is inside a restricted root"""
+        if not self._trie:
+            return False
+        resolved = self.resolve(path)
+        if self._under_restricted(resolved):
+            return True
+        # Uncached on purpose: a directory swapped for a symlink must be caught on the next check
+        return self._under_restricted(os.path.realpath(resolved))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "resolved_entries": len(self._resolved),
+            "hits": self._resolved.hits,
+            "misses": self._resolved.misses
+        }
@@ -0,0 +1,210 @@
+"""
+Action Scheduler Module
+Runs JARVIS actions on separate worker pools per priority class so that
+interactive media/UI commands never wait behind bulk file work
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, Callable, Tuple
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_NORMAL = 'normal'
+PRIORITY_BULK = 'bulk'
+
+# Priority class -> (worker count, queue limit)
+DEFAULT_POOLS = {
+    PRIORITY_INTERACTIVE: (2, 32),
+    PRIORITY_NORMAL: (4, 64),
+    PRIORITY_BULK: (2, 16),
+}
+
+
+class SchedulerFullError(Exception):
+    """Raised when a priority class queue is at its limit"""
+
+
+class _WorkerPool:
+    """Fixed set of worker threads draining one bounded queue"""
+
+    def __init__(self, scheduler: 'ActionScheduler', priority: str, workers: int, queue_limit: int):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=max(1, queue_limit))
+        self.threads = []
+        self.busy = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"jarvis-{self.priority}-{i}")
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def idle_workers(self) -> int:
+        with self._lock:
+            return self.workers - self.busy - self.queue.qsize()
+
+    def _worker_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+            if self.priority != PRIORITY_INTERACTIVE:
+                # Yield to interactive work before starting anything new
+                self.scheduler.wait_for_interactive()
+            future, fn, args, kwargs = item
+            with self._lock:
+                self.busy += 1
+            try:
+                _run_into(future, fn, args, kwargs)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                    self.completed += 1
+                self.queue.task_done()
+
+
+def _run_into(future: Future, fn: Callable, args, kwargs):
+    """Run fn and publish its outcome on future"""
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except BaseException as e:
+        future.set_exception(e)
+
+
+class ActionScheduler:
+    """Dispatches callables to interactive, normal and bulk worker pools"""
+
+    def __init__(self, pools: Optional[Dict[str, Tuple[int, int]]] = None, interactive_grace: float = 0.25):
+        self.pool_config = dict(DEFAULT_POOLS)
+        if pools:
+            self.pool_config.update(pools)
+        # How long lower classes hold back while interactive work is running
+        self.interactive_grace = interactive_grace
+        self.pools = {}
+        self.accepting = True
+        self._interactive_active = 0
+        self._interactive_done = threading.Condition()
+        self._started = False
+        self._start_lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            # Worker threads do not survive fork; each worker process starts its own
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self.pools = {}
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._interactive_active = 0
+        self._interactive_done = threading.Condition()
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            for priority, (workers, queue_limit) in self.pool_config.items():
+                pool = _WorkerPool(self, priority, workers, queue_limit)
+                pool.start()
+                self.pools[priority] = pool
+            self._started = True
+
+    def submit(self, priority: str, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn on the pool for its priority class and return a Future"""
+        if not self.accepting:
+            raise SchedulerFullError("Scheduler is shutting down")
+        self._ensure_started()
+        pool = self.pools.get(priority) or self.pools[PRIORITY_NORMAL]
+        future = Future()
+
+        if pool.priority == PRIORITY_INTERACTIVE:
+            self._enter_interactive()
+            future.add_done_callback(lambda _: self._leave_interactive())
+            if pool.idle_workers() <= 0:
+                # Never make an interactive action queue: run it on the caller's thread
+                _run_into(future, fn, args, kwargs)
+                return future
+
+        try:
+            pool.queue.put_nowait((future, fn, args, kwargs))
+        except queue.Full:
+            if pool.priority == PRIORITY_INTERACTIVE:
+                _run_into(future, fn, args, kwargs)
+                return future
+            raise SchedulerFullError(f"Too many pending {pool.priority} actions, try again shortly")
+        return future
+
+    def run(self, priority: str, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Dict[str, Any]:
+        """Submit fn and wait for its result dict"""
+        try:
+            future = self.submit(priority, fn, *args, **kwargs)
+        except SchedulerFullError as e:
+            return {"success": False, "error": str(e), "retry": True}
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return {
+                "success": False,
+                "error": f"Action is still running after {timeout} seconds and will finish in the background"
+            }
+
+    def drain(self, timeout: float) -> Dict[str, Any]:
+        """Stop accepting actions and wait up to timeout seconds for queued ones to finish"""
+        self.accepting = False
+        deadline = time.monotonic() + timeout
+        pending = 0
+        for pool in self.pools.values():
+            while pool.queue.unfinished_tasks > 0 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            pending += pool.queue.unfinished_tasks
+        for pool in self.pools.values():
+            for _ in pool.threads:
+                try:
+                    pool.queue.put_nowait(None)
+                except queue.Full:
+                    break
+        return {"completed": pending == 0, "pending": pending}
+
+    def wait_for_interactive(self):
+        """Block briefly while interactive actions are in flight"""
+        deadline = time.monotonic() + self.interactive_grace
+        with self._interactive_done:
+            while self._interactive_active > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._interactive_done.wait(remaining)
+
+    def _enter_interactive(self):
+        with self._interactive_done:
+            self._interactive_active += 1
+
+    def _leave_interactive(self):
+        with self._interactive_done:
+            self._interactive_active -= 1
+            if self._interactive_active <= 0:
+                self._interactive_done.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and worker usage per priority class"""
+        return {
+            priority: {
+                "workers": pool.workers,
+                "busy": pool.busy,
+                "queued": pool.queue.qsize(),
+                "queue_limit": pool.queue.maxsize,
+                "completed": pool.completed
+            }
+            for priority, pool in self.pools.items()
+        }
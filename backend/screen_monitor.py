@@ -7,13 +7,15 @@ Integrated with JARVIS API for enhanced functionality
 import os
 import sys
 import time
-import json
 import requests
 import platform
-import subprocess
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
 from threading import Thread, Event
 
+from command_runner import run_command
+from monitor_log import MonitorLog
+
 try:
     import cv2
     import numpy as np
@@ -33,8 +35,33 @@ except ImportError:
     print("Warning: Windows API libraries not installed. Install with: pip install pywin32")
 
 
+_CLOCK_TIME = re.compile(r'^(\d{1,2})(?::(\d{2}))?(?::(\d{2}))?\s*([ap]\.?m\.?)?$', re.IGNORECASE)
+
+
+def parse_time(value):
+    """Epoch seconds from a number, an ISO date/time, or a clock time today such as 14:00 or 2pm"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    match = _CLOCK_TIME.match(text)
+    if match:
+        hour, minute, second, meridiem = match.groups()
+        hour = int(hour)
+        if meridiem:
+            hour = hour % 12 + (12 if meridiem.lower().startswith('p') else 0)
+        moment = datetime.now().replace(hour=hour, minute=int(minute or 0), second=int(second or 0), microsecond=0)
+        return moment.timestamp()
+    return datetime.fromisoformat(text).timestamp()
+
+
 class ScreenMonitor:
-    def __init__(self):
+    def __init__(self, log=None):
         self.is_monitoring = False
         self.monitoring_thread = None
         self.stop_event = Event()
@@ -44,6 +71,15 @@ class ScreenMonitor:
         # Create screenshots directory if it doesn't exist
         if not os.path.exists(self.screenshots_dir):
             os.makedirs(self.screenshots_dir)
+        
+        # Append-only, rotated record storage written by a background thread
+        self.log = log or MonitorLog(os.path.join(self.screenshots_dir, 'monitoring'))
+        legacy_file = os.path.join(self.screenshots_dir, "monitoring_data.json")
+        if os.path.exists(legacy_file):
+            try:
+                self.log.import_json(legacy_file)
+            except Exception as e:
+                print(f"Could not import {legacy_file}: {e}")
     
     def capture_screen(self):
         """Capture current screen"""
@@ -133,26 +169,27 @@ class ScreenMonitor:
                 "error": str(e)
             }
     
-    def execute_command(self, command):
+    def execute_command(self, command, timeout=30, max_bytes=1024 * 1024):
         """Execute system command"""
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            result = run_command(command, timeout=timeout, max_bytes=max_bytes)
+            if result.get('error'):
+                return {
+                    "success": False,
+                    "error": result['error']
+                }
+            if result['timed_out']:
+                return {
+                    "success": False,
+                    "error": "Command timed out",
+                    "stdout": result['stdout']
+                }
             return {
                 "success": True,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "return_code": result.returncode
-            }
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": "Command timed out"
+                "stdout": result['stdout'],
+                "stderr": result['stderr'],
+                "return_code": result['return_code'],
+                "truncated": result['truncated']
             }
         except Exception as e:
             return {
@@ -199,6 +236,7 @@ class ScreenMonitor:
         self.stop_event.set()
         if self.monitoring_thread:
             self.monitoring_thread.join(timeout=2)
+        self.log.flush()
         return "Screen monitoring stopped"
     
     def _monitor_loop(self):
@@ -219,18 +257,8 @@ class ScreenMonitor:
                     "system_info": self.get_system_info()
                 }
                 
-                # Save monitoring data
-                data_file = os.path.join(self.screenshots_dir, "monitoring_data.json")
-                if os.path.exists(data_file):
-                    with open(data_file, 'r') as f:
-                        existing_data = json.load(f)
-                else:
-                    existing_data = []
-                
-                existing_data.append(monitoring_data)
-                
-                with open(data_file, 'w') as f:
-                    json.dump(existing_data, f, indent=2)
+                # Queue for the log writer; the tick never waits on disk
+                self.log.append(monitoring_data)
                 
                 # Wait for next capture
                 for _ in range(self.capture_interval):
@@ -244,16 +272,45 @@ class ScreenMonitor:
     
     def get_latest_monitoring_data(self):
         """Get the latest monitoring data"""
-        data_file = os.path.join(self.screenshots_dir, "monitoring_data.json")
-        if os.path.exists(data_file):
-            try:
-                with open(data_file, 'r') as f:
-                    data = json.load(f)
-                return data[-1] if data else None
-            except Exception as e:
-                print(f"Error reading monitoring data: {e}")
-                return None
-        return None
+        try:
+            return self.log.latest()
+        except Exception as e:
+            print(f"Error reading monitoring data: {e}")
+            return None
+    
+    def get_monitoring_history(self, start=None, end=None, minutes=None, title=None, window_class=None,
+                               app=None, group_by=None, limit=None):
+        """Snapshots between start and end (or the last N minutes), or time per app with group_by='app'"""
+        try:
+            start, end = parse_time(start), parse_time(end)
+            limit = int(limit) if limit not in (None, '') else 1000
+            if minutes is not None and start is None:
+                start = (datetime.now() - timedelta(minutes=float(minutes))).timestamp()
+            if start is not None and end is not None and end <= start:
+                return {"success": False, "error": "end must be after start"}
+            result = {
+                "success": True,
+                "start": datetime.fromtimestamp(start).isoformat() if start is not None else None,
+                "end": datetime.fromtimestamp(end).isoformat() if end is not None else None
+            }
+            if group_by == 'app':
+                # A snapshot counts until the next one, but not across long gaps when monitoring was off
+                apps = self.log.time_per_app(start, end, title, window_class,
+                                             max_gap=max(2 * self.capture_interval, 10))
+                result["apps"] = apps
+                result["message"] = f"Time in {len(apps)} apps"
+            elif group_by:
+                return {"success": False, "error": f"Unknown group_by: {group_by}"}
+            else:
+                snapshots = self.log.query(start, end, title, window_class, app, limit=limit)
+                result["snapshots"] = snapshots
+                result["count"] = len(snapshots)
+                result["message"] = f"{len(snapshots)} snapshots"
+            return result
+        except ValueError as e:
+            return {"success": False, "error": f"Invalid parameter: {e}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
 
 
 def main():
@@ -1,29 +1,208 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response, stream_with_context
 from flask_cors import CORS
 import os
 import requests
 import sys
 import json
 import re
+import base64
 
 # Add parent directory to path to import config if needed
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config import brain_config, ConfigWatcher
+from file_cache import FileCache
+from file_index import FileIndex
+from shared_store import SharedStore
 from system_controller import SystemController
+from uploads import UploadManager
+from shell_sessions import ShellSessionPool
+from duplicates import HashCache
+from disk_usage import UsageCache
+from file_watch import WatchManager
+from trash import TrashManager
+from screen_monitor import ScreenMonitor
+import command_runner
+from scheduler import ActionScheduler, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BULK
+from lifecycle import ShutdownCoordinator
+from jobs import JobManager
 from media_controller import MediaController
 from spotify_controller import SpotifyController
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
 
-# Configuration
-API_KEY = os.getenv("OPENROUTER_API_KEY", "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")
-MODEL = os.getenv("MODEL_NAME", "openrouter/auto")
-
 # Initialize Controllers
-system_controller = SystemController()
-media_controller = MediaController()
-spotify_controller = SpotifyController()
+# Shared across worker processes when running under a pre-forking server
+shared_store = SharedStore(brain_config.SHARED_STORE_PATH) if brain_config.SHARED_STORE_ENABLED else None
+file_cache = FileCache(
+    max_bytes=brain_config.FILE_CACHE_MAX_MB * 1024 * 1024,
+    shared_max_entry_bytes=brain_config.FILE_CACHE_SHARED_MAX_KB * 1024,
+    shared=shared_store
+) if brain_config.FILE_CACHE_ENABLED else None
+file_index = FileIndex(
+    brain_config.FILE_INDEX_PATH,
+    brain_config.get_file_index_roots(),
+    interval=brain_config.FILE_INDEX_INTERVAL,
+    store=shared_store
+) if brain_config.FILE_INDEX_ENABLED else None
+if file_index is not None:
+    file_index.start()
+upload_manager = UploadManager(
+    brain_config.UPLOAD_DIR,
+    ttl=brain_config.UPLOAD_TTL,
+    fsync=brain_config.WRITE_FSYNC
+) if brain_config.UPLOAD_ENABLED else None
+shell_sessions = ShellSessionPool(
+    max_sessions=brain_config.SHELL_SESSION_MAX,
+    idle_timeout=brain_config.SHELL_SESSION_IDLE_TIMEOUT
+) if brain_config.SHELL_SESSIONS_ENABLED else None
+hash_cache = HashCache(brain_config.HASH_CACHE_PATH) if brain_config.HASH_CACHE_ENABLED else None
+usage_cache = UsageCache(brain_config.DISK_USAGE_CACHE_PATH) if brain_config.DISK_USAGE_CACHE_ENABLED else None
+file_watcher = WatchManager(
+    backend=brain_config.WATCH_BACKEND,
+    debounce=brain_config.WATCH_DEBOUNCE_MS / 1000,
+    poll_interval=brain_config.WATCH_POLL_INTERVAL,
+    max_directories=brain_config.WATCH_MAX_DIRECTORIES
+) if brain_config.WATCH_ENABLED else None
+trash_manager = TrashManager(
+    brain_config.TRASH_INDEX_PATH,
+    retention_days=brain_config.TRASH_RETENTION_DAYS,
+    max_bytes=int(brain_config.TRASH_MAX_GB * 1024 ** 3),
+    purge_rate=brain_config.TRASH_PURGE_RATE,
+    interval=brain_config.TRASH_PURGE_INTERVAL,
+    store=shared_store
+) if brain_config.TRASH_ENABLED else None
+if trash_manager is not None:
+    trash_manager.start()
+system_controller = SystemController(cache=file_cache, index=file_index, uploads=upload_manager,
+                                     shells=shell_sessions, hash_cache=hash_cache, usage_cache=usage_cache,
+                                     watcher=file_watcher, trash=trash_manager)
+system_controller.duplicate_workers = brain_config.DUPLICATE_WORKERS
+system_controller.disk_usage_workers = brain_config.DISK_USAGE_WORKERS
+system_controller.archive_workers = brain_config.ARCHIVE_WORKERS
+system_controller.archive_level = brain_config.ARCHIVE_COMPRESSION_LEVEL
+system_controller.write_fsync = brain_config.WRITE_FSYNC
+command_runner.executor.max_concurrent = brain_config.SUBPROCESS_MAX_CONCURRENT
+system_controller.command_timeout = brain_config.COMMAND_TIMEOUT
+system_controller.command_max_bytes = brain_config.COMMAND_MAX_OUTPUT_KB * 1024
+system_controller.read_max_bytes = brain_config.FILE_READ_MAX_MB * 1024 * 1024
+system_controller.search_workers = brain_config.SEARCH_WORKERS
+system_controller.search_max_file_size = brain_config.SEARCH_MAX_FILE_MB * 1024 * 1024
+system_controller.tree_workers = brain_config.get_tree_workers()
+system_controller.default_storage = brain_config.TREE_STORAGE_TYPE
+media_controller = MediaController(store=shared_store)
+media_controller.command_cooldown = brain_config.MEDIA_COMMAND_COOLDOWN
+spotify_controller = SpotifyController(store=shared_store)
+screen_monitor = ScreenMonitor()
+screen_monitor.log.retention_days = brain_config.MONITOR_RETENTION_DAYS
+screen_monitor.log.max_total_bytes = brain_config.MONITOR_MAX_MB * 1024 * 1024
+scheduler = ActionScheduler(pools=brain_config.get_scheduler_config())
+jobs = JobManager(scheduler, store=shared_store)
+lifecycle = ShutdownCoordinator(
+    drain_timeout=brain_config.SHUTDOWN_DRAIN_TIMEOUT,
+    readiness_delay=brain_config.SHUTDOWN_READINESS_DELAY
+)
+lifecycle.register_drain('scheduler', scheduler.drain)
+if file_cache is not None:
+    lifecycle.register_flush('file_cache', file_cache.clear)
+if file_index is not None:
+    lifecycle.register_flush('file_index', file_index.stop)
+if trash_manager is not None:
+    lifecycle.register_flush('trash_purger', trash_manager.stop)
+lifecycle.register_flush('monitor_log', screen_monitor.log.close)
+if file_watcher is not None:
+    lifecycle.register_close('watch_path', file_watcher.close_all)
+if shell_sessions is not None:
+    lifecycle.register_flush('shell_sessions', shell_sessions.close_all)
+
+def apply_config_changes(changed, config):
+    """Push reloaded settings into the live controllers"""
+    if 'FILE_CACHE_MAX_MB' in changed and file_cache is not None:
+        file_cache.resize(config.FILE_CACHE_MAX_MB * 1024 * 1024)
+    if 'FILE_CACHE_SHARED_MAX_KB' in changed and file_cache is not None:
+        file_cache.shared_max_entry_bytes = config.FILE_CACHE_SHARED_MAX_KB * 1024
+    if 'MEDIA_COMMAND_COOLDOWN' in changed:
+        media_controller.command_cooldown = config.MEDIA_COMMAND_COOLDOWN
+    if changed & {'MONITOR_RETENTION_DAYS', 'MONITOR_MAX_MB'}:
+        screen_monitor.log.retention_days = config.MONITOR_RETENTION_DAYS
+        screen_monitor.log.max_total_bytes = config.MONITOR_MAX_MB * 1024 * 1024
+    if shell_sessions is not None and changed & {'SHELL_SESSION_MAX', 'SHELL_SESSION_IDLE_TIMEOUT'}:
+        shell_sessions.max_sessions = config.SHELL_SESSION_MAX
+        shell_sessions.idle_timeout = config.SHELL_SESSION_IDLE_TIMEOUT
+    if 'SUBPROCESS_MAX_CONCURRENT' in changed:
+        command_runner.executor.max_concurrent = config.SUBPROCESS_MAX_CONCURRENT
+    if changed & {'COMMAND_TIMEOUT', 'COMMAND_MAX_OUTPUT_KB'}:
+        system_controller.command_timeout = config.COMMAND_TIMEOUT
+        system_controller.command_max_bytes = config.COMMAND_MAX_OUTPUT_KB * 1024
+    if 'WRITE_FSYNC' in changed:
+        system_controller.write_fsync = config.WRITE_FSYNC
+        if upload_manager is not None:
+            upload_manager.fsync = config.WRITE_FSYNC
+    if 'FILE_READ_MAX_MB' in changed:
+        system_controller.read_max_bytes = config.FILE_READ_MAX_MB * 1024 * 1024
+    if changed & {'SEARCH_WORKERS', 'SEARCH_MAX_FILE_MB'}:
+        system_controller.search_workers = config.SEARCH_WORKERS
+        system_controller.search_max_file_size = config.SEARCH_MAX_FILE_MB * 1024 * 1024
+    if 'DUPLICATE_WORKERS' in changed:
+        system_controller.duplicate_workers = config.DUPLICATE_WORKERS
+    if file_watcher is not None and any(key.startswith('WATCH_') for key in changed):
+        # New subscriptions pick these up; running ones keep their settings
+        file_watcher.debounce = config.WATCH_DEBOUNCE_MS / 1000
+        file_watcher.poll_interval = config.WATCH_POLL_INTERVAL
+        file_watcher.max_directories = config.WATCH_MAX_DIRECTORIES
+    if changed & {'ARCHIVE_WORKERS', 'ARCHIVE_COMPRESSION_LEVEL'}:
+        system_controller.archive_workers = config.ARCHIVE_WORKERS
+        system_controller.archive_level = config.ARCHIVE_COMPRESSION_LEVEL
+    if 'DISK_USAGE_WORKERS' in changed:
+        system_controller.disk_usage_workers = config.DISK_USAGE_WORKERS
+    if trash_manager is not None and any(key.startswith('TRASH_') for key in changed):
+        trash_manager.retention_days = config.TRASH_RETENTION_DAYS
+        trash_manager.max_bytes = int(config.TRASH_MAX_GB * 1024 ** 3)
+        trash_manager.purge_rate = config.TRASH_PURGE_RATE
+        trash_manager.interval = config.TRASH_PURGE_INTERVAL
+    if any(key.startswith('TREE_') for key in changed):
+        system_controller.tree_workers = config.get_tree_workers()
+        system_controller.default_storage = config.TREE_STORAGE_TYPE
+
+# Model, temperature and timeouts are read per request; the rest is pushed here
+brain_config.subscribe(apply_config_changes)
+config_watcher = ConfigWatcher(brain_config)
+if brain_config.CONFIG_WATCH_ENABLED:
+    config_watcher.start()
+lifecycle.register_flush('config_watcher', config_watcher.stop)
+
+# Probes stay reachable while draining so supervisors can watch the shutdown
+UNTRACKED_ENDPOINTS = {'health_check', 'readiness_check'}
+# Event streams stay open indefinitely; they are counted apart and told to close on drain
+STREAM_ENDPOINTS = {'system_stream'}
+
+# Priority class per action; anything not listed runs as normal file work
+ACTION_PRIORITIES = {
+    'music_play': PRIORITY_INTERACTIVE,
+    'music_pause': PRIORITY_INTERACTIVE,
+    'music_next': PRIORITY_INTERACTIVE,
+    'music_previous': PRIORITY_INTERACTIVE,
+    'music_search': PRIORITY_INTERACTIVE,
+    'music_play_song': PRIORITY_INTERACTIVE,
+    'music_current': PRIORITY_INTERACTIVE,
+    'music_volume': PRIORITY_INTERACTIVE,
+    'delete_directory': PRIORITY_BULK,
+    'execute_command': PRIORITY_BULK,
+    'search_content': PRIORITY_BULK,
+    'find_duplicates': PRIORITY_BULK,
+    'disk_usage': PRIORITY_BULK,
+    'copy_tree': PRIORITY_BULK,
+    'move_tree': PRIORITY_BULK,
+    'delete_tree': PRIORITY_BULK,
+    'create_archive': PRIORITY_BULK,
+    'extract_archive': PRIORITY_BULK,
+    'bulk_move': PRIORITY_BULK,
+    'bulk_copy': PRIORITY_BULK,
+    'bulk_rename': PRIORITY_BULK,
+    'bulk_delete': PRIORITY_BULK,
+    'empty_trash': PRIORITY_BULK,
+}
 
 # Determine which music controller to use
 use_spotify_api = spotify_controller.is_available()
@@ -34,16 +213,38 @@ SYSTEM_PROMPT = """You are JARVIS, an advanced AI assistant with system control
 You can perform file operations, system commands, and control music playback. When a user asks you to perform an operation, respond with a JSON object in this exact format:
 
 {
-  "action": "read_file|write_file|delete_file|rename_file|move_file|copy_file|list_directory|create_directory|delete_directory|execute_command|music_play|music_pause|music_next|music_previous|music_search|music_play_song|music_current|music_volume",
+  "action": "read_file|write_file|delete_file|rename_file|move_file|copy_file|list_directory|find_file|search_content|find_duplicates|disk_usage|create_directory|delete_directory|copy_tree|move_tree|delete_tree|bulk_move|bulk_copy|bulk_rename|bulk_delete|create_archive|extract_archive|restore_file|list_trash|empty_trash|monitor_history|execute_command|music_play|music_pause|music_next|music_previous|music_search|music_play_song|music_current|music_volume",
   "params": {
     "file_path": "path/to/file",
     "content": "file content (for write operations)",
+    "head": "read only the first N lines (optional)",
+    "tail": "read only the last N lines, e.g. of a log (optional)",
+    "start_line": "first line to read, with end_line for a line range (optional)",
+    "end_line": "last line to read, inclusive (optional)",
     "new_path": "new/path (for rename/move)",
     "destination": "dest/path (for move/copy)",
+    "background": "true to run a large copy/move as a job with progress (optional; tree actions default to true)",
+    "storage": "ssd|hdd|network, tunes parallel I/O for tree actions (optional)",
     "dir_path": "path/to/directory",
     "command": "system command to execute",
     "query": "search query for music",
-    "volume": "volume level 0-100"
+    "volume": "volume level 0-100",
+    "page_size": "max items to list (optional)",
+    "sort_by": "name|size|modified|type (optional)",
+    "pattern": "glob filter such as *.pdf (optional); for bulk actions the files to act on, ** matches subfolders",
+    "template": "new name for bulk_rename using {name}, {stem}, {ext}, {n}, {date}, {parent}, e.g. {date}_{name}",
+    "filters": "bulk action filters: extensions, min_size, max_size, older_than_days, newer_than_days, exclude (optional)",
+    "dry_run": "true to list what a bulk action would do without changing anything (optional)",
+    "sources": "files or folders to pack for create_archive; destination is the archive path ending in .zip, .tar, .tar.gz or .tar.zst",
+    "min_size": "ignore files smaller than this many bytes when finding duplicates (optional)",
+    "refresh": "true to re-list every directory instead of reusing cached sizes for disk_usage (optional)",
+    "permanent": "true to skip the trash for delete_file/delete_directory/bulk_delete; only when the user says permanently (optional)",
+    "trash_id": "id of a trashed item for restore_file/empty_trash; restore_file can use file_path (the original location) instead",
+    "start": "start of a monitor_history range: a clock time today such as 14:00 or 2pm, or an ISO date/time",
+    "end": "end of a monitor_history range, same formats as start (optional)",
+    "minutes": "monitor_history for the last N minutes instead of start/end (optional)",
+    "group_by": "app to total the time spent per app in monitor_history (optional)",
+    "limit": "most snapshots monitor_history returns, default 200 (optional)"
   },
   "response": "A friendly confirmation message to the user in their language (Hindi/English)"
 }
@@ -60,6 +261,14 @@ Path Guidelines:
 - Example: "Create yash.py on desktop" -> {"action": "write_file", "params": {"file_path": "Desktop/yash.py", "content": "..."}, "response": "Creating yash.py on your Desktop."}
 
 File Operation Examples:
+- "Which file in Documents mentions invoice?" → {"action": "search_content", "params": {"dir_path": "Documents", "pattern": "invoice"}, "response": "Searching your Documents for invoice."}
+- "Find duplicate files in my Downloads" → {"action": "find_duplicates", "params": {"dir_path": "~/Downloads"}, "response": "Looking for duplicate files in Downloads."}
+- "What is eating up my disk space?" → {"action": "disk_usage", "params": {"dir_path": "~"}, "response": "Checking which folders take the most space."}
+- "Move all PDFs from Downloads to Documents" → {"action": "bulk_move", "params": {"dir_path": "~/Downloads", "pattern": "*.pdf", "destination": "~/Documents"}, "response": "Moving your PDFs from Downloads to Documents."}
+- "Zip my project folder" → {"action": "create_archive", "params": {"sources": ["~/project"], "destination": "~/project.zip"}, "response": "Packing your project folder into project.zip."}
+- "Undo that delete" / "Restore report.docx" → {"action": "restore_file", "params": {"file_path": "Documents/report.docx"}, "response": "Restoring report.docx from the trash."}
+- "What was I doing between 2 and 3 pm?" → {"action": "monitor_history", "params": {"start": "14:00", "end": "15:00", "group_by": "app"}, "response": "Checking which apps you used between 2 and 3 pm."}
+- "Where is my resume?" → {"action": "find_file", "params": {"query": "resume"}, "response": "Searching your folders for resume."}
 - "Read the file test.txt" → {"action": "read_file", "params": {"file_path": "test.txt"}, "response": "Reading test.txt for you now."}
 - "test.txt फ़ाइल पढ़ो" → {"action": "read_file", "params": {"file_path": "test.txt"}, "response": "मैं आपके लिए test.txt फ़ाइल पढ़ रहा हूँ।"}
 
@@ -74,8 +283,10 @@ Be helpful, precise, and have a slightly robotic but friendly personality (Hindi
 def call_ai(user_input, context_messages=None):
     """Call the AI API"""
     try:
+        # Read per call so a reloaded config applies to the next message
+        api_config = brain_config.get_api_config()
         headers = {
-            "Authorization": f"Bearer {API_KEY}",
+            "Authorization": f"Bearer {api_config['api_key']}",
             "Content-Type": "application/json"
         }
         
@@ -85,15 +296,18 @@ def call_ai(user_input, context_messages=None):
         messages.append({"role": "user", "content": user_input})
         
         payload = {
-            "model": MODEL,
-            "messages": messages
+            "model": api_config['model'],
+            "messages": messages,
+            "temperature": api_config['temperature'],
+            "max_tokens": api_config['max_tokens'],
+            "top_p": api_config['top_p']
         }
         
         response = requests.post(
             "https://openrouter.ai/api/v1/chat/completions",
             headers=headers,
             json=payload,
-            timeout=30
+            timeout=api_config['timeout']
         )
         
         if response.status_code == 200:
@@ -122,6 +336,49 @@ def parse_ai_response(ai_response):
         return None
 
 def execute_system_command(command_data):
+    """Execute a system command on the worker pool for its priority class"""
+    priority = ACTION_PRIORITIES.get(command_data.get('action'), PRIORITY_NORMAL)
+    return scheduler.run(priority, _dispatch_action, command_data, timeout=brain_config.ACTION_TIMEOUT)
+
+def _flag(params, key, default=False):
+    """Strict boolean param: only True, "true", "1" and "yes" turn a flag on"""
+    value = params.get(key)
+    if value is None or value == '':
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
+    return value is True or value == 1
+
+def _search_content_args(params):
+    return {
+        "dir_path": params.get('dir_path', ''),
+        "pattern": params.get('pattern') or params.get('query', ''),
+        "regex": _flag(params, 'regex'),
+        "case_sensitive": _flag(params, 'case_sensitive'),
+        "file_pattern": params.get('file_pattern'),
+        "max_results": int(params.get('max_results', 100))
+    }
+
+def _read_file_args(params):
+    args = {"file_path": params.get('file_path', '')}
+    for key in ('offset', 'length', 'head', 'tail', 'start_line', 'end_line'):
+        if params.get(key) is not None:
+            args[key] = int(params[key])
+    return args
+
+# Actions that can stream partial results over /system/stream
+STREAMING_ACTIONS = {
+    'read_file': lambda params: system_controller.iter_file_chunks(**_read_file_args(params)),
+    'execute_command': lambda params: system_controller.iter_command(
+        params.get('command', ''), float(params['timeout']) if params.get('timeout') else None),
+    'search_content': lambda params: system_controller.iter_content_matches(**_search_content_args(params)),
+    'watch_path': lambda params: system_controller.iter_watch(
+        params.get('dir_path', ''),
+        recursive=_flag(params, 'recursive', True),
+        debounce=float(params['debounce_ms']) / 1000 if params.get('debounce_ms') is not None else None),
+}
+
+def _dispatch_action(command_data):
     """Execute a system command based on parsed data"""
     action = command_data.get('action')
     params = command_data.get('params', {})
@@ -131,37 +388,150 @@ def execute_system_command(command_data):
     try:
         # File operations
         if action == 'read_file':
-            return system_controller.read_file(params.get('file_path', ''))
+            try:
+                args = _read_file_args(params)
+            except (TypeError, ValueError) as e:
+                return {"success": False, "error": f"Invalid parameter: {e}"}
+            return system_controller.read_file(**args)
         elif action == 'write_file':
             return system_controller.write_file(
                 params.get('file_path', ''),
                 params.get('content', '')
             )
         elif action == 'delete_file':
-            return system_controller.delete_file(params.get('file_path', ''))
+            return system_controller.delete_file(params.get('file_path', ''), _flag(params, 'permanent'))
         elif action == 'rename_file':
             return system_controller.rename_file(
                 params.get('file_path', ''),
                 params.get('new_path', '')
             )
         elif action == 'move_file':
-            return system_controller.move_file(
-                params.get('file_path', ''),
-                params.get('destination', '')
-            )
+            source, destination = params.get('file_path', ''), params.get('destination', '')
+            if _flag(params, 'background'):
+                return jobs.submit(action, lambda job: system_controller.move_file(
+                    source, destination, progress=job.report_bytes, cancel=job.cancel_event), params)
+            return system_controller.move_file(source, destination)
         elif action == 'copy_file':
-            return system_controller.copy_file(
-                params.get('file_path', ''),
-                params.get('destination', '')
-            )
+            source, destination = params.get('file_path', ''), params.get('destination', '')
+            resume = _flag(params, 'resume', True)
+            if _flag(params, 'background'):
+                return jobs.submit(action, lambda job: system_controller.copy_file(
+                    source, destination, progress=job.report_bytes, cancel=job.cancel_event, resume=resume), params)
+            return system_controller.copy_file(source, destination, resume=resume)
         elif action == 'list_directory':
-            return system_controller.list_directory(params.get('dir_path', ''))
+            return system_controller.list_directory(
+                params.get('dir_path', ''),
+                page_size=int(params['page_size']) if params.get('page_size') else None,
+                cursor=params.get('cursor'),
+                sort_by=params.get('sort_by', 'name'),
+                descending=_flag(params, 'descending'),
+                pattern=params.get('pattern'),
+                extensions=params.get('extensions'),
+                include_hidden=_flag(params, 'include_hidden', True)
+            )
+        elif action == 'find_file':
+            return system_controller.find_file(
+                params.get('query', ''),
+                limit=int(params.get('limit', 20)),
+                extensions=params.get('extensions')
+            )
+        elif action == 'search_content':
+            return system_controller.search_content(**_search_content_args(params))
         elif action == 'create_directory':
             return system_controller.create_directory(params.get('dir_path', ''))
         elif action == 'delete_directory':
-            return system_controller.delete_directory(params.get('dir_path', ''))
+            return system_controller.delete_directory(params.get('dir_path', ''), _flag(params, 'permanent'))
+        elif action == 'restore_file':
+            return system_controller.restore_file(
+                params.get('trash_id'),
+                params.get('file_path') or params.get('dir_path'),
+                params.get('destination')
+            )
+        elif action == 'monitor_history':
+            return screen_monitor.get_monitoring_history(
+                start=params.get('start'),
+                end=params.get('end'),
+                minutes=params.get('minutes'),
+                title=params.get('title'),
+                window_class=params.get('window_class'),
+                app=params.get('app'),
+                group_by=params.get('group_by'),
+                limit=int(params.get('limit') or 200)
+            )
+        elif action == 'list_trash':
+            return system_controller.list_trash(int(params.get('page_size', 100)))
+        elif action == 'empty_trash':
+            return system_controller.empty_trash(params.get('trash_id'))
+        elif action in ('copy_tree', 'move_tree'):
+            source, destination = params.get('dir_path', ''), params.get('destination', '')
+            operation = getattr(system_controller, action)
+            storage = params.get('storage')
+            if _flag(params, 'background', True):
+                return jobs.submit(action, lambda job: operation(
+                    source, destination, storage, progress=lambda p: job.report(**p), cancel=job.cancel_event), params)
+            return operation(source, destination, storage)
+        elif action == 'delete_tree':
+            dir_path, storage = params.get('dir_path', ''), params.get('storage')
+            if _flag(params, 'background', True):
+                return jobs.submit(action, lambda job: system_controller.delete_tree(
+                    dir_path, storage, progress=lambda p: job.report(**p), cancel=job.cancel_event), params)
+            return system_controller.delete_tree(dir_path, storage)
+        elif action == 'create_archive':
+            sources = params.get('sources') or params.get('dir_path') or params.get('file_path', '')
+            destination, fmt = params.get('destination', ''), params.get('format')
+            if _flag(params, 'background', True):
+                return jobs.submit(action, lambda job: system_controller.create_archive(
+                    sources, destination, fmt, progress=lambda p: job.report(**p), cancel=job.cancel_event), params)
+            return system_controller.create_archive(sources, destination, fmt)
+        elif action == 'extract_archive':
+            archive, destination = params.get('file_path', ''), params.get('destination')
+            overwrite = _flag(params, 'overwrite')
+            if _flag(params, 'background', True):
+                return jobs.submit(action, lambda job: system_controller.extract_archive(
+                    archive, destination, overwrite, progress=lambda p: job.report(**p), cancel=job.cancel_event), params)
+            return system_controller.extract_archive(archive, destination, overwrite)
+        elif action in ('bulk_move', 'bulk_copy', 'bulk_rename', 'bulk_delete'):
+            options = {
+                "dir_path": params.get('dir_path'),
+                "destination": params.get('destination'),
+                "template": params.get('template'),
+                "filters": params.get('filters'),
+                "dry_run": _flag(params, 'dry_run'),
+                "overwrite": _flag(params, 'overwrite'),
+                "storage": params.get('storage'),
+                "permanent": _flag(params, 'permanent')
+            }
+            operation, pattern = action[len('bulk_'):], params.get('pattern', '*')
+            if _flag(params, 'background'):
+                return jobs.submit(action, lambda job: system_controller.bulk_files(
+                    operation, pattern, **options, progress=lambda p: job.report(**p), cancel=job.cancel_event), params)
+            return system_controller.bulk_files(operation, pattern, **options)
+        elif action == 'find_duplicates':
+            dir_path = params.get('dir_path', '')
+            options = {
+                "min_size": int(params.get('min_size', 1)),
+                "extensions": params.get('extensions'),
+                "max_groups": int(params.get('max_groups', 50))
+            }
+            if _flag(params, 'background'):
+                return jobs.submit(action, lambda job: system_controller.find_duplicates(
+                    dir_path, **options, progress=lambda p: job.report(**p), cancel=job.cancel_event), params)
+            return system_controller.find_duplicates(dir_path, **options)
+        elif action == 'disk_usage':
+            dir_path = params.get('dir_path', '')
+            options = {"top": int(params.get('top', 20)), "refresh": _flag(params, 'refresh')}
+            if _flag(params, 'background'):
+                return jobs.submit(action, lambda job: system_controller.disk_usage(
+                    dir_path, **options, progress=lambda p: job.report(**p), cancel=job.cancel_event), params)
+            return system_controller.disk_usage(dir_path, **options)
         elif action == 'execute_command':
-            return system_controller.execute_command(params.get('command', ''))
+            command, timeout, session = params.get('command', ''), params.get('timeout'), params.get('session')
+            timeout = float(timeout) if timeout else None
+            if _flag(params, 'background'):
+                return jobs.submit(action, lambda job: system_controller.execute_command(
+                    command, timeout, cancel=job.cancel_event,
+                    on_output=lambda item: job.report(last_line=item['line']), session=session), params)
+            return system_controller.execute_command(command, timeout, session=session)
         
         # Music operations
         elif action == 'music_play':
@@ -191,14 +561,48 @@ def execute_system_command(command_data):
         print(f"DEBUG: Execution Error: {e}")
         return {"success": False, "error": f"Execution error: {str(e)}"}
 
+@app.before_request
+def track_request():
+    g.tracked = False
+    g.streaming = False
+    if request.endpoint in UNTRACKED_ENDPOINTS:
+        return None
+    started = lifecycle.stream_started() if request.endpoint in STREAM_ENDPOINTS else lifecycle.request_started()
+    if not started:
+        response = jsonify({"error": "Server is shutting down", "reply": "JARVIS is restarting, please try again in a moment."})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    if request.endpoint in STREAM_ENDPOINTS:
+        g.streaming = True
+    else:
+        g.tracked = True
+    return None
+
+@app.teardown_request
+def finish_request(exc):
+    if g.pop('tracked', False):
+        lifecycle.request_finished()
+    if g.pop('streaming', False):
+        lifecycle.stream_finished()
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "online", "system": "JARVIS API"})
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: turns 503 as soon as shutdown begins"""
+    if not lifecycle.ready:
+        return jsonify({"ready": False, "in_flight": lifecycle.in_flight()}), 503
+    return jsonify({"ready": True})
+
 @app.route('/chat', methods=['POST'])
 def chat():
     data = request.json
     user_input = data.get('message', '')
+    # Commands of one conversation share a shell, so "cd" carries over
+    conversation_id = data.get('conversation_id')
     
     if not user_input:
         return jsonify({"error": "No message provided"}), 400
@@ -219,6 +623,8 @@ def chat():
         command_data = parse_ai_response(ai_response)
         
         if command_data:
+            if command_data['action'] == 'execute_command' and conversation_id:
+                command_data.setdefault('params', {}).setdefault('session', str(conversation_id))
             # Execute the system command
             result = execute_system_command(command_data)
             
@@ -231,9 +637,40 @@ def chat():
                     response_text += f"\n\nFile contents:\n{result['content']}"
                 elif command_data['action'] == 'list_directory' and 'items' in result:
                     items_text = "\n".join([f"- {item['name']} ({item['type']})" for item in result['items'][:20]])
-                    response_text += f"\n\nFound {result['count']} items:\n{items_text}"
-                    if result['count'] > 20:
-                        response_text += f"\n... and {result['count'] - 20} more items"
+                    total = result.get('total', result['count'])
+                    response_text += f"\n\nFound {total} items:\n{items_text}"
+                    if total > 20:
+                        response_text += f"\n... and {total - 20} more items"
+                elif command_data['action'] == 'search_content' and result.get('matches'):
+                    matches_text = "\n".join([f"- {m['path']}:{m['line']}: {m['text'].strip()}" for m in result['matches'][:20]])
+                    response_text += f"\n\n{result['message']}:\n{matches_text}"
+                elif command_data['action'] == 'find_duplicates' and result.get('groups'):
+                    groups_text = "\n".join([f"- {group['count']} copies of {os.path.basename(group['paths'][0])} "
+                                              f"({group['size']} bytes): {', '.join(group['paths'][:3])}"
+                                              for group in result['groups'][:10]])
+                    response_text += f"\n\n{result['message']}:\n{groups_text}"
+                elif command_data['action'].startswith('bulk_') and result.get('plan'):
+                    plan_text = "\n".join([f"- {item['source']}" + (f" → {item['target']}" if item.get('target') else "")
+                                            for item in result['plan'][:20]])
+                    response_text += f"\n\n{result['message']}:\n{plan_text}"
+                    if result['planned'] > 20:
+                        response_text += f"\n... and {result['planned'] - 20} more files"
+                elif command_data['action'] == 'disk_usage' and result.get('children'):
+                    children_text = "\n".join([f"- {os.path.basename(child['path'])}: "
+                                                f"{child['bytes'] / (1024 * 1024):.1f} MB ({child['files']} files)"
+                                                for child in result['children'][:15]])
+                    response_text += f"\n\n{result['message']}:\n{children_text}"
+                elif command_data['action'] == 'monitor_history' and result.get('apps'):
+                    apps_text = "\n".join([f"- {entry['app']}: {entry['seconds'] / 60:.0f} min"
+                                            for entry in result['apps'][:10]])
+                    response_text += f"\n\n{result['message']}:\n{apps_text}"
+                elif command_data['action'] == 'list_trash' and result.get('items'):
+                    items_text = "\n".join([f"- {item['original_path']} ({item['kind']}, id {item['id']})"
+                                             for item in result['items'][:20]])
+                    response_text += f"\n\n{result['count']} items in the trash:\n{items_text}"
+                elif command_data['action'] == 'find_file' and result.get('matches'):
+                    matches_text = "\n".join([f"- {match['path']}" for match in result['matches'][:20]])
+                    response_text += f"\n\nFound {result['count']} files:\n{matches_text}"
                 elif 'message' in result:
                     response_text += f"\n{result['message']}"
                 
@@ -260,6 +697,22 @@ def chat():
             "reply": "An internal system error occurred."
         }), 500
 
+@app.route('/system/config/reload', methods=['POST'])
+def config_reload():
+    """Reload .env immediately instead of waiting for the watcher"""
+    result = brain_config.reload()
+    return jsonify(result), (200 if result['success'] else 400)
+
+@app.route('/system/scheduler', methods=['GET'])
+def scheduler_stats():
+    """Queue depth and worker usage per priority class"""
+    return jsonify(scheduler.stats())
+
+@app.route('/system/processes', methods=['GET'])
+def process_stats():
+    """Child process concurrency, outcomes, queue time and spawn latency"""
+    return jsonify(command_runner.executor.stats())
+
 @app.route('/system/execute', methods=['POST'])
 def system_execute():
     """Direct system command execution endpoint"""
@@ -276,7 +729,149 @@ def system_execute():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Recent background jobs, newest first"""
+    return jsonify({"jobs": jobs.list()})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status and progress of one background job"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    result = jobs.cancel(job_id)
+    return jsonify(result), (200 if result['success'] else 404 if result['error'] == 'Job not found' else 409)
+
+@app.route('/system/watches', methods=['GET'])
+def list_watches():
+    """Active watch_path subscriptions in this worker process"""
+    if file_watcher is None:
+        return jsonify({"backend": None, "subscriptions": [], "watched_directories": 0})
+    return jsonify(file_watcher.stats())
+
+@app.route('/monitor/history', methods=['GET'])
+def monitor_history():
+    """Indexed monitoring snapshots in a time range: ?start=&end=|minutes=&title=&class=&app=&group_by=app&limit="""
+    args = request.args
+    result = screen_monitor.get_monitoring_history(
+        start=args.get('start'),
+        end=args.get('end'),
+        minutes=args.get('minutes'),
+        title=args.get('title'),
+        window_class=args.get('class'),
+        app=args.get('app'),
+        group_by=args.get('group_by'),
+        limit=args.get('limit')
+    )
+    return jsonify(result), (200 if result['success'] else 400)
+
+@app.route('/system/sessions', methods=['GET'])
+def list_shell_sessions():
+    """Shell sessions open in this worker process"""
+    return jsonify({"sessions": shell_sessions.list() if shell_sessions is not None else []})
+
+@app.route('/system/sessions/<session_id>', methods=['DELETE'])
+def close_shell_session(session_id):
+    if shell_sessions is None or not shell_sessions.close(session_id):
+        return jsonify({"success": False, "error": "Session not found"}), 404
+    return jsonify({"success": True, "message": "Session closed", "session": session_id})
+
+def _upload_response(result):
+    if result['success']:
+        return jsonify(result)
+    if result['error'] == 'Upload session not found':
+        return jsonify(result), 404
+    return jsonify(result), (409 if 'size' in result else 400)
+
+@app.route('/files/upload', methods=['POST'])
+def begin_upload():
+    """Start a chunked write: {"file_path": ..., "mode": "w"|"a"}"""
+    data = request.json or {}
+    return _upload_response(system_controller.begin_upload(data.get('file_path', ''), data.get('mode', 'w')))
+
+@app.route('/files/upload/<upload_id>', methods=['POST'])
+def append_upload(upload_id):
+    """Append a chunk, either a raw request body or {"content", "encoding": "utf-8"|"base64", "offset"}"""
+    try:
+        if request.is_json:
+            data = request.json
+            content = data.get('content', '')
+            if data.get('encoding') == 'base64':
+                content = base64.b64decode(content, validate=True)
+            offset = data.get('offset')
+        else:
+            content = request.get_data()
+            offset = request.args.get('offset')
+        offset = int(offset) if offset not in (None, '') else None
+    except (TypeError, ValueError) as e:
+        # binascii.Error from bad base64 is a ValueError too
+        return jsonify({"success": False, "error": f"Invalid upload chunk: {e}"}), 400
+    return _upload_response(system_controller.append_upload(upload_id, content, offset))
+
+@app.route('/files/upload/<upload_id>/commit', methods=['POST'])
+def commit_upload(upload_id):
+    """Put the uploaded content in place; {"size": n} guards against missing chunks"""
+    data = request.get_json(silent=True) or {}
+    return _upload_response(system_controller.commit_upload(upload_id, data.get('size')))
+
+@app.route('/files/upload/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    return _upload_response(system_controller.abort_upload(upload_id))
+
+@app.route('/system/stream', methods=['POST'])
+def system_stream():
+    """Run a streaming action and send each partial result as a server-sent event"""
+    data = request.json
+    action = data.get('action')
+    params = data.get('params', {})
+    
+    if action not in STREAMING_ACTIONS:
+        return jsonify({"error": f"Action cannot be streamed: {action}"}), 400
+    
+    try:
+        # Params are parsed here so a bad one is a 400 rather than an error mid-stream
+        items = STREAMING_ACTIONS[action](params)
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": f"Invalid parameter: {e}"}), 400
+    
+    def generate():
+        try:
+            for item in items:
+                yield f"data: {json.dumps(item)}\n\n"
+                if lifecycle.closing.is_set():
+                    yield "event: shutdown\ndata: {}\n\n"
+                    break
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'success': False, 'error': str(e)})}\n\n"
+        finally:
+            # A client that disconnects closes the source too, e.g. killing a streamed command
+            items.close()
+        yield "event: done\ndata: {}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+def create_app():
+    """App factory for pre-forking servers, e.g. gunicorn -c gunicorn.conf.py "server:create_app()"
+
+    Controllers, Spotify auth and the shared store are built when this module is
+    imported, so with preload_app they are set up once in the parent and inherited
+    by every worker. Worker threads and SQLite connections are recreated per process.
+    """
+    return app
+
 if __name__ == '__main__':
+    from werkzeug.serving import make_server
+
     print("Starting JARVIS Backend Server on port 5000...")
     print("System Control: ENABLED")
-    app.run(host='0.0.0.0', port=5000)
+    http_server = make_server('0.0.0.0', 5000, app, threaded=True)
+    # serve_forever returns once the drain thread calls shutdown()
+    lifecycle.install_signal_handlers(http_server.shutdown)
+    http_server.serve_forever()
+    lifecycle.finished.wait(timeout=brain_config.SHUTDOWN_DRAIN_TIMEOUT)
+
@@ -0,0 +1,319 @@
+"""
+Shell Sessions Module
+Long-lived shells for execute_command, one per conversation
+Commands are written to a running shell and framed by a random sentinel, so
+bursts skip process start-up and cd/set/export carry over between commands;
+idle sessions are evicted and a timed-out command takes its shell with it
+Each command holds a slot of the shared ProcessExecutor's cap while it runs
+Sessions live in the worker process that created them
+"""
+
+import os
+import queue
+import shlex
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from command_runner import DEFAULT_MAX_BYTES, DEFAULT_TIMEOUT, MAX_LINE_BYTES, READ_BLOCK, \
+    OutputCallback, ProcessExecutor, executor as shared_executor, kill_process_tree
+
+
+def default_shell() -> List[str]:
+    if os.name == 'nt':
+        # /Q turns echo off, which also hides the prompt; /D skips AutoRun commands
+        return [os.environ.get('COMSPEC', 'cmd.exe'), '/Q', '/D']
+    return [shutil.which('bash') or '/bin/sh']
+
+
+def _pump(pipe, name: str, chunks: 'queue.Queue'):
+    fd = pipe.fileno()
+    try:
+        while True:
+            block = os.read(fd, READ_BLOCK)
+            if not block:
+                break
+            chunks.put((name, block))
+    except (OSError, ValueError):
+        pass
+    finally:
+        chunks.put((name, None))
+
+
+class ShellSession:
+    """One shell process that runs commands one at a time"""
+
+    def __init__(self, session_id: str, shell: Optional[List[str]] = None, cwd: Optional[str] = None,
+                 env: Optional[Dict[str, str]] = None):
+        self.id = session_id
+        self.shell = shell or default_shell()
+        self.cwd = os.path.abspath(cwd or os.getcwd())
+        self.created = self.last_used = time.time()
+        self.commands = 0
+        self.lock = threading.Lock()
+        kwargs = {}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True
+        self.proc = subprocess.Popen(
+            self.shell,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.cwd,
+            env={**os.environ, **env} if env else None,
+            **kwargs
+        )
+        self._chunks: 'queue.Queue' = queue.Queue()
+        self._pending = {'stdout': b'', 'stderr': b''}
+        for name, pipe in (('stdout', self.proc.stdout), ('stderr', self.proc.stderr)):
+            threading.Thread(target=_pump, args=(pipe, name, self._chunks),
+                             name=f"jarvis-shell-{name}", daemon=True).start()
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    @property
+    def busy(self) -> bool:
+        return self.lock.locked()
+
+    def close(self):
+        kill_process_tree(self.proc)
+        for pipe in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def _frame(self, command: str, marker: str) -> bytes:
+        """The command followed by sentinels reporting exit status and cwd on stdout and stderr"""
+        if os.name == 'nt':
+            script = (f"{command} <NUL\r\n"
+                      f"echo {marker} %errorlevel% %cd%\r\n"
+                      f"echo {marker} 1>&2\r\n")
+        else:
+            # eval keeps a syntax error inside the command from ending the shell;
+            # </dev/null keeps the command from reading the framing that follows
+            script = (f"eval {shlex.quote(command)} </dev/null\n"
+                      f"printf '%s %d %s\\n' '{marker}' \"$?\" \"$PWD\"\n"
+                      f"printf '%s\\n' '{marker}' >&2\n")
+        return script.encode('utf-8')
+
+    def run(self, command: str, timeout: float = DEFAULT_TIMEOUT, max_bytes: int = DEFAULT_MAX_BYTES,
+            cancel: Optional[threading.Event] = None, on_output: Optional[OutputCallback] = None) -> Dict[str, Any]:
+        """Run one command; callers hold self.lock"""
+        marker = f"__JARVIS_{uuid.uuid4().hex}__"
+        marker_bytes = marker.encode('ascii')
+        output = {"stdout": [], "stderr": []}
+        finished = {"stdout": False, "stderr": False}
+        return_code = None
+        emitted = dropped = 0
+        timed_out = cancelled = False
+        self.last_used = time.time()
+        self.commands += 1
+
+        try:
+            self.proc.stdin.write(self._frame(command, marker))
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            self.close()
+            output['stderr'].append(f"Shell session ended: {e}")
+            finished = {"stdout": True, "stderr": True}
+
+        deadline = time.monotonic() + timeout if timeout else None
+        while not all(finished.values()):
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                timed_out = True
+                break
+            try:
+                name, block = self._chunks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if block is None:
+                # The shell exited, e.g. the command ran `exit`
+                finished[name] = True
+                continue
+            data = self._pending[name] + block
+            lines = data.split(b'\n')
+            self._pending[name] = lines.pop()
+            for index, raw in enumerate(lines):
+                if finished[name]:
+                    # Output after the sentinel (a stray background job) waits for the next command
+                    self._pending[name] = b'\n'.join(lines[index:] + [self._pending[name]])
+                    break
+                position = raw.find(marker_bytes)
+                if position != -1:
+                    finished[name] = True
+                    if name == 'stdout':
+                        fields = raw[position + len(marker_bytes):].decode('utf-8', errors='replace').strip()
+                        code, _, cwd = fields.partition(' ')
+                        return_code = int(code) if code.lstrip('-').isdigit() else None
+                        self.cwd = cwd or self.cwd
+                    raw = raw[:position]
+                    if not raw:
+                        continue
+                for start in range(0, max(len(raw), 1), MAX_LINE_BYTES):
+                    piece = raw[start:start + MAX_LINE_BYTES]
+                    if emitted + len(piece) + 1 > max_bytes:
+                        dropped += len(piece) + 1
+                        continue
+                    emitted += len(piece) + 1
+                    item = {"stream": name, "line": piece.decode('utf-8', errors='replace').rstrip('\r')}
+                    output[name].append(item['line'])
+                    if on_output:
+                        on_output(item)
+
+        if timed_out or cancelled:
+            # The shell is still busy with the command; only killing it stops the command
+            self.close()
+        elif return_code is None:
+            # Both pipes closed without a sentinel: the command ended the shell
+            try:
+                return_code = self.proc.wait(2)
+            except subprocess.TimeoutExpired:
+                self.close()
+        self.last_used = time.time()
+        if dropped:
+            output['stderr'].append(f"[output truncated: {dropped} more bytes not shown]")
+        return {
+            "stdout": ''.join(line + '\n' for line in output['stdout']),
+            "stderr": ''.join(line + '\n' for line in output['stderr']),
+            "return_code": return_code if return_code is not None else self.proc.poll(),
+            "timed_out": timed_out,
+            "cancelled": cancelled,
+            "truncated": bool(dropped),
+            "cwd": self.cwd,
+            "session_ended": not self.alive
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session": self.id,
+            "cwd": self.cwd,
+            "pid": self.proc.pid,
+            "commands": self.commands,
+            "busy": self.busy,
+            "created": self.created,
+            "last_used": self.last_used
+        }
+
+
+class ShellSessionPool:
+    """Shell sessions keyed by conversation, capped in number and evicted when idle"""
+
+    def __init__(self, max_sessions: int = 8, idle_timeout: float = 600, shell: Optional[List[str]] = None,
+                 executor: Optional[ProcessExecutor] = None):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.shell = shell
+        # Commands count against the same global cap as every other child process
+        self.executor = executor or shared_executor
+        self.sessions: 'OrderedDict[str, ShellSession]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper = None
+        self._stop = threading.Event()
+        if hasattr(os, 'register_at_fork'):
+            # Shells and the reaper belong to the process that started them
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self.sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper = None
+        self._stop = threading.Event()
+
+    def _ensure_reaper(self):
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._reaper = threading.Thread(target=self._reap_loop, name="jarvis-shell-reaper")
+        self._reaper.daemon = True
+        self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._stop.wait(max(1.0, min(60.0, self.idle_timeout / 2))):
+            self.evict_idle()
+
+    def get(self, session_id: str, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> ShellSession:
+        """Return the live session for session_id, starting one if needed"""
+        evicted = []
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is not None and not session.alive:
+                # Restart a shell that exited or was killed where the old one left off
+                cwd = cwd or session.cwd
+                del self.sessions[session_id]
+                session = None
+            if session is None:
+                session = ShellSession(session_id, self.shell, cwd, env)
+                self.sessions[session_id] = session
+                # Make room by closing the least recently used idle sessions
+                for other_id, other in list(self.sessions.items()):
+                    if len(self.sessions) <= self.max_sessions:
+                        break
+                    if other_id != session_id and not other.busy:
+                        evicted.append(self.sessions.pop(other_id))
+            self.sessions.move_to_end(session_id)
+            self._ensure_reaper()
+        for other in evicted:
+            other.close()
+        return session
+
+    def run(self, session_id: str, command: str, timeout: float = DEFAULT_TIMEOUT,
+            max_bytes: int = DEFAULT_MAX_BYTES, cancel: Optional[threading.Event] = None,
+            on_output: Optional[OutputCallback] = None, cwd: Optional[str] = None) -> Dict[str, Any]:
+        """Run command in the session's shell; commands of one session run one after another"""
+        session = self.get(session_id, cwd)
+        with session.lock:
+            submitted = time.monotonic()
+            state = self.executor.acquire(timeout, cancel)
+            if state != 'acquired':
+                # Queued behind the cap until the deadline or a cancel; the shell never saw the command
+                return {"stdout": "", "stderr": "", "return_code": None, "timed_out": state == 'timed_out',
+                        "cancelled": state == 'cancelled', "truncated": False, "cwd": session.cwd,
+                        "session_ended": False, "session": session_id}
+            try:
+                remaining = max(0.001, timeout - (time.monotonic() - submitted)) if timeout else timeout
+                result = session.run(command, remaining, max_bytes, cancel, on_output)
+            finally:
+                self.executor.release()
+        return {**result, "session": session_id}
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def evict_idle(self) -> int:
+        """Close sessions unused for longer than idle_timeout"""
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            idle = [sid for sid, s in self.sessions.items()
+                    if not s.busy and (s.last_used < cutoff or not s.alive)]
+            closing = [self.sessions.pop(sid) for sid in idle]
+        for session in closing:
+            session.close()
+        return len(closing)
+
+    def close_all(self):
+        self._stop.set()
+        with self._lock:
+            closing = list(self.sessions.values())
+            self.sessions.clear()
+        for session in closing:
+            session.close()
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [session.to_dict() for session in reversed(self.sessions.values())]
@@ -1,14 +1,31 @@
 import spotipy
+from spotipy.cache_handler import CacheHandler
 from spotipy.oauth2 import SpotifyOAuth
 import os
 from typing import Dict, Any, List, Optional
 
+from shared_store import SharedStore
+
+class SharedTokenCache(CacheHandler):
+    """Spotify token cache kept in the shared store so workers refresh it once"""
+    
+    def __init__(self, store: SharedStore, key: str = 'spotify:token'):
+        self.store = store
+        self.key = key
+    
+    def get_cached_token(self):
+        return self.store.get(self.key)
+    
+    def save_token_to_cache(self, token_info):
+        self.store.set(self.key, token_info)
+
 class SpotifyController:
     """Controls Spotify playback using Spotify Web API"""
     
-    def __init__(self):
+    def __init__(self, store: Optional[SharedStore] = None):
         self.sp = None
         self.authenticated = False
+        self.store = store
         self._initialize_spotify()
     
     def _initialize_spotify(self):
@@ -25,12 +42,17 @@ class SpotifyController:
             
             scope = "user-read-playback-state user-modify-playback-state user-read-currently-playing"
             
+            if self.store is not None:
+                cache_options = {"cache_handler": SharedTokenCache(self.store)}
+            else:
+                cache_options = {"cache_path": ".spotify_cache"}
+            
             self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
                 client_id=client_id,
                 client_secret=client_secret,
                 redirect_uri=redirect_uri,
                 scope=scope,
-                cache_path=".spotify_cache"
+                **cache_options
             ))
             
             self.authenticated = True
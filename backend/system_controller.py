@@ -1,84 +1,274 @@
 import os
 import shutil
-import subprocess
 import json
+import re
+import base64
+import fnmatch
+import heapq
+import stat as stat_module
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, Iterator, List
+
+from file_cache import FileCache
+from file_index import FileIndex
+from content_search import compile_pattern, search_tree
+from fileio import SNIFF_BYTES, READ_CHUNK, looks_binary, detect_encoding, is_line_addressable, \
+    locate_range, iter_text, mapped, atomic_write, append_file
+from uploads import UploadManager
+from command_runner import run_command, stream_command, OutputCallback
+from shell_sessions import ShellSessionPool
+import duplicates
+from duplicates import HashCache
+import disk_usage
+from disk_usage import UsageCache
+from file_watch import WatchManager
+from path_resolver import PathResolver
+from trash import TrashManager
+import copy_engine
+import tree_ops
+import bulk_ops
+import archives
+from copy_engine import CopyCancelled, ProgressCallback
+
+# Sort keys for list_directory; the name is always the tie-breaker so cursors are unique
+LIST_SORT_KEYS = {
+    None: None,
+    'name': lambda item: (item['name'].lower(), item['name']),
+    'size': lambda item: (item['size'] if item['size'] is not None else -1, item['name']),
+    'modified': lambda item: (item['modified'] or 0.0, item['name']),
+    'type': lambda item: (item['type'] != 'directory', item['name'].lower(), item['name']),
+}
+
+def _normalize_extensions(extensions) -> Optional[tuple]:
+    """Turn 'pdf', '.PDF' or ['pdf', 'txt'] into a sorted tuple of '.ext' strings"""
+    if not extensions:
+        return None
+    if isinstance(extensions, str):
+        extensions = extensions.split(',')
+    return tuple(sorted(
+        '.' + ext.strip().lower().lstrip('.') for ext in extensions if ext.strip()
+    ))
+
+def _is_hidden(name: str, st) -> bool:
+    if name.startswith('.'):
+        return True
+    attributes = getattr(st, 'st_file_attributes', 0) if st is not None else 0
+    return bool(attributes & getattr(stat_module, 'FILE_ATTRIBUTE_HIDDEN', 0))
+
+def _fill_stat(item: Dict[str, Any], entry: os.DirEntry) -> Dict[str, Any]:
+    """Add size/modified to a scanned item that was not stat'ed yet"""
+    if item['modified'] is None:
+        try:
+            st = entry.stat()
+        except OSError:
+            return item
+        if item['type'] == 'file':
+            item['size'] = st.st_size
+        item['modified'] = st.st_mtime
+    return item
+
+def _stat_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a listed item with size/modified read from disk now"""
+    item = dict(item)
+    try:
+        st = os.stat(item['path'])
+    except OSError:
+        return item
+    if item['type'] == 'file':
+        item['size'] = st.st_size
+    item['modified'] = st.st_mtime
+    return item
+
+def _encode_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
 
 class SystemController:
     """Handles all system-level operations for JARVIS"""
     
-    def __init__(self):
-        self.restricted_paths = [
+    def __init__(self, cache: Optional[FileCache] = None, index: Optional[FileIndex] = None,
+                 uploads: Optional[UploadManager] = None, shells: Optional[ShellSessionPool] = None,
+                 hash_cache: Optional[HashCache] = None, usage_cache: Optional[UsageCache] = None,
+                 watcher: Optional[WatchManager] = None, trash: Optional[TrashManager] = None):
+        # Expansion, canonical paths and restricted-root checks for every file action
+        self.paths = PathResolver([
             'C:\\Windows',
             'C:\\Program Files',
             'C:\\Program Files (x86)',
-        ]
+        ])
+        # Optional read-through cache for read_file, list_directory and get_file_info
+        self.cache = cache
+        # Optional background file name index used by find_file
+        self.index = index
+        # Parallel I/O threads for tree operations per storage type
+        self.tree_workers = {'ssd': 16, 'hdd': 2, 'network': 8}
+        self.default_storage = 'ssd'
+        # Limits for search_content
+        self.search_workers = 8
+        self.search_max_file_size = 50 * 1024 * 1024
+        # Largest span read_file returns in one response; streaming has no cap
+        self.read_max_bytes = 4 * 1024 * 1024
+        # fsync policy for writes ('none', 'file' or 'full') and optional chunked upload sessions
+        self.write_fsync = 'file'
+        self.uploads = uploads
+        # Limits for execute_command
+        self.command_timeout = 30
+        self.command_max_bytes = 1024 * 1024
+        # Optional persistent shells so commands of one conversation share cwd and env
+        self.shells = shells
+        # Optional content hash cache that makes repeated find_duplicates runs incremental
+        self.hash_cache = hash_cache
+        self.duplicate_workers = 8
+        # Optional per-directory size cache so repeated disk_usage runs only re-list changed directories
+        self.usage_cache = usage_cache
+        self.disk_usage_workers = 8
+        # Threads and compression level for create_archive
+        self.archive_workers = 4
+        self.archive_level = 6
+        # Optional change notifications for watch_path; every batch also invalidates cache and index
+        self.watcher = watcher
+        if watcher is not None:
+            watcher.add_listener(self._on_watch_batch)
+        # Optional trash: delete_file and delete_directory become a restorable rename
+        self.trash = trash
+    
+    @property
+    def restricted_paths(self) -> List[str]:
+        return self.paths.restricted
+    
+    @restricted_paths.setter
+    def restricted_paths(self, roots: List[str]):
+        self.paths.set_restricted(roots)
     
     def is_safe_path(self, path: str) -> bool:
         """Check if path is safe to operate on"""
         try:
-            # Expand ~ to home directory
-            path = os.path.expanduser(path)
-            abs_path = os.path.abspath(path)
-            for restricted in self.restricted_paths:
-                if abs_path.lower().startswith(restricted.lower()):
-                    return False
-            return True
-        except:
+            return not self.paths.is_restricted(path)
+        except (OSError, ValueError):
             return False
     
     def _resolve_path(self, path: str) -> str:
-        """Expand common Windows shortcuts and paths"""
-        path = os.path.expanduser(path)
-        
-        # Handle "Desktop", "Documents", etc. if they are at the start
-        user_profile = os.environ.get('USERPROFILE', os.path.expanduser('~'))
-        
-        if path.lower().startswith('desktop/'):
-            path = os.path.join(user_profile, 'Desktop', path[8:])
-        elif path.lower().startswith('desktop\\'):
-            path = os.path.join(user_profile, 'Desktop', path[8:])
-        elif path.lower() == 'desktop':
-            path = os.path.join(user_profile, 'Desktop')
-            
-        return path
+        """Expand ~ and known folders such as Desktop/ or Downloads/ into an absolute path"""
+        return self.paths.resolve(path)
+    
+    def _cached(self, op: str, path: str, loader: Callable[[], Dict[str, Any]], *key_args) -> Dict[str, Any]:
+        """Serve a read-only result through the cache when one is configured"""
+        if self.cache is None:
+            return loader()
+        return self.cache.get_or_load(op, path, loader, *key_args)
+    
+    def _invalidate(self, *paths: str, recursive: bool = False):
+        """Drop cached results touched by a write, move or delete"""
+        if self.cache is None:
+            return
+        for path in paths:
+            self.cache.invalidate(path, recursive=recursive)
     
-    def read_file(self, file_path: str) -> Dict[str, Any]:
-        """Read contents of a file"""
+    def _on_watch_batch(self, batch: Dict[str, Any]):
+        """Drop cached results and re-index directories a watch reported changes in"""
+        if batch['overflow']:
+            self._invalidate(batch['path'], recursive=True)
+            if self.index is not None:
+                self.index.update_path(batch['path'])
+            return
+        directories = set()
+        for event in batch['events']:
+            self._invalidate(event['path'], recursive=event['type'] == 'deleted')
+            directories.add(os.path.dirname(event['path']))
+        if self.index is not None:
+            for directory in directories:
+                self.index.update_path(directory)
+    
+    def read_file(self, file_path: str, offset: Optional[int] = None, length: Optional[int] = None,
+                  head: Optional[int] = None, tail: Optional[int] = None,
+                  start_line: Optional[int] = None, end_line: Optional[int] = None) -> Dict[str, Any]:
+        """Read a file, or one byte range (offset/length) or line range (head/tail/start_line/end_line) of it"""
         try:
             file_path = self._resolve_path(file_path)
             if not self.is_safe_path(file_path):
                 return {"success": False, "error": "Access to this path is restricted"}
             
-            if not os.path.exists(file_path):
-                return {"success": False, "error": "File not found"}
-            
-            if not os.path.isfile(file_path):
-                return {"success": False, "error": "Path is not a file"}
-            
-            # Try to read as text
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                return {
-                    "success": True,
-                    "content": content,
-                    "size": os.path.getsize(file_path),
-                    "path": file_path
-                }
-            except UnicodeDecodeError:
-                # Binary file
-                return {
-                    "success": False,
-                    "error": "File is binary and cannot be displayed as text",
-                    "size": os.path.getsize(file_path)
-                }
+            selectors = (offset, length, head, tail, start_line, end_line)
+            return self._cached('read_file', file_path, lambda: self._read_file(file_path, *selectors), *selectors)
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def _open_text(self, file_path: str, selectors: tuple) -> Dict[str, Any]:
+        """Check file_path is a text file and resolve the selectors to a byte span"""
+        if not os.path.exists(file_path):
+            return {"success": False, "error": "File not found"}
+        if not os.path.isfile(file_path):
+            return {"success": False, "error": "Path is not a file"}
+        
+        with open(file_path, 'rb') as f:
+            sniff = f.read(SNIFF_BYTES)
+        size = os.path.getsize(file_path)
+        if looks_binary(sniff):
+            return {
+                "success": False,
+                "error": "File is binary and cannot be displayed as text",
+                "size": size
+            }
+        encoding = detect_encoding(sniff)
+        by_line = any(v is not None for v in selectors[2:])
+        if by_line and not is_line_addressable(encoding):
+            return {"success": False, "error": f"Line ranges are not supported for {encoding} files"}
+        
+        # Large files are memory-mapped so only the pages around the range are touched
+        with mapped(file_path) as data:
+            start, end = locate_range(data, *selectors)
+        return {"success": True, "start": start, "end": end, "size": size, "encoding": encoding}
+    
+    def _read_file(self, file_path: str, *selectors) -> Dict[str, Any]:
+        try:
+            span = self._open_text(file_path, selectors)
+            if not span['success']:
+                return span
+            start, end = span['start'], span['end']
+            truncated = end - start > self.read_max_bytes
+            if truncated:
+                # Keep the end of a tail, the beginning of anything else
+                if selectors[3] is not None:
+                    start = end - self.read_max_bytes
+                else:
+                    end = start + self.read_max_bytes
+            content = ''.join(text for _, text in iter_text(file_path, start, end, span['encoding']))
+            return {
+                "success": True,
+                "content": content,
+                "size": span['size'],
+                "path": file_path,
+                "encoding": span['encoding'],
+                "start": start,
+                "end": end,
+                "truncated": truncated
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def iter_file_chunks(self, file_path: str, offset: Optional[int] = None, length: Optional[int] = None,
+                         head: Optional[int] = None, tail: Optional[int] = None,
+                         start_line: Optional[int] = None, end_line: Optional[int] = None,
+                         chunk_size: int = READ_CHUNK) -> Iterator[Dict[str, Any]]:
+        """Yield a file or range of it as decoded chunks without loading it whole"""
+        file_path = self._resolve_path(file_path)
+        if not self.is_safe_path(file_path):
+            yield {"success": False, "error": "Access to this path is restricted"}
+            return
+        span = self._open_text(file_path, (offset, length, head, tail, start_line, end_line))
+        if not span['success']:
+            yield span
+            return
+        for chunk_offset, text in iter_text(file_path, span['start'], span['end'], span['encoding'], chunk_size):
+            yield {"offset": chunk_offset, "content": text}
+    
     def write_file(self, file_path: str, content: str, mode: str = 'w') -> Dict[str, Any]:
-        """Write content to a file"""
+        """Write content to a file, replacing it atomically ('w') or appending ('a')"""
         try:
             file_path = self._resolve_path(file_path)
             if not self.is_safe_path(file_path):
@@ -87,8 +277,13 @@ class SystemController:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
             
-            with open(file_path, mode, encoding='utf-8') as f:
-                f.write(content)
+            data = content.encode('utf-8')
+            if mode == 'a':
+                append_file(file_path, data, self.write_fsync)
+            else:
+                # Temp file + fsync + rename: a crash leaves the old file, never a truncated one
+                atomic_write(file_path, data, self.write_fsync)
+            self._invalidate(file_path)
             
             return {
                 "success": True,
@@ -99,8 +294,50 @@ class SystemController:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def delete_file(self, file_path: str) -> Dict[str, Any]:
-        """Delete a file"""
+    def begin_upload(self, file_path: str, mode: str = 'w') -> Dict[str, Any]:
+        """Start a chunked write to file_path that takes effect on commit_upload"""
+        if self.uploads is None:
+            return {"success": False, "error": "Chunked uploads are disabled"}
+        try:
+            file_path = self._resolve_path(file_path)
+            if not self.is_safe_path(file_path):
+                return {"success": False, "error": "Access to this path is restricted"}
+            return self.uploads.begin(file_path, mode)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def append_upload(self, upload_id: str, content, offset: Optional[int] = None) -> Dict[str, Any]:
+        """Add a chunk (str is UTF-8 encoded, bytes are written as-is) to an upload"""
+        if self.uploads is None:
+            return {"success": False, "error": "Chunked uploads are disabled"}
+        try:
+            data = content.encode('utf-8') if isinstance(content, str) else bytes(content)
+            return self.uploads.append(upload_id, data, offset)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def commit_upload(self, upload_id: str, expected_size: Optional[int] = None) -> Dict[str, Any]:
+        """Atomically put an upload in place"""
+        if self.uploads is None:
+            return {"success": False, "error": "Chunked uploads are disabled"}
+        try:
+            result = self.uploads.commit(upload_id, expected_size)
+            if result['success']:
+                self._invalidate(result['path'])
+            return result
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def abort_upload(self, upload_id: str) -> Dict[str, Any]:
+        if self.uploads is None:
+            return {"success": False, "error": "Chunked uploads are disabled"}
+        try:
+            return self.uploads.abort(upload_id)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def delete_file(self, file_path: str, permanent: bool = False) -> Dict[str, Any]:
+        """Delete a file, into the trash unless permanent"""
         try:
             file_path = self._resolve_path(file_path)
             if not self.is_safe_path(file_path):
@@ -110,7 +347,10 @@ class SystemController:
                 return {"success": False, "error": "File not found"}
             
             if os.path.isfile(file_path):
+                if self.trash is not None and not permanent:
+                    return self._move_to_trash(file_path, recursive=False)
                 os.remove(file_path)
+                self._invalidate(file_path)
                 return {"success": True, "message": f"File deleted: {file_path}"}
             else:
                 return {"success": False, "error": "Path is not a file"}
@@ -120,6 +360,7 @@ class SystemController:
     def rename_file(self, old_path: str, new_path: str) -> Dict[str, Any]:
         """Rename or move a file"""
         try:
+            old_path, new_path = self._resolve_path(old_path), self._resolve_path(new_path)
             if not self.is_safe_path(old_path) or not self.is_safe_path(new_path):
                 return {"success": False, "error": "Access to this path is restricted"}
             
@@ -127,6 +368,7 @@ class SystemController:
                 return {"success": False, "error": "Source file not found"}
             
             os.rename(old_path, new_path)
+            self._invalidate(old_path, new_path, recursive=True)
             return {
                 "success": True,
                 "message": f"File renamed from {old_path} to {new_path}",
@@ -136,9 +378,11 @@ class SystemController:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def move_file(self, source: str, destination: str) -> Dict[str, Any]:
+    def move_file(self, source: str, destination: str, progress: Optional[ProgressCallback] = None,
+                  cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
         """Move a file to a different location"""
         try:
+            source, destination = self._resolve_path(source), self._resolve_path(destination)
             if not self.is_safe_path(source) or not self.is_safe_path(destination):
                 return {"success": False, "error": "Access to this path is restricted"}
             
@@ -149,19 +393,28 @@ class SystemController:
             if os.path.isdir(destination):
                 destination = os.path.join(destination, os.path.basename(source))
             
-            shutil.move(source, destination)
+            if os.path.isfile(source):
+                # Same volume: a rename; across devices: streamed copy with progress
+                copy_engine.move_file(source, destination, progress, cancel)
+            else:
+                shutil.move(source, destination)
+            self._invalidate(source, destination, recursive=True)
             return {
                 "success": True,
                 "message": f"File moved from {source} to {destination}",
                 "source": source,
                 "destination": destination
             }
+        except CopyCancelled as e:
+            return {"success": False, "error": "Move cancelled, source left in place", "cancelled": True, "partial": str(e)}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def copy_file(self, source: str, destination: str) -> Dict[str, Any]:
+    def copy_file(self, source: str, destination: str, progress: Optional[ProgressCallback] = None,
+                  cancel: Optional[threading.Event] = None, resume: bool = True) -> Dict[str, Any]:
         """Copy a file to a different location"""
         try:
+            source, destination = self._resolve_path(source), self._resolve_path(destination)
             if not self.is_safe_path(source) or not self.is_safe_path(destination):
                 return {"success": False, "error": "Access to this path is restricted"}
             
@@ -172,19 +425,30 @@ class SystemController:
             if os.path.isdir(destination):
                 destination = os.path.join(destination, os.path.basename(source))
             
-            shutil.copy2(source, destination)
+            result = copy_engine.copy_file(source, destination, progress, cancel, resume)
+            self._invalidate(destination)
+            message = f"File copied from {source} to {destination}"
+            if result['resumed_from']:
+                message += f" (resumed at {result['resumed_from']} bytes)"
             return {
                 "success": True,
-                "message": f"File copied from {source} to {destination}",
+                "message": message,
                 "source": source,
-                "destination": destination
+                "destination": destination,
+                "size": result['bytes']
             }
+        except CopyCancelled as e:
+            return {"success": False, "error": "Copy cancelled, partial file kept for resume", "cancelled": True, "partial": str(e)}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def list_directory(self, dir_path: str) -> Dict[str, Any]:
-        """List contents of a directory"""
+    def list_directory(self, dir_path: str, page_size: Optional[int] = None, cursor: Optional[str] = None,
+                       sort_by: Optional[str] = 'name', descending: bool = False,
+                       pattern: Optional[str] = None, extensions: Optional[List[str]] = None,
+                       include_hidden: bool = True) -> Dict[str, Any]:
+        """List contents of a directory, optionally one sorted and filtered page at a time"""
         try:
+            dir_path = self._resolve_path(dir_path)
             if not self.is_safe_path(dir_path):
                 return {"success": False, "error": "Access to this path is restricted"}
             
@@ -194,22 +458,258 @@ class SystemController:
             if not os.path.isdir(dir_path):
                 return {"success": False, "error": "Path is not a directory"}
             
-            items = []
-            for item in os.listdir(dir_path):
-                item_path = os.path.join(dir_path, item)
-                is_dir = os.path.isdir(item_path)
-                items.append({
-                    "name": item,
+            if sort_by not in LIST_SORT_KEYS:
+                return {"success": False, "error": f"Unknown sort key: {sort_by}"}
+            
+            extensions = _normalize_extensions(extensions)
+            if sort_by in ('size', 'modified'):
+                # Which entries make the page depends on their stats, which the directory stamp does not cover
+                return self._list_directory(dir_path, page_size, cursor, sort_by, descending,
+                                            pattern, extensions, include_hidden)
+            # The cached listing holds names and types only; in-place writes to an entry
+            # leave the directory stamp alone, so sizes and times are read fresh every call
+            result = self._cached(
+                'list_directory', dir_path,
+                lambda: self._list_directory(dir_path, page_size, cursor, sort_by, descending,
+                                             pattern, extensions, include_hidden, fill_stat=False),
+                page_size, cursor, sort_by, descending, pattern, extensions, include_hidden
+            )
+            if result.get('success'):
+                result['items'] = [_stat_item(item) for item in result['items']]
+            return result
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def iter_directory(self, dir_path: str, pattern: Optional[str] = None,
+                       extensions: Optional[List[str]] = None,
+                       include_hidden: bool = True) -> Iterator[Dict[str, Any]]:
+        """Yield directory entries one by one without building the whole listing"""
+        dir_path = self._resolve_path(dir_path)
+        if not self.is_safe_path(dir_path):
+            raise PermissionError("Access to this path is restricted")
+        for item, entry in self._scan_directory(dir_path, pattern, extensions, include_hidden):
+            yield _fill_stat(item, entry)
+    
+    def _scan_directory(self, dir_path: str, pattern: Optional[str], extensions,
+                        include_hidden: bool, with_stat: bool = False):
+        """Yield (item, DirEntry) pairs; entries are only stat'ed when with_stat is set"""
+        extensions = _normalize_extensions(extensions)
+        pattern = pattern.lower() if pattern else None
+        # Hidden files on Windows are an attribute, which DirEntry.stat() provides for free
+        hidden_needs_stat = not include_hidden and os.name == 'nt'
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                name = entry.name
+                if pattern and not fnmatch.fnmatch(name.lower(), pattern):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                    if extensions and (is_dir or os.path.splitext(name)[1].lower() not in extensions):
+                        continue
+                    st = entry.stat() if (with_stat or hidden_needs_stat) else None
+                except OSError:
+                    continue
+                if not include_hidden and _is_hidden(name, st):
+                    continue
+                yield {
+                    "name": name,
                     "type": "directory" if is_dir else "file",
-                    "size": os.path.getsize(item_path) if not is_dir else None,
-                    "path": item_path
-                })
+                    "size": st.st_size if st is not None and not is_dir else None,
+                    "modified": st.st_mtime if st is not None else None,
+                    "path": entry.path
+                }, entry
+    
+    def _list_directory(self, dir_path: str, page_size: Optional[int], cursor: Optional[str],
+                        sort_by: Optional[str], descending: bool, pattern: Optional[str],
+                        extensions, include_hidden: bool, fill_stat: bool = True) -> Dict[str, Any]:
+        try:
+            # Only size/modified ordering needs stat data for every entry
+            scanned = self._scan_directory(dir_path, pattern, extensions, include_hidden,
+                                           with_stat=sort_by in ('size', 'modified'))
+            total = 0
+            
+            if sort_by is None:
+                # Directory order: the cursor is a plain offset
+                offset = int(_decode_cursor(cursor) or 0)
+                page = []
+                for pair in scanned:
+                    total += 1
+                    if total > offset and (page_size is None or len(page) < page_size):
+                        page.append(pair)
+                next_offset = offset + len(page)
+                next_cursor = _encode_cursor(next_offset) if next_offset < total else None
+            else:
+                sort_key = LIST_SORT_KEYS[sort_by]
+                pair_key = lambda pair: sort_key(pair[0])
+                after = _decode_cursor(cursor)
+                after = tuple(after) if after is not None else None
+                
+                def candidates():
+                    nonlocal total
+                    for pair in scanned:
+                        total += 1
+                        key = sort_key(pair[0])
+                        if after is None or (key < after if descending else key > after):
+                            yield pair
+                
+                if page_size is None:
+                    page = sorted(candidates(), key=pair_key, reverse=descending)
+                else:
+                    # Keeps only one page in memory however large the directory is
+                    select = heapq.nlargest if descending else heapq.nsmallest
+                    page = select(page_size + 1, candidates(), key=pair_key)
+                has_more = page_size is not None and len(page) > page_size
+                page = page[:page_size] if page_size is not None else page
+                next_cursor = _encode_cursor(list(pair_key(page[-1]))) if has_more else None
             
+            if fill_stat:
+                items = [_fill_stat(item, entry) for item, entry in page]
+            else:
+                items = [dict(item, size=None, modified=None) for item, _ in page]
             return {
                 "success": True,
                 "path": dir_path,
                 "items": items,
-                "count": len(items)
+                "count": len(items),
+                "total": total,
+                "next_cursor": next_cursor
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def find_file(self, query: str, limit: int = 20, extensions: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Find files by (fuzzy) name in the indexed folders"""
+        try:
+            if self.index is None:
+                return {"success": False, "error": "File index is not enabled"}
+            
+            if not query or not query.strip():
+                return {"success": False, "error": "No file name given"}
+            
+            matches = [m for m in self.index.find(query, limit, _normalize_extensions(extensions))
+                       if self.is_safe_path(m['path'])]
+            return {
+                "success": True,
+                "query": query,
+                "matches": matches,
+                "count": len(matches),
+                "message": f"Found {len(matches)} matching files" if matches else f"No files matching '{query}'"
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def iter_content_matches(self, dir_path: str, pattern: str, regex: bool = False,
+                             case_sensitive: bool = False, file_pattern: Optional[str] = None,
+                             max_results: int = 100, max_file_size: Optional[int] = None,
+                             workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield lines matching pattern under dir_path as they are found"""
+        dir_path = self._resolve_path(dir_path)
+        if not self.is_safe_path(dir_path):
+            yield {"success": False, "error": "Access to this path is restricted"}
+            return
+        if not os.path.isdir(dir_path):
+            yield {"success": False, "error": "Directory not found"}
+            return
+        if not pattern:
+            yield {"success": False, "error": "No search pattern given"}
+            return
+        try:
+            compiled = compile_pattern(pattern, regex, case_sensitive)
+        except re.error as e:
+            yield {"success": False, "error": f"Invalid pattern: {e}"}
+            return
+        yield from search_tree(
+            dir_path, compiled,
+            max_results=max_results,
+            file_pattern=file_pattern,
+            max_file_size=max_file_size or self.search_max_file_size,
+            workers=workers or self.search_workers
+        )
+    
+    def search_content(self, dir_path: str, pattern: str, regex: bool = False,
+                       case_sensitive: bool = False, file_pattern: Optional[str] = None,
+                       max_results: int = 100, max_file_size: Optional[int] = None) -> Dict[str, Any]:
+        """Search file contents under a directory for a text or regex pattern"""
+        try:
+            matches = []
+            for match in self.iter_content_matches(dir_path, pattern, regex, case_sensitive,
+                                                   file_pattern, max_results, max_file_size):
+                if match.get('success') is False:
+                    return match
+                matches.append(match)
+            files = len({m['path'] for m in matches})
+            return {
+                "success": True,
+                "pattern": pattern,
+                "matches": matches,
+                "count": len(matches),
+                "truncated": len(matches) >= max_results,
+                "message": f"Found {len(matches)} matches in {files} files"
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def find_duplicates(self, dir_path: str, min_size: int = 1, extensions=None, max_groups: int = 50,
+                        progress: Optional[duplicates.DuplicateProgress] = None,
+                        cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Find groups of files with identical content under a directory"""
+        try:
+            dir_path = self._resolve_path(dir_path)
+            if not self.is_safe_path(dir_path):
+                return {"success": False, "error": "Access to this path is restricted"}
+            if not os.path.isdir(dir_path):
+                return {"success": False, "error": "Directory not found"}
+            
+            result = duplicates.find_duplicates(
+                dir_path,
+                min_size=int(min_size or 1),
+                extensions=_normalize_extensions(extensions),
+                workers=self.duplicate_workers,
+                cache=self.hash_cache,
+                progress=progress,
+                cancel=cancel
+            )
+            groups = result['groups']
+            return {
+                "success": not result['cancelled'],
+                "path": dir_path,
+                "message": (f"Found {len(groups)} groups of duplicates wasting "
+                            f"{result['wasted_bytes'] / (1024 * 1024):.1f} MB"),
+                **result,
+                "groups": groups[:max_groups],
+                "group_count": len(groups),
+                "truncated": len(groups) > max_groups
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def disk_usage(self, dir_path: str, top: int = 20, refresh: bool = False,
+                   progress: Optional[disk_usage.UsageProgress] = None,
+                   cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Report what takes up space under a directory, largest children first"""
+        try:
+            dir_path = self._resolve_path(dir_path)
+            if not self.is_safe_path(dir_path):
+                return {"success": False, "error": "Access to this path is restricted"}
+            if not os.path.isdir(dir_path):
+                return {"success": False, "error": "Directory not found"}
+            
+            result = disk_usage.analyze(
+                dir_path,
+                top=int(top or 20),
+                workers=self.disk_usage_workers,
+                cache=self.usage_cache,
+                refresh=bool(refresh),
+                progress=progress,
+                cancel=cancel
+            )
+            volume = shutil.disk_usage(dir_path)
+            return {
+                "success": not result['cancelled'],
+                "message": (f"{result['bytes'] / (1024 * 1024):.1f} MB in {result['files']} files under {dir_path}; "
+                            f"{volume.free / (1024 ** 3):.1f} GB free of {volume.total / (1024 ** 3):.1f} GB"),
+                **result,
+                "volume": {"total": volume.total, "used": volume.used, "free": volume.free}
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -217,10 +717,12 @@ class SystemController:
     def create_directory(self, dir_path: str) -> Dict[str, Any]:
         """Create a new directory"""
         try:
+            dir_path = self._resolve_path(dir_path)
             if not self.is_safe_path(dir_path):
                 return {"success": False, "error": "Access to this path is restricted"}
             
             os.makedirs(dir_path, exist_ok=True)
+            self._invalidate(dir_path)
             return {
                 "success": True,
                 "message": f"Directory created: {dir_path}",
@@ -229,9 +731,10 @@ class SystemController:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def delete_directory(self, dir_path: str) -> Dict[str, Any]:
-        """Delete a directory"""
+    def delete_directory(self, dir_path: str, permanent: bool = False) -> Dict[str, Any]:
+        """Delete a directory, into the trash unless permanent"""
         try:
+            dir_path = self._resolve_path(dir_path)
             if not self.is_safe_path(dir_path):
                 return {"success": False, "error": "Access to this path is restricted"}
             
@@ -241,7 +744,11 @@ class SystemController:
             if not os.path.isdir(dir_path):
                 return {"success": False, "error": "Path is not a directory"}
             
+            if self.trash is not None and not permanent:
+                return self._move_to_trash(dir_path, recursive=True)
+            
             shutil.rmtree(dir_path)
+            self._invalidate(dir_path, recursive=True)
             return {
                 "success": True,
                 "message": f"Directory deleted: {dir_path}"
@@ -249,37 +756,343 @@ class SystemController:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def execute_command(self, command: str, timeout: int = 30) -> Dict[str, Any]:
-        """Execute a system command"""
+    def _move_to_trash(self, path: str, recursive: bool) -> Dict[str, Any]:
+        item = self.trash.trash(path)
+        self._invalidate(path, recursive=recursive)
+        return {
+            "success": True,
+            "message": f"Moved to trash: {path}",
+            "trash_id": item["id"],
+            "trashed": True
+        }
+    
+    def restore_file(self, trash_id: Optional[str] = None, original_path: Optional[str] = None,
+                     destination: Optional[str] = None) -> Dict[str, Any]:
+        """Restore a trashed file or directory by trash id, or the latest one deleted from original_path"""
+        if self.trash is None:
+            return {"success": False, "error": "Trash is disabled"}
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=timeout
+            if trash_id is None:
+                if not original_path:
+                    return {"success": False, "error": "Give a trash id or the original path"}
+                item = self.trash.find(self._resolve_path(original_path))
+                if item is None:
+                    return {"success": False, "error": f"Nothing from {original_path} is in the trash"}
+                trash_id = item["id"]
+            target = self._resolve_path(destination) if destination else None
+            item = self.trash.get(trash_id)
+            if item is None:
+                return {"success": False, "error": f"No trashed item {trash_id}"}
+            if not self.is_safe_path(target or item["original_path"]):
+                return {"success": False, "error": "Access to this path is restricted"}
+            restored = self.trash.restore(trash_id, target)
+            self._invalidate(restored["restored_to"], recursive=restored["kind"] == 'directory')
+            return {
+                "success": True,
+                "message": f"Restored: {restored['restored_to']}",
+                "path": restored["restored_to"],
+                "kind": restored["kind"]
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def list_trash(self, limit: int = 100) -> Dict[str, Any]:
+        """Most recently trashed items plus the trash's total size"""
+        if self.trash is None:
+            return {"success": False, "error": "Trash is disabled"}
+        try:
+            return {"success": True, "items": self.trash.list(limit), **self.trash.usage()}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def empty_trash(self, trash_id: Optional[str] = None) -> Dict[str, Any]:
+        """Queue one trashed item, or everything, for the background purger"""
+        if self.trash is None:
+            return {"success": False, "error": "Trash is disabled"}
+        try:
+            count = self.trash.request_purge(trash_id)
+            if trash_id is not None and count == 0:
+                return {"success": False, "error": f"No trashed item {trash_id}"}
+            self.trash.wake()
+            return {"success": True, "message": f"{count} item(s) queued for permanent deletion", "count": count}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _tree_workers(self, storage: Optional[str]) -> int:
+        return self.tree_workers.get(storage or self.default_storage, self.tree_workers[self.default_storage])
+    
+    def _tree_result(self, verb: str, target: str, result: Dict[str, Any], **extra) -> Dict[str, Any]:
+        """Summarise a tree operation; partial failures are reported, not raised"""
+        if result.get('cancelled'):
+            message = f"Cancelled before {target} was completely {verb}"
+        elif result.get('renamed'):
+            message = f"Directory {verb}: {target} (renamed in place)"
+        else:
+            message = f"Directory {verb}: {target} ({result['files']} files, {result['bytes']} bytes"
+            message += f", {result['error_count']} errors)" if result['error_count'] else ")"
+        return {
+            "success": not result.get('cancelled') and result['error_count'] == 0,
+            "message": message,
+            **extra,
+            **result
+        }
+    
+    def copy_tree(self, source: str, destination: str, storage: Optional[str] = None,
+                  progress: Optional[tree_ops.TreeProgress] = None,
+                  cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Copy a whole directory tree using parallel file I/O"""
+        try:
+            source, destination = self._resolve_path(source), self._resolve_path(destination)
+            if not self.is_safe_path(source) or not self.is_safe_path(destination):
+                return {"success": False, "error": "Access to this path is restricted"}
+            
+            if not os.path.isdir(source):
+                return {"success": False, "error": "Source directory not found"}
+            
+            # If destination is an existing directory, copy into it
+            if os.path.isdir(destination):
+                destination = os.path.join(destination, os.path.basename(os.path.normpath(source)))
+            
+            result = tree_ops.copy_tree(source, destination, self._tree_workers(storage), progress, cancel)
+            self._invalidate(destination, recursive=True)
+            return self._tree_result('copied', source, result, source=source, destination=destination)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def move_tree(self, source: str, destination: str, storage: Optional[str] = None,
+                  progress: Optional[tree_ops.TreeProgress] = None,
+                  cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Move a whole directory tree, renaming when source and destination share a volume"""
+        try:
+            source, destination = self._resolve_path(source), self._resolve_path(destination)
+            if not self.is_safe_path(source) or not self.is_safe_path(destination):
+                return {"success": False, "error": "Access to this path is restricted"}
+            
+            if not os.path.isdir(source):
+                return {"success": False, "error": "Source directory not found"}
+            
+            # If destination is an existing directory, move into it
+            if os.path.isdir(destination):
+                destination = os.path.join(destination, os.path.basename(os.path.normpath(source)))
+            
+            result = tree_ops.move_tree(source, destination, self._tree_workers(storage), progress, cancel)
+            self._invalidate(source, destination, recursive=True)
+            return self._tree_result('moved', source, result, source=source, destination=destination)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def delete_tree(self, dir_path: str, storage: Optional[str] = None,
+                    progress: Optional[tree_ops.TreeProgress] = None,
+                    cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Delete a whole directory tree using parallel unlinks"""
+        try:
+            dir_path = self._resolve_path(dir_path)
+            if not self.is_safe_path(dir_path):
+                return {"success": False, "error": "Access to this path is restricted"}
+            
+            if not os.path.isdir(dir_path):
+                return {"success": False, "error": "Directory not found"}
+            
+            result = tree_ops.delete_tree(dir_path, self._tree_workers(storage), progress, cancel)
+            self._invalidate(dir_path, recursive=True)
+            return self._tree_result('deleted', dir_path, result, path=dir_path)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def bulk_files(self, operation: str, pattern: str, dir_path: Optional[str] = None,
+                   destination: Optional[str] = None, template: Optional[str] = None,
+                   filters: Optional[Dict[str, Any]] = None, dry_run: bool = False, overwrite: bool = False,
+                   storage: Optional[str] = None, permanent: bool = False,
+                   progress: Optional[tree_ops.TreeProgress] = None,
+                   cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Move, copy, rename or delete every file matching a glob such as Downloads/*.pdf; deletes go to the trash unless permanent"""
+        try:
+            if dir_path:
+                pattern = os.path.join(self._resolve_path(dir_path), pattern)
+            pattern = self._resolve_path(pattern)
+            filters = dict(filters or {})
+            filters['extensions'] = _normalize_extensions(filters.get('extensions'))
+            if destination:
+                destination = self._resolve_path(destination)
+                if not self.is_safe_path(destination):
+                    return {"success": False, "error": "Access to this path is restricted"}
+                if operation in ('move', 'copy') and not dry_run:
+                    os.makedirs(destination, exist_ok=True)
+            
+            result = bulk_ops.bulk_apply(
+                operation, pattern, destination, template, filters,
+                workers=self._tree_workers(storage),
+                dry_run=dry_run,
+                overwrite=overwrite,
+                allowed=self.is_safe_path,
+                remove=self.trash.trash if self.trash is not None and not permanent else None,
+                progress=progress,
+                cancel=cancel
             )
+            if not dry_run:
+                self._invalidate(*result['directories'], recursive=True)
+            if dry_run:
+                message = f"Would {operation} {result['planned']} files matching {pattern}"
+            elif result['cancelled']:
+                message = f"Cancelled after {operation} of {result['files']} files matching {pattern}"
+            else:
+                message = f"{operation.capitalize()}: {result['files']} of {result['matched']} files matching {pattern}"
+                if operation == 'delete' and self.trash is not None and not permanent:
+                    message += " (moved to trash)"
+            if result['error_count']:
+                message += f" ({result['error_count']} errors)"
+            return {
+                "success": not result['cancelled'] and result['error_count'] == 0,
+                "message": message,
+                "pattern": pattern,
+                **result
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def create_archive(self, sources, archive_path: str, fmt: Optional[str] = None,
+                       progress: Optional[archives.ArchiveProgress] = None,
+                       cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Pack one or more files or folders into a zip, tar, tar.gz or tar.zst archive"""
+        try:
+            if isinstance(sources, str):
+                sources = [sources]
+            sources = [self._resolve_path(source) for source in sources if source]
+            archive_path = self._resolve_path(archive_path)
+            if not sources:
+                return {"success": False, "error": "Nothing to archive"}
+            if not all(self.is_safe_path(path) for path in sources + [archive_path]):
+                return {"success": False, "error": "Access to this path is restricted"}
+            missing = [source for source in sources if not os.path.exists(source)]
+            if missing:
+                return {"success": False, "error": f"Not found: {', '.join(missing)}"}
             
+            result = archives.create_archive(sources, archive_path, fmt, self.archive_level,
+                                             self.archive_workers, progress, cancel)
+            self._invalidate(archive_path)
+            if result['cancelled']:
+                message = f"Cancelled; {archive_path} was not created"
+            else:
+                message = (f"Archived {result['files']} files ({result['bytes']} bytes) into {archive_path} "
+                           f"({result['size']} bytes)")
+            return {
+                "success": not result['cancelled'] and result['error_count'] == 0,
+                "message": message,
+                "archive": archive_path,
+                **result
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def extract_archive(self, archive_path: str, destination: Optional[str] = None, overwrite: bool = False,
+                        progress: Optional[archives.ArchiveProgress] = None,
+                        cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Unpack an archive, by default into a folder named after it next to it"""
+        try:
+            archive_path = self._resolve_path(archive_path)
+            if not destination:
+                name = os.path.basename(archive_path)
+                for suffix in ('.tar.gz', '.tar.zst', '.tgz', '.tzst', '.tar', '.zip'):
+                    if name.lower().endswith(suffix):
+                        name = name[:-len(suffix)]
+                        break
+                destination = os.path.join(os.path.dirname(archive_path), name)
+            destination = self._resolve_path(destination)
+            if not self.is_safe_path(archive_path) or not self.is_safe_path(destination):
+                return {"success": False, "error": "Access to this path is restricted"}
+            if not os.path.isfile(archive_path):
+                return {"success": False, "error": "Archive not found"}
+            
+            result = archives.extract_archive(archive_path, destination, overwrite, progress, cancel)
+            self._invalidate(destination, recursive=True)
+            message = f"Extracted {result['files']} files from {archive_path} into {destination}"
+            if result['cancelled']:
+                message = f"Cancelled after extracting {result['files']} files into {destination}"
+            if result['error_count']:
+                message += f" ({result['error_count']} entries skipped with errors)"
             return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr,
-                "return_code": result.returncode
+                "success": not result['cancelled'] and result['error_count'] == 0,
+                "message": message,
+                "archive": archive_path,
+                "destination": destination,
+                **result
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def execute_command(self, command: str, timeout: Optional[float] = None, max_bytes: Optional[int] = None,
+                        cancel: Optional[threading.Event] = None,
+                        on_output: Optional[OutputCallback] = None,
+                        session: Optional[str] = None) -> Dict[str, Any]:
+        """Execute a system command, in the shell of session when given, keeping at most max_bytes of output"""
+        try:
+            runner = run_command
+            if session and self.shells is not None:
+                runner = lambda *args, **kwargs: self.shells.run(session, *args, **kwargs)
+            result = runner(
+                command,
+                timeout=timeout or self.command_timeout,
+                max_bytes=max_bytes or self.command_max_bytes,
+                cancel=cancel,
+                on_output=on_output
+            )
+            if result.get('error'):
+                return {"success": False, "error": result['error']}
+            if result['timed_out']:
+                return {"success": False, "error": "Command execution timed out",
+                        "output": result['stdout'], "return_code": result['return_code']}
+            if result['cancelled']:
+                return {"success": False, "error": "Command cancelled",
+                        "output": result['stdout'], "return_code": result['return_code']}
+            
+            response = {
+                "success": result['return_code'] == 0,
+                "output": result['stdout'],
+                "error": result['stderr'],
+                "return_code": result['return_code'],
+                "truncated": result['truncated']
             }
-        except subprocess.TimeoutExpired:
-            return {"success": False, "error": "Command execution timed out"}
+            if 'session' in result:
+                response.update(session=result['session'], cwd=result['cwd'])
+            return response
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def iter_command(self, command: str, timeout: Optional[float] = None,
+                     max_bytes: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield output lines of a command as they are printed, then a final status"""
+        yield from stream_command(
+            command,
+            timeout=timeout or self.command_timeout,
+            max_bytes=max_bytes or self.command_max_bytes
+        )
+    
+    def iter_watch(self, dir_path: str, recursive: bool = True,
+                   debounce: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Yield debounced batches of changes under a directory until the consumer stops reading"""
+        if self.watcher is None:
+            raise RuntimeError("File watching is disabled")
+        dir_path = self._resolve_path(dir_path)
+        if not self.is_safe_path(dir_path):
+            raise PermissionError("Access to this path is restricted")
+        yield from self.watcher.iter_batches(dir_path, recursive, debounce)
+    
     def get_file_info(self, file_path: str) -> Dict[str, Any]:
         """Get information about a file"""
         try:
+            file_path = self._resolve_path(file_path)
             if not self.is_safe_path(file_path):
                 return {"success": False, "error": "Access to this path is restricted"}
             
             if not os.path.exists(file_path):
                 return {"success": False, "error": "File not found"}
             
+            return self._cached('get_file_info', file_path, lambda: self._get_file_info(file_path))
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _get_file_info(self, file_path: str) -> Dict[str, Any]:
+        try:
             stat = os.stat(file_path)
             return {
                 "success": True,
@@ -0,0 +1,332 @@
+"""
+Trash Module
+Recoverable deletes for delete_file, delete_directory and bulk_delete
+A delete is a rename into a trash directory on the same volume, recorded in a
+SQLite index so it can be restored; a background purger measures trashed
+items and removes them at a throttled rate once they pass the retention age
+or the trash grows past its size budget
+"""
+
+import errno
+import getpass
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+from path_resolver import home_directory
+
+TRASH_COLUMNS = ('id', 'original_path', 'trash_path', 'kind', 'deleted_at', 'size', 'files')
+
+
+def default_trash_dir() -> str:
+    """Trash for the volume holding the home directory"""
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(home_directory(), 'AppData', 'Local')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.join(home_directory(), '.local', 'share')
+    return os.path.join(base, 'jarvis-trash')
+
+
+class _Throttle:
+    """Sleeps just enough to keep an operation under rate per second"""
+
+    def __init__(self, rate: int, stop: Optional[threading.Event] = None):
+        self.rate = max(1, rate)
+        self.stop = stop
+        self.count = 0
+        self.started = time.monotonic()
+
+    def tick(self):
+        self.count += 1
+        ahead = self.count / self.rate - (time.monotonic() - self.started)
+        if ahead > 0.01:
+            if self.stop is not None:
+                self.stop.wait(ahead)
+            else:
+                time.sleep(ahead)
+
+
+class TrashManager:
+    """Per-volume trash directories with a restore index and a background purger"""
+
+    def __init__(self, db_path: str, home_trash: Optional[str] = None, retention_days: float = 30,
+                 max_bytes: int = 10 * 1024 ** 3, purge_rate: int = 500, interval: float = 300, store=None):
+        self.db_path = os.path.abspath(db_path)
+        self.home_trash = os.path.abspath(home_trash or default_trash_dir())
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        # Files unlinked (or stat'ed while measuring) per second by the purger
+        self.purge_rate = purge_rate
+        self.interval = interval
+        self.store = store
+        self._local = threading.local()
+        self._roots: Dict[int, str] = {}
+        self.thread = None
+        self.stop_event = threading.Event()
+        self._wakeup = threading.Event()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " id TEXT PRIMARY KEY,"
+            " original_path TEXT NOT NULL,"
+            " trash_path TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " deleted_at REAL NOT NULL,"
+            " size INTEGER,"
+            " files INTEGER,"
+            " purge_requested INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS items_original ON items (original_path, deleted_at)")
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _trash_root(self, path: str) -> str:
+        """Trash directory on the same volume as path, so trashing is a rename"""
+        device = os.lstat(path).st_dev
+        root = self._roots.get(device)
+        if root is not None:
+            return root
+        try:
+            home_device = os.stat(os.path.dirname(self.home_trash)).st_dev
+        except OSError:
+            os.makedirs(os.path.dirname(self.home_trash), exist_ok=True)
+            home_device = os.stat(os.path.dirname(self.home_trash)).st_dev
+        if home_device == device:
+            root = self.home_trash
+        else:
+            # Highest writable directory above path that is still on its volume
+            top = None
+            current = os.path.dirname(os.path.abspath(path))
+            while True:
+                try:
+                    if os.stat(current).st_dev != device:
+                        break
+                except OSError:
+                    break
+                if os.access(current, os.W_OK):
+                    top = current
+                parent = os.path.dirname(current)
+                if parent == current:
+                    break
+                current = parent
+            if top is None:
+                raise PermissionError(f"No writable directory for a trash on the volume of {path}")
+            root = os.path.join(top, f".jarvis-trash-{getpass.getuser()}")
+        os.makedirs(root, exist_ok=True)
+        self._roots[device] = root
+        return root
+
+    def trash(self, path: str) -> Dict[str, Any]:
+        """Move path into the trash; a rename, so it takes the same time for a file or a huge tree"""
+        path = os.path.abspath(path)
+        root = self._trash_root(path)
+        if root == path or root.startswith(path.rstrip(os.sep) + os.sep):
+            raise ValueError(f"{path} contains the trash directory; delete it permanently instead")
+        item_id = uuid.uuid4().hex[:16]
+        trash_path = os.path.join(root, f"{item_id}-{os.path.basename(path)}")
+        kind = 'directory' if os.path.isdir(path) and not os.path.islink(path) else 'file'
+        try:
+            os.rename(path, trash_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # A bind mount shares the device number; use a trash inside this mount instead
+            self._roots.pop(os.lstat(path).st_dev, None)
+            root = os.path.join(os.path.dirname(path), f".jarvis-trash-{getpass.getuser()}")
+            os.makedirs(root, exist_ok=True)
+            trash_path = os.path.join(root, f"{item_id}-{os.path.basename(path)}")
+            os.rename(path, trash_path)
+        size = os.lstat(trash_path).st_size if kind == 'file' else None
+        self._connect().execute(
+            "INSERT INTO items (id, original_path, trash_path, kind, deleted_at, size, files)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (item_id, path, trash_path, kind, time.time(), size, 1 if kind == 'file' else None)
+        )
+        return {"id": item_id, "original_path": path, "trash_path": trash_path, "kind": kind}
+
+    def _row(self, row) -> Dict[str, Any]:
+        return dict(zip(TRASH_COLUMNS, row))
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            f"SELECT {', '.join(TRASH_COLUMNS)} FROM items WHERE id = ?", (item_id,)
+        ).fetchone()
+        return self._row(row) if row else None
+
+    def find(self, original_path: str) -> Optional[Dict[str, Any]]:
+        """Most recently trashed item that used to live at original_path"""
+        row = self._connect().execute(
+            f"SELECT {', '.join(TRASH_COLUMNS)} FROM items WHERE original_path = ? AND purge_requested = 0"
+            " ORDER BY deleted_at DESC LIMIT 1", (os.path.abspath(original_path),)
+        ).fetchone()
+        return self._row(row) if row else None
+
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            f"SELECT {', '.join(TRASH_COLUMNS)} FROM items WHERE purge_requested = 0"
+            " ORDER BY deleted_at DESC LIMIT ?", (limit,)
+        )
+        return [self._row(row) for row in rows]
+
+    def restore(self, item_id: str, destination: Optional[str] = None) -> Dict[str, Any]:
+        """Move a trashed item back to where it was, or to destination"""
+        item = self.get(item_id)
+        if item is None:
+            raise FileNotFoundError(f"No trashed item {item_id}")
+        target = os.path.abspath(destination or item['original_path'])
+        if os.path.lexists(target):
+            raise FileExistsError(f"Something already exists at {target}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Cross-volume restores are refused here by rename's EXDEV rather than turning into a slow copy
+        os.rename(item['trash_path'], target)
+        self._connect().execute("DELETE FROM items WHERE id = ?", (item_id,))
+        return {**item, "restored_to": target}
+
+    def request_purge(self, item_id: Optional[str] = None) -> int:
+        """Mark one item, or all of them, for removal on the purger's next pass"""
+        conn = self._connect()
+        if item_id is None:
+            cursor = conn.execute("UPDATE items SET purge_requested = 1 WHERE purge_requested = 0")
+        else:
+            cursor = conn.execute("UPDATE items SET purge_requested = 1 WHERE id = ?", (item_id,))
+        return cursor.rowcount
+
+    def usage(self) -> Dict[str, Any]:
+        count, size, unmeasured = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(size IS NULL), 0) FROM items"
+        ).fetchone()
+        return {"count": count, "bytes": size, "unmeasured": unmeasured,
+                "retention_days": self.retention_days, "max_bytes": self.max_bytes}
+
+    def _measure(self, path: str, throttle: _Throttle) -> tuple:
+        total = files = 0
+        stack = [path]
+        while stack and not self.stop_event.is_set():
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            else:
+                                total += entry.stat(follow_symlinks=False).st_size
+                                files += 1
+                        except OSError:
+                            continue
+                        throttle.tick()
+            except OSError:
+                continue
+        return total, files
+
+    def _remove(self, path: str, throttle: _Throttle) -> bool:
+        """Delete a file or tree bottom-up at the throttled rate; False if stopped or incomplete"""
+        if not os.path.isdir(path) or os.path.islink(path):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Locked or not ours; the item stays in the index and is retried next pass
+                throttle.tick()
+                return False
+            throttle.tick()
+            return True
+        complete = True
+        for directory, subdirs, files in os.walk(path, topdown=False):
+            for name in files + [d for d in subdirs if os.path.islink(os.path.join(directory, d))]:
+                if self.stop_event.is_set():
+                    return False
+                try:
+                    os.unlink(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    complete = False
+                throttle.tick()
+            try:
+                os.rmdir(directory)
+            except OSError:
+                complete = False
+        return complete
+
+    def purge(self) -> Dict[str, Any]:
+        """One purger pass: measure new items, then remove what the retention policy gives up"""
+        throttle = _Throttle(self.purge_rate, self.stop_event)
+        conn = self._connect()
+        measured = removed = freed = 0
+        for item_id, trash_path in conn.execute(
+                "SELECT id, trash_path FROM items WHERE size IS NULL AND purge_requested = 0").fetchall():
+            if self.stop_event.is_set():
+                break
+            size, files = self._measure(trash_path, throttle)
+            if not self.stop_event.is_set():
+                conn.execute("UPDATE items SET size = ?, files = ? WHERE id = ?", (size, files, item_id))
+                measured += 1
+
+        cutoff = time.time() - self.retention_days * 86400
+        rows = conn.execute(
+            "SELECT id, trash_path, COALESCE(size, 0), deleted_at, purge_requested FROM items ORDER BY deleted_at"
+        ).fetchall()
+        total = sum(row[2] for row in rows)
+        for item_id, trash_path, size, deleted_at, purge_requested in rows:
+            if self.stop_event.is_set():
+                break
+            if not (purge_requested or deleted_at < cutoff or total > self.max_bytes):
+                continue
+            if self._remove(trash_path, throttle):
+                conn.execute("DELETE FROM items WHERE id = ?", (item_id,))
+                total -= size
+                freed += size
+                removed += 1
+        return {"measured": measured, "removed": removed, "bytes_freed": freed, "bytes_kept": total}
+
+    def start(self):
+        """Purge in a background thread every interval seconds"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._purge_loop, name="jarvis-trash-purger")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self._wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def wake(self):
+        """Run a purger pass now instead of at the next interval"""
+        self._wakeup.set()
+
+    def _purge_loop(self):
+        while not self.stop_event.is_set():
+            # One worker process purges at a time
+            if self.store is None or self.store.try_acquire('trash:lease', self.interval * 0.9):
+                try:
+                    self.purge()
+                except Exception as e:
+                    print(f"Trash purge error: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def _restart_after_fork(self):
+        was_running = self.thread is not None and not self.stop_event.is_set()
+        self.thread = None
+        self._local = threading.local()
+        if was_running:
+            self.start()
@@ -0,0 +1,234 @@
+"""
+Tree Operations Module
+Recursive copy, move and delete for whole directory trees
+The walk uses scandir while per-file work overlaps on a bounded thread pool,
+which hides per-file latency on trees with many small files; errors are
+collected and reported without aborting the rest of the tree
+"""
+
+import errno
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional
+
+import copy_engine
+
+MAX_REPORTED_ERRORS = 100
+
+TreeProgress = Callable[[Dict[str, Any]], Any]
+
+
+class TreeStats:
+    """Thread-safe counters for one tree operation"""
+
+    def __init__(self, progress: Optional[TreeProgress] = None):
+        self.files = 0
+        self.directories = 0
+        self.bytes = 0
+        self.errors: List[Dict[str, str]] = []
+        self.error_count = 0
+        self.progress = progress
+        self._lock = threading.Lock()
+
+    def add_file(self, size: int):
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+            snapshot = self._snapshot() if self.progress and self.files % 100 == 0 else None
+        if snapshot:
+            self.progress(snapshot)
+
+    def add_directory(self):
+        with self._lock:
+            self.directories += 1
+
+    def add_error(self, path: str, error: Exception):
+        with self._lock:
+            self.error_count += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({"path": path, "error": str(error)})
+            snapshot = self._snapshot() if self.progress else None
+        if snapshot:
+            self.progress(snapshot)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "files": self.files,
+            "directories": self.directories,
+            "bytes_done": self.bytes,
+            "error_count": self.error_count,
+            "last_error": self.errors[-1] if self.errors else None
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "files": self.files,
+                "directories": self.directories,
+                "bytes": self.bytes,
+                "error_count": self.error_count,
+                "errors": list(self.errors)
+            }
+
+
+class BoundedPool:
+    """ThreadPoolExecutor that blocks the walker instead of queueing unbounded work"""
+
+    def __init__(self, workers: int):
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="jarvis-tree")
+        self.slots = threading.BoundedSemaphore(max(1, workers) * 4)
+
+    def submit(self, fn, *args):
+        self.slots.acquire()
+        future = self.pool.submit(fn, *args)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.shutdown(wait=True)
+
+
+def _walk(root: str, stats: TreeStats, cancel: Optional[threading.Event]):
+    """Yield (directory, subdirectories, DirEntry files) top-down"""
+    stack = [root]
+    while stack:
+        if cancel is not None and cancel.is_set():
+            return
+        directory = stack.pop()
+        subdirs, files = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        else:
+                            files.append(entry)
+                    except OSError as e:
+                        stats.add_error(entry.path, e)
+        except OSError as e:
+            stats.add_error(directory, e)
+            continue
+        yield directory, subdirs, files
+        stack.extend(reversed(subdirs))
+
+
+def _check_outside(source: str, destination: str):
+    """Refuse a destination that is the source or inside it, which the walk would copy into forever"""
+    source_real = os.path.normcase(os.path.realpath(source))
+    destination_real = os.path.normcase(os.path.realpath(destination))
+    if destination_real == source_real or destination_real.startswith(source_real.rstrip(os.sep) + os.sep):
+        raise ValueError(f"Destination {destination} is inside the source {source}")
+
+
+def copy_tree(source: str, destination: str, workers: int = 8, progress: Optional[TreeProgress] = None,
+              cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Copy the tree at source to destination, overlapping file copies"""
+    _check_outside(source, destination)
+    stats = TreeStats(progress)
+    created = []
+
+    def copy_one(entry: os.DirEntry, target: str):
+        try:
+            if entry.is_symlink():
+                os.symlink(os.readlink(entry.path), target)
+                stats.add_file(0)
+                return
+            size = entry.stat().st_size
+            if size >= copy_engine.CHUNK_SIZE:
+                copy_engine.copy_file(entry.path, target, cancel=cancel)
+            else:
+                shutil.copy2(entry.path, target)
+            stats.add_file(size)
+        except copy_engine.CopyCancelled:
+            pass
+        except OSError as e:
+            stats.add_error(entry.path, e)
+
+    with BoundedPool(workers) as pool:
+        for directory, _, files in _walk(source, stats, cancel):
+            relative = os.path.relpath(directory, source)
+            target_dir = os.path.normpath(os.path.join(destination, relative))
+            try:
+                os.makedirs(target_dir, exist_ok=True)
+            except OSError as e:
+                stats.add_error(directory, e)
+                continue
+            stats.add_directory()
+            created.append((directory, target_dir))
+            for entry in files:
+                if cancel is not None and cancel.is_set():
+                    break
+                pool.submit(copy_one, entry, os.path.join(target_dir, entry.name))
+
+    # Directory timestamps last, deepest first, once their contents are written
+    for directory, target_dir in reversed(created):
+        try:
+            shutil.copystat(directory, target_dir)
+        except OSError:
+            pass
+    return {**stats.to_dict(), "cancelled": bool(cancel is not None and cancel.is_set())}
+
+
+def delete_tree(root: str, workers: int = 8, progress: Optional[TreeProgress] = None,
+                cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Delete the tree at root, unlinking files in parallel and directories bottom-up"""
+    stats = TreeStats(progress)
+    directories = []
+
+    def unlink_one(entry: os.DirEntry):
+        try:
+            size = entry.stat(follow_symlinks=False).st_size
+            os.unlink(entry.path)
+            stats.add_file(size)
+        except OSError as e:
+            stats.add_error(entry.path, e)
+
+    with BoundedPool(workers) as pool:
+        for directory, _, files in _walk(root, stats, cancel):
+            directories.append(directory)
+            for entry in files:
+                if cancel is not None and cancel.is_set():
+                    break
+                pool.submit(unlink_one, entry)
+
+    cancelled = bool(cancel is not None and cancel.is_set())
+    if not cancelled:
+        for directory in reversed(directories):
+            try:
+                os.rmdir(directory)
+                stats.add_directory()
+            except OSError as e:
+                # A non-empty parent is a consequence of a child error already reported
+                if e.errno not in (errno.ENOTEMPTY, errno.EEXIST) or not stats.error_count:
+                    stats.add_error(directory, e)
+    return {**stats.to_dict(), "cancelled": cancelled}
+
+
+def move_tree(source: str, destination: str, workers: int = 8, progress: Optional[TreeProgress] = None,
+              cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Rename the tree when on the same volume, otherwise copy it and delete the source"""
+    try:
+        os.rename(source, destination)
+        return {"files": None, "directories": None, "bytes": None, "error_count": 0,
+                "errors": [], "renamed": True, "cancelled": False}
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    result = copy_tree(source, destination, workers, progress, cancel)
+    if result['error_count'] or result['cancelled']:
+        # Never delete the source unless every file arrived
+        return {**result, "renamed": False, "source_kept": True}
+    delete_result = delete_tree(source, workers, cancel=cancel)
+    return {
+        **result,
+        "renamed": False,
+        "source_kept": bool(delete_result['error_count']),
+        "error_count": delete_result['error_count'],
+        "errors": delete_result['errors']
+    }
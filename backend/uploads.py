@@ -0,0 +1,139 @@
+"""
+Upload Sessions Module
+Chunked uploads for write_file: content too large for one request is sent
+in pieces to a hidden temp file next to the target and committed atomically
+Session metadata lives on disk so any worker process can continue a session
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+from fileio import atomic_write, append_file, replace_file, temp_path
+
+_SESSION_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadManager:
+    """Begin, append to, commit and abort upload sessions"""
+
+    def __init__(self, spool_dir: str, ttl: float = 3600, fsync: str = 'file'):
+        self.spool_dir = os.path.abspath(spool_dir)
+        self.ttl = ttl
+        self.fsync = fsync
+        self._last_purge = 0.0
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def _meta_path(self, upload_id: str) -> Optional[str]:
+        if not _SESSION_ID.match(upload_id or ''):
+            return None
+        return os.path.join(self.spool_dir, upload_id + '.json')
+
+    def _load(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        meta_path = self._meta_path(upload_id)
+        if meta_path is None:
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, session: Dict[str, Any]):
+        atomic_write(self._meta_path(session['id']), json.dumps(session).encode('utf-8'), fsync='none')
+
+    def _discard(self, session: Dict[str, Any]):
+        for path in (session['data_path'], self._meta_path(session['id'])):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def begin(self, target: str, mode: str = 'w') -> Dict[str, Any]:
+        """Open a session that will replace ('w') or append to ('a') target on commit"""
+        if mode not in ('w', 'a'):
+            return {"success": False, "error": "Mode must be 'w' or 'a'"}
+        self.purge_expired()
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        now = time.time()
+        session = {
+            "id": uuid.uuid4().hex,
+            "target": target,
+            "mode": mode,
+            "data_path": temp_path(target),
+            "created": now,
+            "updated": now
+        }
+        open(session['data_path'], 'xb').close()
+        self._save(session)
+        return {"success": True, "upload_id": session['id'], "path": target, "size": 0}
+
+    def append(self, upload_id: str, data: bytes, offset: Optional[int] = None) -> Dict[str, Any]:
+        """Add a chunk; offset, when given, must equal the bytes received so far so retries are safe"""
+        session = self._load(upload_id)
+        if session is None:
+            return {"success": False, "error": "Upload session not found"}
+        try:
+            size = os.path.getsize(session['data_path'])
+        except OSError:
+            return {"success": False, "error": "Upload data is missing"}
+        if offset is not None and int(offset) != size:
+            # The client can resume from size after a lost response or retry
+            return {"success": False, "error": "Offset does not match received size", "size": size}
+        append_file(session['data_path'], data, fsync='none')
+        session['updated'] = time.time()
+        self._save(session)
+        return {"success": True, "upload_id": upload_id, "size": size + len(data)}
+
+    def commit(self, upload_id: str, expected_size: Optional[int] = None) -> Dict[str, Any]:
+        """Move the received content into place and end the session"""
+        session = self._load(upload_id)
+        if session is None:
+            return {"success": False, "error": "Upload session not found"}
+        size = os.path.getsize(session['data_path'])
+        if expected_size is not None and int(expected_size) != size:
+            return {"success": False, "error": f"Expected {expected_size} bytes, received {size}", "size": size}
+        target = session['target']
+        if session['mode'] == 'w':
+            replace_file(session['data_path'], target, self.fsync)
+        else:
+            with open(session['data_path'], 'rb') as f:
+                append_file(target, iter(lambda: f.read(1024 * 1024), b''), self.fsync)
+        self._discard(session)
+        return {
+            "success": True,
+            "message": f"File {'written' if session['mode'] == 'w' else 'appended'} successfully",
+            "path": target,
+            "size": os.path.getsize(target),
+            "received": size
+        }
+
+    def abort(self, upload_id: str) -> Dict[str, Any]:
+        session = self._load(upload_id)
+        if session is None:
+            return {"success": False, "error": "Upload session not found"}
+        self._discard(session)
+        return {"success": True, "message": "Upload aborted", "upload_id": upload_id}
+
+    def purge_expired(self, force: bool = False) -> int:
+        """Drop sessions idle for longer than ttl (checked at most once a minute)"""
+        now = time.time()
+        if not force and now - self._last_purge < 60:
+            return 0
+        self._last_purge = now
+        purged = 0
+        try:
+            names = os.listdir(self.spool_dir)
+        except OSError:
+            return 0
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            session = self._load(name[:-5])
+            if session is not None and now - session.get('updated', 0) > self.ttl:
+                self._discard(session)
+                purged += 1
+        return purged
@@ -9,12 +9,13 @@ try:
     if backend_path not in sys.path:
         sys.path.append(backend_path)
     
-    from config import get_voice_settings
+    from config import get_voice_settings, brain_config
     from dotenv import load_dotenv
     load_dotenv()  # Load environment variables from .env file
 except ImportError:
     # If config or python-dotenv is not available, continue with defaults
     get_voice_settings = None
+    brain_config = None
 
 class AgentSpeechSystem:
     def __init__(self):
@@ -62,6 +63,15 @@ class AgentSpeechSystem:
         # Initialize text-to-speech engine
         self.engine = pyttsx3.init()
         self.setup_voice_properties()
+        
+        # Re-apply voice settings when the backend config is reloaded
+        if brain_config is not None:
+            brain_config.subscribe(self._on_config_change)
+    
+    def _on_config_change(self, changed, config):
+        """Update the TTS engine when voice settings change"""
+        if changed & {'VOICE_RATE', 'VOICE_VOLUME', 'VOICE_TYPE'}:
+            self.setup_voice_properties()
     
     def setup_voice_properties(self):
         """Configure the voice properties for the speech engine"""